@@ -0,0 +1,119 @@
+"""Micro-benchmark of the registered extraction engines on a local corpus.
+
+Usage: python benchmark_extractors.py path/to/corpus [--repeat 3]
+
+Every file in the corpus is probed by magic bytes and run through each
+engine registered for its format. Each engine runs in a fresh process so
+its peak RSS isn't inflated by engines that ran before it.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from extractors import ENGINES, extract_document, probe_format
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _peak_rss_mb():
+    """Larger of this process's peak RSS and its largest child's, in MB, or None where unsupported."""
+    if resource is None:
+        return None
+    # The two peaks were reached at different times, so adding them would overstate the peak
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    )
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_engine(file_format, engine, paths, repeat):
+    """Extract every file with one engine; runs in its own process."""
+    pages = 0
+    total_bytes = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for path in paths:
+            with open(path, "rb") as f:
+                data = f.read()
+            _, info = extract_document(data, fallback_format=file_format, engines={file_format: engine})
+            pages += len(info.get("pages") or ())
+            total_bytes += len(data)
+    return pages, total_bytes, time.perf_counter() - started, _peak_rss_mb()
+
+
+def collect_corpus(corpus_dir):
+    """Group corpus files by probed format; files that aren't PDF or DOCX count as text."""
+    corpus = {}
+    for root, _, files in os.walk(corpus_dir):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            file_format = probe_format(path)
+            if file_format is None and name.lower().endswith(".txt"):
+                file_format = "txt"
+            if file_format:
+                corpus.setdefault(file_format, []).append(path)
+    return corpus
+
+
+def benchmark(corpus_dir, repeat=1):
+    """Return one result row per (format, engine) pair."""
+    rows = []
+    context = multiprocessing.get_context("spawn")
+    for file_format, paths in sorted(collect_corpus(corpus_dir).items()):
+        for engine in sorted(ENGINES.get(file_format, {})):
+            # Not a multiprocessing.Pool: its workers are daemonic and can't start the
+            # page-parsing processes extract_pdf uses for long PDFs
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                pages, total_bytes, seconds, peak_rss = executor.submit(
+                    _run_engine, file_format, engine, paths, repeat
+                ).result()
+            rows.append({
+                "format": file_format,
+                "engine": engine,
+                "files": len(paths),
+                "pages/s": pages / seconds if pages and seconds else None,
+                "MB/s": total_bytes / (1024 * 1024) / seconds if seconds else None,
+                "seconds": seconds,
+                "peak RSS MB": peak_rss,
+            })
+    return rows
+
+
+def format_rows(rows):
+    columns = ["format", "engine", "files", "pages/s", "MB/s", "seconds", "peak RSS MB"]
+
+    def cell(column, value):
+        if value is None:
+            return "-"
+        if isinstance(value, float):
+            return f"{value:.3f}" if column == "seconds" else f"{value:.1f}"
+        return str(value)
+
+    table = [columns] + [[cell(column, row[column]) for column in columns] for row in rows]
+    widths = [max(len(line[i]) for line in table) for i in range(len(columns))]
+    return "\n".join("  ".join(value.ljust(width) for value, width in zip(line, widths)) for line in table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark document extraction engines")
+    parser.add_argument("corpus", help="Directory of sample PDF, DOCX and TXT files")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the corpus per engine")
+    args = parser.parse_args()
+
+    rows = benchmark(args.corpus, args.repeat)
+    if not rows:
+        print("No PDF, DOCX or TXT files found in the corpus.")
+        return
+    print(format_rows(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Compare extraction output formats on sample documents against a live LLM backend.
+
+Usage: python benchmark_output_formats.py path/to/corpus [--backend gemini] [--model NAME] [--prompt standard]
+
+Every document is extracted and sent once per format (see
+compact_tasks.TASK_FORMATS) in the apps' own extraction prompt, with the
+LLM response cache off. Output tokens are estimated from the response
+length (about 4 characters per token) the same way for every format.
+Latency is measured to the first streamed fragment and to the end of the
+response. Items counts the tasks in the expanded tree, so a cheaper
+format that loses tasks shows up.
+"""
+import argparse
+import time
+
+from benchmark_extractors import collect_corpus
+from chunking import DEFAULT_CHUNK_CHARS
+from compact_tasks import TASK_FORMATS
+from extractors import extract_document
+from llm_backends import create_backend
+from pipeline import estimate_tokens
+from summary_prompt import SUMMARY_PROMPTS, build_summary_prompt
+from tree_executor import count_tree_nodes
+
+
+def _run_format(backend, build_prompt, task_format, text):
+    """Stream one extraction; returns (output tokens, first fragment s, total s, items, parse error)."""
+    prompt = build_prompt(text, task_format)
+    fragments = []
+    first = None
+    started = time.perf_counter()
+    for fragment in backend.stream(prompt, temperature=0.1, json_schema=task_format.json_schema):
+        if first is None:
+            first = time.perf_counter() - started
+        fragments.append(fragment)
+    total = time.perf_counter() - started
+
+    output = "".join(fragments)
+    try:
+        items = count_tree_nodes(task_format.parse(output))
+        error = None
+    except ValueError as e:
+        items, error = 0, str(e)
+    return estimate_tokens(output, 0), first, total, items, error
+
+
+def benchmark(corpus_dir, backend, repeat=1, max_chars=DEFAULT_CHUNK_CHARS, build_prompt=build_summary_prompt):
+    """Return one result row per output format, totalled over the corpus."""
+    documents = []
+    for file_format, paths in sorted(collect_corpus(corpus_dir).items()):
+        for path in paths:
+            text, _ = extract_document(path, fallback_format=file_format)
+            # One prompt's worth, as a single chunk of a long document would be
+            documents.append(text[:max_chars])
+
+    rows = []
+    for name, task_format in TASK_FORMATS.items():
+        tokens = items = failures = runs = 0
+        first_total = seconds = 0.0
+        for _ in range(repeat):
+            for text in documents:
+                out_tokens, first, total, count, error = _run_format(backend, build_prompt, task_format, text)
+                tokens += out_tokens
+                first_total += first or total
+                seconds += total
+                items += count
+                failures += error is not None
+                runs += 1
+        rows.append({
+            "format": name,
+            "runs": runs,
+            "output tokens": tokens,
+            "tokens/item": tokens / items if items else None,
+            "items": items,
+            "parse failures": failures,
+            "first fragment s": first_total / runs if runs else None,
+            "seconds": seconds / runs if runs else None,
+        })
+
+    baseline = next((row for row in rows if row["format"] == "json"), None)
+    for row in rows:
+        row["vs json"] = (f"{row['output tokens'] / baseline['output tokens']:.0%}"
+                          if baseline and baseline["output tokens"] else None)
+    return rows
+
+
+def format_rows(rows):
+    columns = ["format", "runs", "output tokens", "vs json", "tokens/item", "items", "parse failures",
+               "first fragment s", "seconds"]
+
+    def cell(column, value):
+        if value is None:
+            return "-"
+        if isinstance(value, float):
+            return f"{value:.3f}" if column.endswith(" s") or column == "seconds" else f"{value:.1f}"
+        return str(value)
+
+    table = [columns] + [[cell(column, row[column]) for column in columns] for row in rows]
+    widths = [max(len(line[i]) for line in table) for i in range(len(columns))]
+    return "\n".join("  ".join(value.ljust(width) for value, width in zip(line, widths)) for line in table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extraction output formats")
+    parser.add_argument("corpus", help="Directory of sample PDF, DOCX and TXT files")
+    parser.add_argument("--backend", default="gemini", help="LLM backend: gemini, ollama or groq")
+    parser.add_argument("--model", default=None, help="Model name; defaults to the backend's default")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the corpus per format")
+    parser.add_argument("--prompt", default="standard", choices=sorted(SUMMARY_PROMPTS),
+                        help="Extraction prompt: standard (Gemini apps) or local (newllama)")
+    parser.add_argument("--max-chars", type=int, default=DEFAULT_CHUNK_CHARS,
+                        help="Characters of each document sent per prompt")
+    args = parser.parse_args()
+
+    backend = create_backend(args.backend, args.model)
+    rows = benchmark(args.corpus, backend, args.repeat, args.max_chars, SUMMARY_PROMPTS[args.prompt])
+    if not rows[0]["runs"]:
+        print("No PDF, DOCX or TXT files found in the corpus.")
+        return
+    print(format_rows(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from json_stream import repair_json
+
+# Characters of document text per extraction prompt
+DEFAULT_CHUNK_CHARS = 24000
+# Characters carried over from the end of one chunk into the next
+DEFAULT_OVERLAP_CHARS = 1000
+# Concurrent chunk extractions
+DEFAULT_CHUNK_WORKERS = 4
+
+# Lines that look like section headings: "# Title", "2.1 Title", "3) Title" or short ALL CAPS lines
+_HEADING_LINE = re.compile(
+    r"^[ \t]*(?:#{1,6}[ \t]+\S|\d+(?:\.\d+)*[.)]?[ \t]+[A-Za-z]|[A-Z][A-Z0-9 &/,\-]{3,}$)"
+)
+_MAX_HEADING_LENGTH = 100
+
+
+def find_section_starts(text):
+    """Offsets of lines in ``text`` that look like section headings."""
+    starts = []
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        stripped = line.strip()
+        if stripped and len(stripped) <= _MAX_HEADING_LENGTH and _HEADING_LINE.match(line):
+            starts.append(offset)
+        offset += len(line)
+    return starts
+
+
+def _split_long_section(section, max_chars):
+    """Split an oversized section on line boundaries, hard-cutting lines longer than ``max_chars``."""
+    pieces = []
+    current = ""
+    for line in section.splitlines(keepends=True):
+        while len(line) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if len(current) + len(line) > max_chars and current:
+            pieces.append(current)
+            current = ""
+        current += line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _overlap_tail(chunk, overlap_chars):
+    """At most the last ``overlap_chars`` of a chunk, starting at a line boundary when there is one."""
+    if overlap_chars <= 0:
+        return ""
+    if len(chunk) <= overlap_chars:
+        return chunk
+    cut = chunk.find("\n", len(chunk) - overlap_chars)
+    return chunk[cut + 1:] if cut != -1 else chunk[-overlap_chars:]
+
+
+def split_into_chunks(text, max_chars=DEFAULT_CHUNK_CHARS, overlap_chars=DEFAULT_OVERLAP_CHARS, boundaries=None):
+    """Split ``text`` into chunks of about ``max_chars`` on section boundaries.
+
+    ``boundaries`` are section start offsets (for example DOCX heading
+    offsets); without them heading-like lines are detected. Whole sections
+    are packed into a chunk while they fit, and each chunk after the first
+    starts with the tail of the previous one so items straddling a cut are
+    seen whole at least once. The overlap is capped at a quarter of
+    ``max_chars``. Text that fits in one chunk is returned as is.
+    """
+    if len(text) <= max_chars:
+        return [text] if text.strip() else []
+
+    starts = sorted({0, *(b for b in (boundaries or find_section_starts(text)) if 0 < b < len(text))})
+    sections = [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)])]
+
+    # An overlap as long as the chunk would leave no room for new text
+    overlap_chars = min(overlap_chars, max_chars // 4)
+    body_chars = max(max_chars - overlap_chars, 1)
+    bodies = []
+    current = ""
+    for section in sections:
+        for piece in (_split_long_section(section, body_chars) if len(section) > body_chars else [section]):
+            if len(current) + len(piece) > body_chars and current:
+                bodies.append(current)
+                current = ""
+            current += piece
+    if current:
+        bodies.append(current)
+
+    chunks = [bodies[0]]
+    for previous, body in zip(bodies, bodies[1:]):
+        chunks.append(_overlap_tail(previous, overlap_chars) + body)
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def parse_task_json(raw_output):
+    """The task list of a {"tasks": [...]} model response; raises ValueError if there is none.
+
+    Schema-constrained responses parse as they are. Anything else goes
+    through ``repair_json``, so prose around the object, missing commas or a
+    truncated tail don't cost a regeneration.
+    """
+    try:
+        data = json.loads(raw_output)
+    except (TypeError, ValueError):
+        data = json.loads(repair_json(raw_output or ""))
+    if not isinstance(data, dict) or not isinstance(data.get("tasks"), list):
+        raise ValueError('Model response has no "tasks" list')
+    return data["tasks"]
+
+
+def _title_key(title):
+    """Normalize a title so equivalent items compare equal: no numbering, case or punctuation."""
+    title = re.sub(r"^\s*\d+(?:\.\d+)*[.)]?\s*", "", str(title or ""))
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", title.lower()).split())
+
+
+def merge_task_trees(trees):
+    """Merge several task lists into one, folding together items with equivalent titles.
+
+    Duplicates are matched per level under the same parent. The longer
+    description wins, and their subtasks are merged the same way. Order
+    follows first appearance.
+    """
+    merged = []
+    by_key = {}
+    for tasks in trees:
+        for task in tasks or []:
+            if not isinstance(task, dict):
+                continue
+            key = _title_key(task.get("title"))
+            existing = by_key.get(key) if key else None
+            if existing is None:
+                node = {k: v for k, v in task.items() if k != "subtasks"}
+                node["subtasks"] = merge_task_trees([task.get("subtasks", [])])
+                if not node["subtasks"]:
+                    del node["subtasks"]
+                merged.append(node)
+                if key:
+                    by_key[key] = node
+                continue
+
+            if len(str(task.get("description") or "")) > len(str(existing.get("description") or "")):
+                existing["description"] = task["description"]
+            subtasks = merge_task_trees([existing.get("subtasks", []), task.get("subtasks", [])])
+            if subtasks:
+                existing["subtasks"] = subtasks
+    return merged
+
+
+def map_reduce_tasks(chunks, extract_chunk, max_workers=DEFAULT_CHUNK_WORKERS, progress_callback=None,
+                     partial_callback=None):
+    """Run ``extract_chunk(chunk) -> tasks`` over all chunks concurrently and merge the results.
+
+    ``extract_chunk`` runs on worker threads and must not touch Streamlit.
+    ``progress_callback(done, total)`` runs on the calling thread, as does
+    ``partial_callback(tasks)`` with the merge of every chunk finished so
+    far, for progressive display. Returns
+    (merged_tasks, errors) where errors lists (chunk_index, message) for
+    chunks that failed; the other chunks are still merged.
+    """
+    results = [None] * len(chunks)
+    errors = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(extract_chunk, chunk): idx for idx, chunk in enumerate(chunks)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            idx = futures[future]
+            try:
+                results[idx] = future.result()
+            except Exception as e:
+                errors.append((idx, str(e)))
+            else:
+                if partial_callback and results[idx]:
+                    partial_callback(merge_task_trees(tasks for tasks in results if tasks))
+            if progress_callback:
+                progress_callback(done, len(chunks))
+
+    # Merge in document order so the first mention of an item sets its position
+    return merge_task_trees(tasks for tasks in results if tasks), sorted(errors)
@@ -0,0 +1,137 @@
+import re
+from collections import namedtuple
+
+from chunking import parse_task_json
+from json_stream import TASK_SCHEMA, TaskStreamParser
+
+# Output format block of the extraction prompt for the {"tasks": [...]} tree, with the rules
+# that only make sense for that format
+JSON_FORMAT = """Format the output as JSON with the following structure:
+{
+  "tasks": [
+    {
+      "title": "Main Task 1",
+      "description": "Take description of main task 1 from document",
+      "subtasks": [
+        {
+          "title": "Subtask 1.1",
+          "description": "Take description of subtask 1.1 from document",
+          "subtasks": [
+            {
+              "title": "Sub-subtask 1.1.1",
+              "description": "Take description of sub-subtask 1.1.1 from document"
+            }
+          ]
+        }
+      ]
+    }
+  ]
+}
+Output rules:
+- use only text from the document to fill in the JSON structure
+- Ensure that the JSON is valid and well-structured
+- Do not add any additional text or comments outside the JSON structure
+- Don't use any special characters in the title and description"""
+
+# Output format block for the compact outline: no keys, quotes, braces or indentation to pay for
+OUTLINE_FORMAT = """Format the output as an outline with one line per item and nothing else:
+# Main Task 1 :: description of main task 1 from the document
+## Subtask 1.1 :: description of subtask 1.1 from the document
+### Sub-subtask 1.1.1 :: description of sub-subtask 1.1.1 from the document
+The number of # marks the level; each item belongs to the nearest item above it with fewer #.
+Output rules:
+- use only text from the document to fill in the outline
+- Start every line with its # marks and put :: between the title and the description, even when the description is empty
+- Do not add headings, text or comments that are not outline items
+- Apart from the # marks and ::, don't use any special characters in the title and description"""
+
+# "## Title :: description"; the separator is required, so a "# Extracted Tasks" heading isn't an item
+_OUTLINE_ITEM = re.compile(r"^\s*(#{1,6})\s*(.*?::.*?)\s*$")
+_SEPARATOR = "::"
+
+
+def _outline_item(line):
+    """(level, task) for an outline line, or None for anything else."""
+    match = _OUTLINE_ITEM.match(line)
+    if not match:
+        return None
+    title, _, description = match.group(2).partition(_SEPARATOR)
+    title = title.strip().strip("*_").strip()
+    if not title:
+        return None
+    return len(match.group(1)), {"title": title, "description": description.strip()}
+
+
+def expand_outline(text):
+    """Expand an outline response into the {"tasks": [...]} task list.
+
+    Lines that aren't outline items (prose, code fences, headings without
+    "::") are ignored. An item whose level skips one (# then ###) goes
+    under the nearest item with a lower level.
+    """
+    tasks = []
+    # (level, task) from the top level down to the latest item
+    ancestors = []
+    for line in (text or "").splitlines():
+        item = _outline_item(line)
+        if item is None:
+            continue
+        level, task = item
+        while ancestors and ancestors[-1][0] >= level:
+            ancestors.pop()
+        if ancestors:
+            ancestors[-1][1].setdefault("subtasks", []).append(task)
+        else:
+            tasks.append(task)
+        ancestors.append((level, task))
+    return tasks
+
+
+def parse_outline_tasks(raw_output):
+    """Task list of an outline response; raises ValueError if there are no items."""
+    tasks = expand_outline(raw_output)
+    if not tasks:
+        raise ValueError("No outline items found in model response")
+    return tasks
+
+
+class OutlineStreamParser:
+    """Incremental outline parser with the TaskStreamParser interface.
+
+    ``feed(fragment)`` returns the top-level tasks finished by that
+    fragment, i.e. those followed by the next top-level line. The last one
+    is only known once the full response has been parsed.
+    """
+
+    def __init__(self):
+        self._partial = ""
+        self._lines = []
+        self.tasks = []
+
+    def feed(self, fragment):
+        if not fragment:
+            return []
+        lines = (self._partial + fragment).split("\n")
+        self._partial = lines.pop()
+        completed = []
+        for line in lines:
+            item = _outline_item(line)
+            if item is not None and item[0] == 1 and self._lines:
+                completed.extend(expand_outline("\n".join(self._lines)))
+                self._lines = []
+            self._lines.append(line)
+        self.tasks.extend(completed)
+        return completed
+
+
+# How each output format is requested, streamed and parsed
+TaskFormat = namedtuple("TaskFormat", ["prompt_block", "json_schema", "stream_parser", "parse"])
+TASK_FORMATS = {
+    "json": TaskFormat(JSON_FORMAT, TASK_SCHEMA, TaskStreamParser, parse_task_json),
+    "outline": TaskFormat(OUTLINE_FORMAT, None, OutlineStreamParser, parse_outline_tasks)
+}
+
+
+def resolve_task_format(name):
+    """TaskFormat for ``name``; unknown names get the JSON format."""
+    return TASK_FORMATS.get((name or "").strip().lower(), TASK_FORMATS["json"])
@@ -1,7 +1,4 @@
 import streamlit as st
-import docx2txt
-import tempfile
-import requests
 import pandas as pd
 import os
 import re
@@ -9,8 +6,31 @@ import json
 import time
 from dotenv import load_dotenv
 from github import Github
-import google.generativeai as genai
-import PyPDF2
+from jira_client import (
+    JiraClient,
+    create_issue,
+    create_issue_tree_bulk,
+    create_issue_tree_concurrent,
+    get_cached_issue_types,
+    invalidate_issue_types,
+)
+from github_client import (
+    DEFAULT_BRANCH_WORKERS,
+    RemoteFileIndex,
+    create_branches,
+    git_blob_sha,
+    list_branch_names,
+    resolve_base_sha,
+)
+from ledger import WorkflowLedger, document_key, ledger_path
+from tree_executor import iter_tree
+from extractors import SPILL_THRESHOLD_BYTES, extract_document, parse_engine_config, spilled
+from llm_backends import create_backend
+from llm_cache import LLMResponseCache
+from llm_app import generate_with_llm, llm_cache_caption, prefilter_document, read_llm_settings, summarize_with_llm
+from extraction_cache import DEFAULT_MAX_BYTES, ExtractionCache, content_key
+from pipeline import TokenBucketLimiter, run_stages
+from testcase_batching import generate_batch, plan_batches
 
 # Load environment variables from .env file
 load_dotenv()
@@ -22,8 +42,20 @@ JIRA_API_TOKEN = os.getenv("JIRA_API_TOKEN")
 JIRA_PROJECT_KEY = os.getenv("JIRA_PROJECT_KEY")
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 GITHUB_REPO = os.getenv("GITHUB_REPO")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=GEMINI_API_KEY)
+# Upper bound on concurrent Jira writes in "Concurrent" creation mode
+JIRA_MAX_WORKERS = int(os.getenv("JIRA_MAX_WORKERS", "10"))
+# Upper bound on concurrent GitHub ref creations
+GITHUB_MAX_WORKERS = int(os.getenv("GITHUB_MAX_WORKERS", str(DEFAULT_BRANCH_WORKERS)))
+# Uploads above this size are spilled to a temp file instead of parsed in memory
+UPLOAD_SPILL_MB = int(os.getenv("UPLOAD_SPILL_MB", str(SPILL_THRESHOLD_BYTES // (1024 * 1024))))
+# Extraction engine per format, e.g. "pdf=pymupdf,docx=stream"; unset formats use the defaults
+EXTRACTION_ENGINES = parse_engine_config(os.getenv("EXTRACTION_ENGINES", ""))
+# Size bound of the on-disk extraction cache, in megabytes
+EXTRACTION_CACHE_MB = int(os.getenv("EXTRACTION_CACHE_MB", str(DEFAULT_MAX_BYTES // (1024 * 1024))))
+# LLM backend, response cache, rate limits and task extraction; see llm_app.read_llm_settings
+LLM = read_llm_settings()
+# Concurrent test case generations; pushes and comments use the GitHub and Jira bounds
+TEST_CASE_WORKERS = int(os.getenv("TEST_CASE_WORKERS", "4"))
 
 # Initialize session state
 if 'tasks_data' not in st.session_state:
@@ -42,42 +74,36 @@ if "view_and_manage" not in st.session_state:
     st.session_state["view_and_manage"] = False
 
 # Your existing functions (keeping all of them)
-def extract_text_from_docx(docx_path):
-    return docx2txt.process(docx_path)
+def extract_text_from_file(source, file_type):
+    """Extract text from a file path or in-memory buffer with the engine configured for its format.
 
-def extract_text_from_pdf(pdf_path):
-    """Extract text from a PDF file."""
-    text = ""
+    The format is probed from the file's magic bytes; ``file_type`` (the
+    extension) is only used when probing finds nothing, as for plain text.
+    """
+    progress = st.progress(0, text="Extracting document...")
     try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text()
+        text, info = extract_document(
+            source,
+            fallback_format=file_type,
+            engines=EXTRACTION_ENGINES,
+            progress_callback=lambda done, total: progress.progress(done / total, text=f"Extracted {done}/{total} pages")
+        )
+        progress.empty()
+        # (start, end) offsets of each PDF page and (level, title, offset) of
+        # each DOCX heading in the text, for later stages
+        st.session_state.document_pages = info.get("pages")
+        st.session_state.document_outline = info.get("outline")
+        st.caption(f"Extracted {info['format'].upper()} with the {info['engine']} engine")
         return text
     except Exception as e:
-        st.error(f"Error extracting text from PDF: {e}")
-        return None
-
-def extract_text_from_txt(txt_path):
-    """Extract text from a TXT file."""
-    try:
-        with open(txt_path, 'r', encoding='utf-8') as file:
-            return file.read()
-    except Exception as e:
-        st.error(f"Error extracting text from TXT: {e}")
+        progress.empty()
+        st.error(f"Error extracting text from {file_type.upper()}: {e}")
         return None
 
-def extract_text_from_file(file_path, file_type):
-    """Extract text from a file based on its type."""
-    if file_type == 'docx':
-        return extract_text_from_docx(file_path)
-    elif file_type == 'pdf':
-        return extract_text_from_pdf(file_path)
-    elif file_type == 'txt':
-        return extract_text_from_txt(file_path)
-    else:
-        st.error(f"Unsupported file type: {file_type}")
-        return None
+@st.cache_resource
+def get_extraction_cache():
+    """On-disk extraction cache shared across reruns, so hit counts accumulate"""
+    return ExtractionCache(max_bytes=EXTRACTION_CACHE_MB * 1024 * 1024)
 
 def prrse_tasks(text):
     lines = text.split('\n')
@@ -86,78 +112,25 @@ def prrse_tasks(text):
 def clean_text(text):
     return text.encode("utf-8", errors="ignore").decode("utf-8", errors="ignore")
 
-def summarize_with_gemini(text):
-    prompt = f"""
-Document Task Extraction for Jira Issues
-
-Please analyze the provided document (PDF, DOCX, or TXT) and extract all tasks that should be created as Jira issues. Organize them hierarchically as follows:
-
-1. Identify main tasks/topics that will serve as "Epics" in Jira
-2. Identify secondary tasks that will be "Tasks" under their respective Epics
-3. Identify detailed work items that will be "Subtasks" under their respective Tasks
-4. If a sub-subtask has its own subtasks, include them as sub-subtasks
-5. the description should be taken from the document
-6. keep the descriptions as short as possible but meaningful and concise which match in my document.
-7. make sure to don't miss-out and infromation from the document
-8. Do not include any sections related to Overview, Purpose, Scope, Tech stack suggestions, Time or hour estimates, Web design notes, Total days or effort summaries.
-Format the output as JSON with the following structure:
-{{
-  "tasks": [
-    {{
-      "title": "Main Task 1",
-      "description": "Take description of main task 1 from document",
-      "subtasks": [
-        {{
-          "title": "Subtask 1.1",
-          "description": "Take description of subtask 1.1 from document",
-          "subtasks": [
-            {{
-              "title": "Sub-subtask 1.1.1",
-              "description": "Take description of sub-subtask 1.1.1 from document"
-            }}
-          ]
-        }}
-      ]
-    }}
-  ]
-}}
-Important Guidelines:
-- don't add None, Select, and choose between  in description of tasks
-- if round brackets are used in the document then remove them from the description
-- if there are smimilar sub-tasks put them in under one related task 
-- if description is more than 200 characters then convert into subtasks
-- use only text from the document to fill in the JSON structure
-- Do not add any additional text or comments outside the JSON structure
-- don't include any explanations or summaries
-- don't use any extra text outside from the document
-- Stricly Don't use \n or \t in the title and description
-- Don't use any special characters in the title and description
-Given the following document content, remove any sections related to:
-- Overview Purpose Scope
-- Tech stack suggestions
-- Time or hour estimates
-- Web design notes
-- Total days or effort summaries
-Document Content:
-\"\"\"
-{text}
-\"\"\"
-"""
-    try:
-        model = genai.GenerativeModel("gemini-2.0-flash")
-        response = model.generate_content(prompt,
-        generation_config={"temperature": 0.1})
-        raw_output = response.text.strip()
-
-        match = re.search(r"\{[\s\S]*\}", raw_output)
-        if match:
-            return match.group(0)
-        else:
-            st.warning("No JSON block found in Gemini response.")
-            return raw_output  # fallback
-    except Exception as e:
-        st.error(f"Gemini API error: {e}")
-        return None
+@st.cache_resource
+def get_llm_cache():
+    """LLM response cache shared across reruns, so hit counts accumulate"""
+    return LLMResponseCache(ttl=LLM.cache_ttl_hours * 3600, max_bytes=LLM.cache_mb * 1024 * 1024)
+
+@st.cache_resource
+def get_llm_limiter():
+    """LLM rate limiter shared by every thread and rerun, so the budget is global"""
+    return TokenBucketLimiter(rpm=LLM.rpm, tpm=LLM.tpm)
+
+@st.cache_resource
+def get_llm_backend():
+    """Configured LLM backend; its pooled client is shared across reruns and threads"""
+    return create_backend(LLM.backend, LLM.model, max_concurrency=LLM.max_concurrency,
+                          cache=get_llm_cache(), limiter=get_llm_limiter())
+
+def report_message(kind, message):
+    """Show a message from llm_app as st.caption, st.warning or st.error"""
+    getattr(st, kind)(message)
 
 # Your existing display and utility functions
 def count_tasks(tasks_data):
@@ -498,7 +471,8 @@ def save_edited_tasks(tasks_data):
     """Save edited tasks back to JSON file"""
     try:
         with open("geminisummary.json", "w", encoding="utf-8") as f:
-            json.dump({"tasks": tasks_data}, f, indent=2, ensure_ascii=False)
+            json.dump({"tasks": tasks_data, "document": st.session_state.get("document_key")}, f,
+                      indent=2, ensure_ascii=False)
         st.success("✅ Tasks saved successfully!")
         return True
     except Exception as e:
@@ -506,12 +480,15 @@ def save_edited_tasks(tasks_data):
         return False
 
 # NEW FUNCTIONALITY 2: PROJECT SELECTION INTERFACE
+@st.cache_resource
+def get_jira_client():
+    """Shared Jira client whose connection pool survives Streamlit reruns"""
+    return JiraClient(JIRA_BASE_URL, JIRA_EMAIL, JIRA_API_TOKEN)
+
 def get_jira_projects():
     """Fetch available Jira projects"""
-    url = f"{JIRA_BASE_URL}/rest/api/3/project"
-    auth = (JIRA_EMAIL, JIRA_API_TOKEN)
     try:
-        response = requests.get(url, auth=auth)
+        response = get_jira_client().get("/rest/api/3/project")
         if response.status_code == 200:
             projects = response.json()
             return [(p["key"], p["name"]) for p in projects]
@@ -521,11 +498,20 @@ def get_jira_projects():
         st.error(f"Failed to fetch Jira projects: {e}")
     return []
 
+@st.cache_resource
+def get_github_client():
+    """Shared GitHub client reused across Streamlit reruns"""
+    return Github(GITHUB_TOKEN, pool_size=GITHUB_MAX_WORKERS)
+
+@st.cache_resource
+def get_github_repo(repo_name):
+    """Cached repository handle so per-branch calls don't re-fetch it"""
+    return get_github_client().get_repo(repo_name)
+
 def get_github_repos():
     """Fetch available GitHub repositories"""
     try:
-        g = Github(GITHUB_TOKEN)
-        user = g.get_user()
+        user = get_github_client().get_user()
         repos = user.get_repos()
         return [(repo.full_name, repo.name) for repo in repos]
     except Exception as e:
@@ -533,10 +519,8 @@ def get_github_repos():
     return []
 def get_jira_account_id():
     """Fetch the Atlassian accountId for the current Jira user."""
-    url = f"{JIRA_BASE_URL}/rest/api/3/myself"
-    auth = (JIRA_EMAIL, JIRA_API_TOKEN)
     try:
-        response = requests.get(url, auth=auth)
+        response = get_jira_client().get("/rest/api/3/myself")
         if response.status_code == 200:
             return response.json().get("accountId")
         else:
@@ -546,13 +530,6 @@ def get_jira_account_id():
     return None
 def create_jira_project(project_key, project_name, project_type="software"):
     """Create a new Jira project"""
-    url = f"{JIRA_BASE_URL}/rest/api/3/project"
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json"
-    }
-    auth = (JIRA_EMAIL, JIRA_API_TOKEN)
-
     # Select correct template key based on project_type
     template_keys = {
         "software": "com.pyxis.greenhopper.jira:gh-simplified-agility-scrum",
@@ -575,8 +552,10 @@ def create_jira_project(project_key, project_name, project_type="software"):
     }
 
     try:
-        response = requests.post(url, json=payload, headers=headers, auth=auth)
+        response = get_jira_client().post("/rest/api/3/project", json=payload)
         if response.status_code == 201:
+            # A new project gets its own issue type scheme
+            invalidate_issue_types(JIRA_BASE_URL, project_key)
             return True, response.json()
         else:
             # Check for duplicate project name/key error
@@ -598,8 +577,7 @@ def create_jira_project(project_key, project_name, project_type="software"):
 def create_github_repo(repo_name, description="", private=False):
     """Create a new GitHub repository"""
     try:
-        g = Github(GITHUB_TOKEN)
-        user = g.get_user()
+        user = get_github_client().get_user()
         repo = user.create_repo(
             name=repo_name,
             description=description,
@@ -749,15 +727,20 @@ def reset_workflow_state():
     st.session_state.jira_created = False
     st.session_state.branches_created = False
     st.session_state.tests_created = False
+    get_ledger().clear()
+
+@st.cache_resource
+def load_ledger(key):
+    """Ledger file of one document, loaded once and shared by every session working on it"""
+    return WorkflowLedger(ledger_path(key))
+
+def get_ledger():
+    """Persistent per-node ledger of created issues, branches and test pushes for the current document"""
+    return load_ledger(st.session_state.get("document_key"))
 
 # Your existing Jira and GitHub functions (keeping them all)
-def get_valid_issue_types():
-    url = f"{JIRA_BASE_URL}/rest/api/3/issuetype"
-    auth = (JIRA_EMAIL, JIRA_API_TOKEN)
-    response = requests.get(url, auth=auth)
-    if response.status_code == 200:
-        return [item["name"] for item in response.json()]
-    return []
+def get_valid_issue_types(project_key=None):
+    return get_cached_issue_types(get_jira_client(), project_key)
 
 def create_jira_issue(summary, description, issue_type="Epic", parent_id=None, parent_type=None, project_key=None):
     if not project_key:
@@ -765,14 +748,7 @@ def create_jira_issue(summary, description, issue_type="Epic", parent_id=None, p
     
     st.write(f"📝 Creating Jira issue: {summary}")
 
-    url = f"{JIRA_BASE_URL}/rest/api/3/issue"
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json"
-    }
-    auth = (JIRA_EMAIL, JIRA_API_TOKEN)
-
-    valid_types = get_valid_issue_types()
+    valid_types = get_valid_issue_types(project_key)
 
     if not parent_id:
         issue_type_name = "Epic"
@@ -787,60 +763,39 @@ def create_jira_issue(summary, description, issue_type="Epic", parent_id=None, p
         st.warning(f"⚠️ Issue type '{issue_type_name}' is invalid. Falling back to 'Task'.")
         issue_type_name = "Task"
 
-    payload = {
-        "fields": {
-            "project": {"key": project_key},
-            "summary": summary,
-            "description": {
-                "type": "doc",
-                "version": 1,
-                "content": [
-                    {
-                        "type": "paragraph",
-                        "content": [{"type": "text", "text": description or ""}]
-                    }
-                ]
-            },
-            "issuetype": {"name": issue_type_name}
-        }
-    }
+    issue_key, error = create_issue(
+        get_jira_client(), project_key, summary, description, issue_type_name, parent_key=parent_id
+    )
 
-    if issue_type_name == "Subtask" and parent_id:
-        payload["fields"]["parent"] = {"key": parent_id}
-    elif issue_type_name == "Task" and parent_id:
-        payload["fields"]["parent"] = {"key": parent_id}
-
-    response = requests.post(url, json=payload, headers=headers, auth=auth)
-
-    if response.status_code == 201:
-        issue_key = response.json().get("key")
+    if issue_key:
         st.success(f"✅ Created {issue_type_name}: {issue_key}")
-        
-        # Store the issue key in session state
-        if 'jira_issue_keys' not in st.session_state:
-            st.session_state.jira_issue_keys = {}
-        st.session_state.jira_issue_keys[summary] = issue_key
-        
         return issue_key, issue_type_name
     else:
         st.error(f"❌ Failed to create {issue_type_name}: {summary}")
-        st.code(response.text)
+        st.code(error)
         return None, None
 
-def create_github_branch(branch_name, base="main", repo_name=None):
+def get_base_sha(base="main", repo_name=None):
+    """Resolve the head commit of the base branch; call once per run"""
     if not repo_name:
         repo_name = st.session_state.selected_repo
     
-    g = Github(GITHUB_TOKEN)
-    repo = g.get_repo(repo_name)
-
-    try:
-        source = repo.get_branch(base)
-    except Exception as e:
+    base_sha = resolve_base_sha(get_github_repo(repo_name), base)
+    if not base_sha:
         st.error(f"⚠️ Could not find base branch '{base}'. Check if it exists in your GitHub repo.")
-        st.stop()
+    return base_sha
 
-    repo.create_git_ref(ref=f"refs/heads/{branch_name}", sha=source.commit.sha)
+def create_github_branch(branch_name, base="main", repo_name=None, base_sha=None):
+    if not repo_name:
+        repo_name = st.session_state.selected_repo
+    
+    if base_sha is None:
+        base_sha = get_base_sha(base, repo_name)
+        if not base_sha:
+            return
+    
+    # With the repo handle cached and the base SHA resolved, each branch is one API call
+    get_github_repo(repo_name).create_git_ref(ref=f"refs/heads/{branch_name}", sha=base_sha)
 
 def generate_test_case_prompt(ticket):
     """Generate a prompt for test case generation"""
@@ -857,35 +812,38 @@ Title: {ticket['summary']}
 Description: {ticket['description']}
 """
 
-def push_test_cases_to_branch(repo_name, branch_name, file_path, file_content):
-    """Push test case files to their respective GitHub branches"""
+def push_test_cases_to_branch(repo_name, branch_name, file_path, file_content, file_index=None):
+    """Push test case files to their respective GitHub branches.
+
+    The remote blob SHA comes from one tree listing per branch (``file_index``)
+    and is compared with the locally computed SHA, so unchanged files are
+    skipped and changed ones are updated without reading them first.
+    """
     try:
-        g = Github(GITHUB_TOKEN)
-        repo = g.get_repo(repo_name)
+        repo = get_github_repo(repo_name)
+        if file_index is None:
+            file_index = RemoteFileIndex(repo)
         
-        # Get the branch
-        branch = repo.get_branch(branch_name)
+        remote_sha = file_index.sha(branch_name, file_path)
+        if remote_sha == git_blob_sha(file_content):
+            return True, f"Test cases on {branch_name} are unchanged, skipped push"
         
-        # Create or update the file
-        try:
-            # Try to get the file first
-            contents = repo.get_contents(file_path, ref=branch_name)
-            # If file exists, update it
-            repo.update_file(
+        if remote_sha:
+            result = repo.update_file(
                 path=file_path,
                 message=f"Update test cases for {branch_name}",
                 content=file_content,
-                sha=contents.sha,
+                sha=remote_sha,
                 branch=branch_name
             )
-        except Exception:
-            # If file doesn't exist, create it
-            repo.create_file(
+        else:
+            result = repo.create_file(
                 path=file_path,
                 message=f"Add test cases for {branch_name}",
                 content=file_content,
                 branch=branch_name
             )
+        file_index.update(branch_name, file_path, result["content"].sha)
         
         return True, f"Successfully pushed test cases to {branch_name}"
     except Exception as e:
@@ -893,13 +851,6 @@ def push_test_cases_to_branch(repo_name, branch_name, file_path, file_content):
 
 def add_comment_to_jira_issue(issue_key, comment_content):
     """Add a comment to a Jira issue"""
-    url = f"{JIRA_BASE_URL}/rest/api/3/issue/{issue_key}/comment"
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json"
-    }
-    auth = (JIRA_EMAIL, JIRA_API_TOKEN)
-    
     payload = {
         "body": {
             "type": "doc",
@@ -914,7 +865,7 @@ def add_comment_to_jira_issue(issue_key, comment_content):
     }
     
     try:
-        response = requests.post(url, json=payload, headers=headers, auth=auth)
+        response = get_jira_client().post(f"/rest/api/3/issue/{issue_key}/comment", json=payload)
         if response.status_code == 201:
             return True, "Comment added successfully"
         else:
@@ -922,108 +873,170 @@ def add_comment_to_jira_issue(issue_key, comment_content):
     except Exception as e:
         return False, f"Error adding comment: {str(e)}"
 
-def simulate_test_case_generation_ai(ticket, output_dir="test_cases", repo_name=None, branch_name=None):
-    """Generate test cases using AI and optionally push to GitHub and Jira"""
-    import google.generativeai as genai
-    try:
-        os.makedirs(output_dir, exist_ok=True)
-        file_path = os.path.join(output_dir, f"{ticket['key']}_test_cases.md")
+def save_test_case_content(ticket, ai_output, output_dir="test_cases"):
+    """Wrap generated test cases in the ticket's markdown header and save a local copy"""
+    os.makedirs(output_dir, exist_ok=True)
+    file_path = os.path.join(output_dir, f"{ticket['key']}_test_cases.md")
 
-        prompt = generate_test_case_prompt(ticket)
+    test_case_content = f"# Test Cases for {ticket['key']} - {ticket['summary']}\n\n{ai_output}"
+    
+    # Save locally
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(test_case_content)
+    return test_case_content
 
-        model = genai.GenerativeModel("gemini-2.0-flash")
-        response = model.generate_content(prompt)
-        ai_output = response.text.strip()
+def generate_test_case_content(ticket, output_dir="test_cases"):
+    """Generate the test case markdown for a ticket and save a local copy"""
+    prompt = generate_test_case_prompt(ticket)
 
-        test_case_content = f"# Test Cases for {ticket['key']} - {ticket['summary']}\n\n{ai_output}"
-        
-        # Save locally
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(test_case_content)
-            
-        # If repo and branch are provided, push to GitHub
-        if repo_name and branch_name:
-            github_path = f"test_cases/{ticket['key']}_test_cases.md"
-            success, message = push_test_cases_to_branch(repo_name, branch_name, github_path, test_case_content)
-            if not success:
-                st.warning(f"Warning: {message}")
-            else:
-                st.success(f"✅ Test cases pushed to {branch_name}")
-        
-        # Add test cases as a comment in Jira
-        # Get the Jira issue key from the ticket
-        jira_issue_key = ticket.get('jira_key')  # This should be set when creating the Jira issue
-        if jira_issue_key:
-            success, message = add_comment_to_jira_issue(jira_issue_key, test_case_content)
-            if not success:
-                st.warning(f"Warning: Failed to add test cases to Jira issue {jira_issue_key}: {message}")
-            else:
-                st.success(f"✅ Test cases added to Jira issue {jira_issue_key}")
-                
-    except Exception as e:
-        st.error(f"❌ Error generating test cases for {ticket['key']}: {e}")
-        fallback_path = os.path.join(output_dir, f"{ticket['key']}_error.log")
-        with open(fallback_path, "w", encoding="utf-8") as f:
-            f.write(f"# Critical error while processing {ticket['key']}\nError: {str(e)}")
+    ai_output = generate_with_llm(llm_backend, prompt, bypass_llm_cache).strip()
+
+    return save_test_case_content(ticket, ai_output, output_dir)
 
 def sanitize_branch_name(name):
     name = name.replace(" ", "_")
     name = re.sub(r'[^a-zA-Z0-9_\-\/]', '', name)
     return name
 
-def walk_tasks_for_test_cases(tasks, parent_key="T", repo_name=None):
-    for idx, task in enumerate(tasks):
-        task_key = f"{parent_key}{idx+1}"
-        # Get the Jira issue key from session state
-        jira_key = st.session_state.jira_issue_keys.get(task.get("title", ""))
+def branch_name_for(path, title):
+    """Branch name for a tree node, e.g. T1.2 -> feature_1_2_<title>"""
+    return f"feature_{path[1:].replace('.', '_')}_{sanitize_branch_name(title)}".lower()
+
+def walk_tasks_for_test_cases(tasks, repo_name=None, output_dir="test_cases"):
+    """Generate and push test cases for every node, skipping nodes the ledger marks as done.
+
+    Generation, GitHub pushes and Jira comments run as concurrent stages, so
+    one node's push overlaps the next node's generation. With
+    LLM.test_case_batch_size above 1 several tickets share each generation
+    request, and every node of a batch moves on to its push as soon as that
+    batch is done. LLM calls share ``llm_limiter``. Shows a status row per
+    node and a per-stage throughput table; returns True when every node
+    completed.
+    """
+    ledger = get_ledger()
+    # One tree listing per branch for the whole run
+    file_index = RemoteFileIndex(get_github_repo(repo_name)) if repo_name else None
+    
+    items = []
+    titles = {}
+    for path, task, depth in iter_tree(tasks, max_depth=3):
+        title = task.get("title", "")
+        entry = ledger.get(path, title)
+        if entry.get("tests_pushed") and entry.get("tests_repo") == repo_name:
+            continue
+        titles[path] = title
         ticket = {
-            "key": task_key,
-            "summary": task.get("title", ""),
+            "key": path,
+            "summary": title,
             "description": task.get("description", ""),
-            "jira_key": jira_key  # Add the Jira issue key to the ticket
+            "jira_key": entry.get("jira_key")
         }
-        
-        # Generate branch name for this task
-        branch_name = f"feature_{idx+1}_{sanitize_branch_name(task['title'])}".lower()
-        
-        # Generate and push test cases
-        simulate_test_case_generation_ai(ticket, repo_name=repo_name, branch_name=branch_name)
-        
-        if "subtasks" in task and task["subtasks"]:
-            for st_idx, stask in enumerate(task["subtasks"]):
-                sub_task_key = f"{task_key}.{st_idx+1}"
-                # Get the Jira issue key for the subtask
-                sub_jira_key = st.session_state.jira_issue_keys.get(stask.get("title", ""))
-                sub_ticket = {
-                    "key": sub_task_key,
-                    "summary": stask.get("title", ""),
-                    "description": stask.get("description", ""),
-                    "jira_key": sub_jira_key  # Add the Jira issue key to the subtask
-                }
-                
-                # Generate branch name for this subtask
-                sub_branch_name = f"feature_{idx+1}_{st_idx+1}_{sanitize_branch_name(stask['title'])}".lower()
-                
-                # Generate and push test cases
-                simulate_test_case_generation_ai(sub_ticket, repo_name=repo_name, branch_name=sub_branch_name)
-                
-                if "subtasks" in stask and stask["subtasks"]:
-                    for sst_idx, sstask in enumerate(stask["subtasks"]):
-                        sub_sub_task_key = f"{sub_task_key}.{sst_idx+1}"
-                        # Get the Jira issue key for the sub-subtask
-                        sub_sub_jira_key = st.session_state.jira_issue_keys.get(sstask.get("title", ""))
-                        sub_sub_ticket = {
-                            "key": sub_sub_task_key,
-                            "summary": sstask.get("title", ""),
-                            "description": sstask.get("description", ""),
-                            "jira_key": sub_sub_jira_key  # Add the Jira issue key to the sub-subtask
-                        }
-                        
-                        # Generate branch name for this sub-subtask
-                        sub_sub_branch_name = f"feature_{idx+1}_{st_idx+1}_{sst_idx+1}_{sanitize_branch_name(sstask['title'])}".lower()
-                        
-                        # Generate and push test cases
-                        simulate_test_case_generation_ai(sub_sub_ticket, repo_name=repo_name, branch_name=sub_sub_branch_name)
+        items.append((path, {"ticket": ticket, "problems": []}))
+    
+    if not items:
+        st.info("Test cases for every task are already pushed.")
+        return True
+    
+    # Stage functions run on worker threads and must not touch Streamlit;
+    # failed pushes and comments are noted on the item and reported below
+    llm_requests = []
+    
+    def generate(path, state):
+        llm_requests.append(1)
+        state["content"] = generate_test_case_content(state["ticket"], output_dir)
+        return state
+    
+    def generate_for_batch(paths, states):
+        texts, errors, requests = generate_batch(
+            [state["ticket"] for state in states],
+            lambda prompt, output_tokens: generate_with_llm(llm_backend, prompt, bypass_llm_cache,
+                                                            output_tokens=output_tokens),
+            generate_test_case_prompt
+        )
+        llm_requests.append(requests)
+        generated = {}
+        for path, state in zip(paths, states):
+            if path in texts:
+                state["content"] = save_test_case_content(state["ticket"], texts[path], output_dir)
+                generated[path] = state
+        return generated, errors
+    
+    def push(path, state):
+        if repo_name:
+            github_path = f"test_cases/{path}_test_cases.md"
+            success, message = push_test_cases_to_branch(repo_name, branch_name_for(path, titles[path]), github_path,
+                                                         state["content"], file_index=file_index)
+            if not success:
+                state["problems"].append(message)
+        return state
+    
+    def comment(path, state):
+        jira_key = state["ticket"]["jira_key"]
+        if jira_key:
+            success, message = add_comment_to_jira_issue(jira_key, state["content"])
+            if not success:
+                state["problems"].append(f"Failed to add test cases to Jira issue {jira_key}: {message}")
+        return state
+    
+    status_rows = []
+    
+    def record_result(path, state, error):
+        if error is not None:
+            fallback_path = os.path.join(output_dir, f"{path}_error.log")
+            with open(fallback_path, "w", encoding="utf-8") as f:
+                f.write(f"# Critical error while processing {path}\nError: {str(error)}")
+            status, details = "failed", str(error)
+        elif state["problems"]:
+            status, details = "incomplete", "; ".join(state["problems"])
+        else:
+            ledger.record(path, titles[path], tests_pushed=True, tests_repo=repo_name)
+            status, details = "done", ""
+        status_rows.append({"ID": path, "Title": titles[path], "Status": status, "Details": details})
+    
+    os.makedirs(output_dir, exist_ok=True)
+    waited_before = llm_limiter.waited_seconds
+    stages = [
+        ("Generate", generate, TEST_CASE_WORKERS),
+        ("Push to GitHub", push, GITHUB_MAX_WORKERS),
+        ("Comment on Jira", comment, JIRA_MAX_WORKERS)
+    ]
+    
+    batches = None
+    if LLM.test_case_batch_size > 1:
+        context_tokens, output_tokens = llm_backend.limits()
+        planned = plan_batches([state["ticket"] for _, state in items], context_tokens, output_tokens,
+                               LLM.test_case_batch_size)
+        batches = [[ticket["key"] for ticket in batch] for batch in planned]
+        stages[0] = ("Generate", generate_for_batch, TEST_CASE_WORKERS)
+    
+    progress_bar = st.progress(0, text="Processing test cases...")
+    
+    def update_progress(done, total):
+        # Finished nodes are written to the ledger together rather than one file rewrite each
+        ledger.flush()
+        progress_bar.progress(done / total, text=f"Finished {done}/{total} nodes")
+    
+    with ledger.deferred():
+        _, stats = run_stages(
+            items,
+            stages,
+            progress_callback=update_progress,
+            result_callback=record_result,
+            batches=batches
+        )
+    progress_bar.empty()
+    
+    st.caption(f"Made {sum(llm_requests)} LLM requests for the test cases of {len(items)} nodes")
+    status_rows.sort(key=lambda row: [int(part) for part in row["ID"][1:].split(".")])
+    st.dataframe(pd.DataFrame(status_rows), use_container_width=True, hide_index=True)
+    st.dataframe(pd.DataFrame([stage.as_row() for stage in stats]), use_container_width=True, hide_index=True)
+    st.caption(f"Waited {llm_limiter.waited_seconds - waited_before:.1f}s for the LLM rate limit "
+               f"({LLM.rpm or 'unlimited'} requests/min, {LLM.tpm or 'unlimited'} tokens/min)")
+    
+    unfinished = sum(1 for row in status_rows if row["Status"] != "done")
+    if unfinished:
+        st.warning(f"⚠️ {unfinished} of {len(status_rows)} nodes did not get all their test cases pushed.")
+    return not unfinished
 
 # MAIN STREAMLIT UI
 st.set_page_config(page_title="Jira Task Extractor App", layout="wide")
@@ -1163,32 +1176,101 @@ st.markdown("""
 
 st.title("📄📌 Jira Task Extractor App")
 
+# Resolved here on the script thread so worker threads can use them
+llm_cache = get_llm_cache()
+try:
+    llm_backend = get_llm_backend()
+except ValueError as e:
+    st.error(f"❌ {e}")
+    st.stop()
+llm_limiter = get_llm_limiter()
+bypass_llm_cache = st.checkbox(
+    "♻️ Bypass LLM response cache",
+    help="Call the model even for a request it has answered before; the fresh response replaces the cached one."
+)
+if llm_cache_caption(llm_cache, LLM.cache_mb):
+    st.caption(llm_cache_caption(llm_cache, LLM.cache_mb))
+st.caption(f"LLM backend: {llm_backend.name} · {llm_backend.model}")
+
 # Document Upload Section
 uploaded_file = st.file_uploader("Upload a project document", type=["docx", "pdf", "txt"])
 
 if uploaded_file is not None:
     file_extension = uploaded_file.name.split('.')[-1].lower()
-    
-    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_extension}") as tmp_file:
-        tmp_file.write(uploaded_file.read())
-        temp_file_path = tmp_file.name
+    file_bytes = uploaded_file.getvalue()
+    # Names the ledger of everything created from this document
+    st.session_state.document_key = document_key(file_bytes)
+    extraction_cache = get_extraction_cache()
+    cache_key = content_key(file_bytes, EXTRACTION_ENGINES)
+    cached = extraction_cache.get(cache_key)
 
     st.success("File uploaded successfully!")
 
-    text = extract_text_from_file(temp_file_path, file_extension)
+    if cached:
+        text = cached["text"]
+        cleaned_text = cached["cleaned_text"]
+        pages = cached.get("pages")
+        st.session_state.document_pages = [tuple(span) for span in pages] if pages else None
+        outline = cached.get("outline")
+        st.session_state.document_outline = [tuple(heading) for heading in outline] if outline else None
+    else:
+        # Parse straight from the upload buffer; only very large files go through a temp file
+        with spilled(file_bytes, f".{file_extension}", UPLOAD_SPILL_MB * 1024 * 1024) as source:
+            st.session_state.document_pages = None
+            st.session_state.document_outline = None
+            text = extract_text_from_file(source, file_extension)
+        cleaned_text = clean_text(text) if text else None
+        if text:
+            extraction_cache.put(
+                cache_key,
+                text=text,
+                cleaned_text=cleaned_text,
+                pages=st.session_state.document_pages,
+                outline=st.session_state.document_outline
+            )
+
+    hit_rate = extraction_cache.hit_rate()
+    st.caption(
+        f"Extraction cache: {'hit' if cached else 'miss'} · "
+        f"hit rate {hit_rate:.0%} ({extraction_cache.hits}/{extraction_cache.hits + extraction_cache.misses}) · "
+        f"{extraction_cache.size_bytes() / (1024 * 1024):.1f}/{EXTRACTION_CACHE_MB} MB"
+    )
+
     if text:
-        cleaned_text = clean_text(text)
         tasks = prrse_tasks(text)
 
         st.subheader("Generating Summary")
         if st.button("Generate Response"):
+            # Each epic is shown as soon as its JSON object has streamed in
+            live_tasks = st.empty()
+
+            def show_partial_tasks(tasks_so_far):
+                with live_tasks.container():
+                    display_task_statistics(tasks_so_far)
+                    display_tasks(tasks_so_far)
+
             with st.spinner("Analyzing document and extracting tasks..."):
-                summary = summarize_with_gemini(cleaned_text)
+                # Excluded sections are dropped first; DOCX heading offsets make the best chunk boundaries
+                prompt_text, section_starts = prefilter_document(cleaned_text, st.session_state.get("document_outline"),
+                                                                 LLM, report=report_message)
+                progress = st.empty()
+                summary = summarize_with_llm(
+                    llm_backend, LLM, prompt_text,
+                    boundaries=section_starts,
+                    bypass_cache=bypass_llm_cache,
+                    on_tasks=show_partial_tasks,
+                    progress_callback=lambda done, total: progress.progress(
+                        done / total, text=f"Extracted tasks from {done}/{total} document sections"),
+                    report=report_message
+                )
+                progress.empty()
             
             st.write("### Summary:")
             if summary:
                 with open("geminisummary.json", "w", encoding="utf-8") as f:
-                    f.write(summary)
+                    # The document key lets a restarted app find this document's ledger again
+                    json.dump({**json.loads(summary), "document": st.session_state.document_key}, f,
+                              indent=2, ensure_ascii=False)
                 st.subheader("📦 JSON Task Summary")
                 st.text_area("JSON Response", summary, height=300)
                 
@@ -1203,8 +1285,6 @@ if uploaded_file is not None:
             else:
                 st.error("Failed to generate summary from the document.")
 
-    os.unlink(temp_file_path)
-
 # Task Management Section
 use_saved = st.checkbox("🔁 View and manage extracted tasks", value=st.session_state["view_and_manage"], key="view_and_manage_checkbox")
 st.session_state["view_and_manage"] = use_saved
@@ -1217,6 +1297,7 @@ if use_saved:
                 data = json.loads(summary)
                 if "tasks" in data:
                     st.session_state.tasks_data = data["tasks"]
+                    st.session_state.document_key = data.get("document")
         
         tasks_data = st.session_state.tasks_data
         
@@ -1255,6 +1336,7 @@ if use_saved:
                         with open("geminisummary.json", "r", encoding="utf-8") as f:
                             data = json.loads(f.read())
                             st.session_state.tasks_data = data["tasks"]
+                            st.session_state.document_key = data.get("document")
                         st.success("Reset to last saved version!")
                         st.rerun()
 
@@ -1304,6 +1386,12 @@ if use_saved:
                 with col1:
                     can_create_jira, jira_msg = validate_workflow_step("jira_creation")
                     
+                    creation_mode = st.radio("Creation mode:", ["Bulk", "Concurrent"],
+                                             horizontal=True, key="jira_creation_mode")
+                    if creation_mode == "Concurrent":
+                        max_workers = st.slider("Parallel requests:", 1, 20, JIRA_MAX_WORKERS,
+                                                key="jira_max_workers")
+                    
                     if st.button("📋 Create Jira Issues", 
                                type="primary",
                                disabled=not can_create_jira,
@@ -1312,43 +1400,71 @@ if use_saved:
                         try:
                             with st.spinner("Creating Jira issues..."):
                                 progress_bar = st.progress(0)
-                                total_tasks = len(tasks_data)
                                 
-                                for idx, t in enumerate(tasks_data):
-                                    epic_key, epic_type = create_jira_issue(
-                                        t["title"], 
-                                        t.get("description", ""),
-                                        project_key=selected_jira_key
-                                    )
-                                    
-                                    if epic_key:
-                                        for stask in t.get("subtasks", []):
-                                            task_key, task_type = create_jira_issue(
-                                                stask["title"], 
-                                                stask.get("description", ""),
-                                                parent_id=epic_key, 
-                                                parent_type=epic_type,
-                                                project_key=selected_jira_key
-                                            )
-                                            
-                                            if task_key:
-                                                for sstask in stask.get("subtasks", []):
-                                                    create_jira_issue(
-                                                        sstask["title"], 
-                                                        sstask.get("description", ""),
-                                                        parent_id=task_key, 
-                                                        parent_type=task_type,
-                                                        project_key=selected_jira_key
-                                                    )
-                                    
-                                    progress_bar.progress((idx + 1) / total_tasks)
+                                stats_before = get_jira_client().throttle_stats()
+                                valid_types = get_valid_issue_types(selected_jira_key)
+                                
+                                # Nodes already created in this project are reused, not created again
+                                ledger = get_ledger()
+                                existing = ledger.existing_issues(tasks_data, selected_jira_key)
+                                
+                                def record_issue(path, result):
+                                    if result["key"]:
+                                        ledger.record(path, result["title"], jira_key=result["key"],
+                                                      jira_type=result["type"], jira_project=selected_jira_key)
+
+                                def update_progress(done, total):
+                                    # Once per level in bulk mode and per round of finished requests otherwise,
+                                    # so the ledger file is not rewritten for every issue
+                                    ledger.flush()
+                                    progress_bar.progress(done / total)
+                                
+                                with ledger.deferred():
+                                    if creation_mode == "Concurrent":
+                                        # Children start as soon as their parent exists, siblings in parallel
+                                        results = create_issue_tree_concurrent(
+                                            get_jira_client(),
+                                            selected_jira_key,
+                                            tasks_data,
+                                            valid_types,
+                                            max_workers=max_workers,
+                                            existing=existing,
+                                            progress_callback=update_progress,
+                                            result_callback=record_issue
+                                        )
+                                    else:
+                                        # Each hierarchy level goes out in batches through the bulk endpoint
+                                        results = create_issue_tree_bulk(
+                                            get_jira_client(),
+                                            selected_jira_key,
+                                            tasks_data,
+                                            valid_types,
+                                            existing=existing,
+                                            progress_callback=update_progress,
+                                            result_callback=record_issue
+                                        )
                                 
                                 progress_bar.empty()
                             
-                            st.success("🎉 All Jira issues created successfully!")
-                            st.session_state.jira_created = True
-                            time.sleep(1)
-                            st.rerun()
+                            stats = get_jira_client().throttle_stats()
+                            throttled = stats["throttled"] - stats_before["throttled"]
+                            if throttled:
+                                waited = stats["throttled_seconds"] - stats_before["throttled_seconds"]
+                                st.info(f"⏱️ Jira rate-limited {throttled} request(s); {waited:.1f}s spent waiting to retry.")
+                            
+                            failed = [(path, result) for path, result in results.items() if not result["key"]]
+                            if existing:
+                                st.info(f"⏭️ Skipped {len(existing)} issue(s) already created in {selected_jira_key}.")
+                            
+                            if failed:
+                                st.warning(f"⚠️ Created {len(results) - len(failed)} of {len(results)} Jira issues.")
+                                for path, result in failed:
+                                    st.error(f"❌ {path} {result['title']}: {result['error']}")
+                            else:
+                                st.success(f"🎉 All {len(results)} Jira issues created successfully!")
+                                st.session_state.jira_created = True
+                                time.sleep(1)
+                                st.rerun()
                             
                         except Exception as e:
                             st.error(f"❌ Jira issue creation failed: {e}")
@@ -1359,49 +1475,93 @@ if use_saved:
                 with col2:
                     can_create_branches, branch_msg = validate_workflow_step("branch_creation", ["jira_created"])
                     
+                    include_tests = st.checkbox("🧪 Commit generated test cases with each new branch",
+                                                key="branches_include_tests",
+                                                help="Creates each branch pointing at a commit with its test case file, "
+                                                     "so the test step has nothing left to push for it.")
+                    
                     if st.button("🌿 Create GitHub Branches", 
                                type="primary" if can_create_branches else "secondary",
                                disabled=not can_create_branches,
                                key="workflow_create_branches_btn"):
                         
                         try:
-                            with st.spinner("Creating GitHub branches..."):
-                                progress_bar = st.progress(0)
-                                total_operations = 0
-                                
-                                # Count total operations
-                                for t in tasks_data:
-                                    total_operations += 1
-                                    total_operations += len(t.get("subtasks", []))
-                                    for stask in t.get("subtasks", []):
-                                        total_operations += len(stask.get("subtasks", []))
+                            generated_tests = {}
+                            
+                            def test_file_for(branch_name):
+                                """Generate a node's test cases so they land in the branch's first commit"""
+                                path, title, description = branch_nodes[branch_name]
+                                ticket = {"key": path, "summary": title, "description": description}
+                                try:
+                                    content = generate_test_case_content(ticket)
+                                except Exception:
+                                    # Fall back to a plain branch; the test step will cover this node
+                                    return None
+                                generated_tests[branch_name] = content
+                                return f"test_cases/{path}_test_cases.md", content, f"Add test cases for {branch_name}"
+                            
+                            with st.spinner("Resolving base branch..."):
+                                repo = get_github_repo(selected_repo)
+                                base_sha = get_base_sha(repo_name=selected_repo)
+                            
+                            if base_sha:
+                                with st.spinner("Creating GitHub branches..."):
+                                    progress_bar = st.progress(0)
+                                    ledger = get_ledger()
+                                    nodes = list(iter_tree(tasks_data, max_depth=3))
+                                    
+                                    # One listing of feature_ refs replaces a lookup per branch
+                                    existing_refs = list_branch_names(repo, prefix="feature_")
+                                    branch_nodes = {}
+                                    for path, node, depth in nodes:
+                                        title = node.get("title", "")
+                                        branch_nodes[branch_name_for(path, title)] = (path, title, node.get("description", ""))
+                                    
+                                    results = create_branches(
+                                        repo,
+                                        list(branch_nodes),
+                                        base_sha,
+                                        existing=existing_refs,
+                                        max_workers=GITHUB_MAX_WORKERS,
+                                        progress_callback=lambda done, total: progress_bar.progress(done / total),
+                                        file_for=test_file_for if include_tests else None
+                                    )
+                                    
+                                    progress_bar.empty()
                                 
-                                current_op = 0
+                                status_rows = []
+                                # The whole branch run is written to the ledger at once
+                                with ledger.deferred():
+                                    for branch_name, (path, title, description) in branch_nodes.items():
+                                        status, message = results[branch_name]
+                                        if status == "created" and branch_name in generated_tests:
+                                            tests_done = True
+                                            jira_key = ledger.get(path, title).get("jira_key")
+                                            if jira_key:
+                                                tests_done, comment_msg = add_comment_to_jira_issue(jira_key, generated_tests[branch_name])
+                                                if not tests_done:
+                                                    message = f"Test cases committed, Jira comment failed: {comment_msg}"
+                                            ledger.record(path, title, branch=branch_name, branch_repo=selected_repo,
+                                                          tests_pushed=tests_done, tests_repo=selected_repo)
+                                        elif status != "failed":
+                                            ledger.record(path, title, branch=branch_name, branch_repo=selected_repo)
+                                        status_rows.append({
+                                            "ID": path,
+                                            "Branch": branch_name,
+                                            "Status": status,
+                                            "Details": message
+                                        })
                                 
-                                for t_idx, t in enumerate(tasks_data):
-                                    branch_name = f"feature_{t_idx+1}_{sanitize_branch_name(t['title'])}".lower()
-                                    create_github_branch(branch_name, repo_name=selected_repo)
-                                    current_op += 1
-                                    progress_bar.progress(current_op / total_operations)
-                                    
-                                    for st_idx, stask in enumerate(t.get("subtasks", [])):
-                                        sub_branch_name = f"feature_{t_idx+1}_{st_idx+1}_{sanitize_branch_name(stask['title'])}".lower()
-                                        create_github_branch(sub_branch_name, repo_name=selected_repo)
-                                        current_op += 1
-                                        progress_bar.progress(current_op / total_operations)
-                                        
-                                        for sst_idx, sstask in enumerate(stask.get("subtasks", [])):
-                                            sub_sub_branch_name = f"feature_{t_idx+1}_{st_idx+1}_{sst_idx+1}_{sanitize_branch_name(sstask['title'])}".lower()
-                                            create_github_branch(sub_sub_branch_name, repo_name=selected_repo)
-                                            current_op += 1
-                                            progress_bar.progress(current_op / total_operations)
+                                st.dataframe(pd.DataFrame(status_rows), use_container_width=True, hide_index=True)
                                 
-                                progress_bar.empty()
-                            
-                            st.success("🌿 All GitHub branches created successfully!")
-                            st.session_state.branches_created = True
-                            time.sleep(1)
-                            st.rerun()
+                                failed_count = sum(1 for row in status_rows if row["Status"] == "failed")
+                                if failed_count:
+                                    st.warning(f"⚠️ {failed_count} of {len(status_rows)} branches could not be created.")
+                                else:
+                                    st.success("🌿 All GitHub branches created successfully!")
+                                    st.session_state.branches_created = True
+                                    if include_tests and len(generated_tests) == len(branch_nodes):
+                                        st.session_state.tests_created = True
                             
                         except Exception as e:
                             st.error(f"❌ Branch creation failed: {e}")
@@ -1419,12 +1579,11 @@ if use_saved:
                         
                         try:
                             with st.spinner("Generating and pushing test cases..."):
-                                walk_tasks_for_test_cases(tasks_data, repo_name=selected_repo)
+                                completed = walk_tasks_for_test_cases(tasks_data, repo_name=selected_repo)
                             
-                            st.success("🧪 Test cases generated and pushed successfully!")
-                            st.session_state.tests_created = True
-                            time.sleep(1)
-                            st.rerun()
+                            if completed:
+                                st.success("🧪 Test cases generated and pushed successfully!")
+                                st.session_state.tests_created = True
                             
                         except Exception as e:
                             st.error(f"❌ Test case generation and pushing failed: {e}")
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import threading
+
+CACHE_DIR = ".extraction_cache"
+# Total size the cache may grow to before the least recently used entries go
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+# Bump whenever extraction or cleaning output changes so stale entries miss
+EXTRACTOR_VERSION = "2"
+
+
+def content_key(data, engines=None, extractor_version=EXTRACTOR_VERSION):
+    """Cache key for uploaded bytes: SHA-256 of the content plus the extractor version and engine selection."""
+    digest = hashlib.sha256(data).hexdigest()
+    key = f"{digest}-v{extractor_version}"
+    if engines:
+        selection = "-".join(f"{file_format}.{name}" for file_format, name in sorted(engines.items()))
+        key = f"{key}-{hashlib.sha256(selection.encode('utf-8')).hexdigest()[:12]}"
+    return key
+
+
+class ExtractionCache:
+    """On-disk LRU cache of extracted document text, keyed by ``content_key``.
+
+    Each entry is one JSON file whose mtime is refreshed on every hit, so the
+    oldest mtimes are evicted first once the directory grows past
+    ``max_bytes``. Hit and miss counts cover the lifetime of the instance.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """Return the cached entry for ``key``, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, key, **fields):
+        """Store ``fields`` under ``key`` and evict old entries beyond the size bound."""
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(fields, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def hit_rate(self):
+        """Fraction of lookups served from the cache, or None before the first lookup."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    def size_bytes(self):
+        return sum(
+            os.path.getsize(os.path.join(self.directory, name))
+            for name in os.listdir(self.directory)
+            if name.endswith(".json")
+        )
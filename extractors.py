@@ -0,0 +1,388 @@
+import io
+import os
+import re
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+
+import docx2txt
+import PyPDF2
+
+# Optional, faster PDF engines; registered only when installed
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+# Below this many pages the process pool costs more than it saves
+PDF_PARALLEL_MIN_PAGES = 16
+# Pages handed to a worker at a time
+PDF_PAGES_PER_TASK = 8
+# WordprocessingML namespace, as ElementTree spells it in tags
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+DOCX_BODY_PART = "word/document.xml"
+DOCX_STYLES_PART = "word/styles.xml"
+# outlineLvl 9 means body text
+_DOCX_BODY_OUTLINE_LEVEL = 9
+_HEADING_STYLE_NAME = re.compile(r"heading\s*(\d)$", re.IGNORECASE)
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+# Leading bytes read when probing a file's format
+_PROBE_BYTES = 1024
+# Uploads larger than this are written to a temp file instead of parsed in memory
+SPILL_THRESHOLD_BYTES = 64 * 1024 * 1024
+
+# PDF bytes held by a pool worker, set once per process by _init_pdf_worker
+_worker_pdf_data = None
+
+
+def is_buffer(source):
+    return isinstance(source, (bytes, bytearray, memoryview))
+
+
+def _as_stream(source):
+    """Wrap an in-memory buffer in a file object; paths are passed through."""
+    return io.BytesIO(source) if is_buffer(source) else source
+
+
+@contextmanager
+def spilled(data, suffix="", threshold=SPILL_THRESHOLD_BYTES):
+    """Yield ``data`` itself, or the path of a temp copy when it is larger than ``threshold``.
+
+    The temp file is removed when the block exits, even if extraction raised.
+    """
+    if memoryview(data).nbytes <= threshold:
+        yield data
+        return
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+        tmp_file.write(data)
+        temp_path = tmp_file.name
+    try:
+        yield temp_path
+    finally:
+        os.unlink(temp_path)
+
+
+def _docx_outline_level(outline_el):
+    """Heading level (1-9) of a w:outlineLvl element, or None for body text or a malformed value."""
+    try:
+        level = int(outline_el.get(f"{W_NS}val"))
+    except (TypeError, ValueError):
+        return None
+    return level + 1 if 0 <= level < _DOCX_BODY_OUTLINE_LEVEL else None
+
+
+def _docx_heading_styles(zipf):
+    """Map paragraph style ids to heading levels (0 for Title) using styles.xml."""
+    levels = {}
+    try:
+        root = ET.fromstring(zipf.read(DOCX_STYLES_PART))
+    except KeyError:
+        return levels
+
+    for style in root.iter(f"{W_NS}style"):
+        if style.get(f"{W_NS}type") != "paragraph":
+            continue
+        style_id = style.get(f"{W_NS}styleId")
+        name_el = style.find(f"{W_NS}name")
+        name = (name_el.get(f"{W_NS}val", "") if name_el is not None else "").strip()
+        outline_el = style.find(f"{W_NS}pPr/{W_NS}outlineLvl")
+        match = _HEADING_STYLE_NAME.match(name)
+        if match:
+            levels[style_id] = int(match.group(1))
+        elif name.lower() == "title":
+            levels[style_id] = 0
+        elif outline_el is not None and _docx_outline_level(outline_el) is not None:
+            levels[style_id] = _docx_outline_level(outline_el)
+    return levels
+
+
+def _docx_paragraph_level(paragraph, heading_styles):
+    ppr = paragraph.find(f"{W_NS}pPr")
+    if ppr is None:
+        return None
+    outline_el = ppr.find(f"{W_NS}outlineLvl")
+    if outline_el is not None:
+        return _docx_outline_level(outline_el)
+    style_el = ppr.find(f"{W_NS}pStyle")
+    if style_el is None:
+        return None
+    return heading_styles.get(style_el.get(f"{W_NS}val"))
+
+
+def _docx_paragraph_text(paragraph):
+    parts = []
+    for node in paragraph.iter():
+        if node.tag == f"{W_NS}t":
+            parts.append(node.text or "")
+        elif node.tag == f"{W_NS}tab":
+            parts.append("\t")
+        elif node.tag in (f"{W_NS}br", f"{W_NS}cr"):
+            parts.append("\n")
+    return "".join(parts)
+
+
+def iter_docx_paragraphs(source):
+    """Yield (heading_level, text) for each non-empty paragraph of a DOCX body.
+
+    Only word/document.xml (and the small styles.xml) is read, stream-parsed
+    with iterparse, and every finished paragraph (and top-level block such
+    as a table) is detached from the tree, so memory stays flat and
+    headers, footers and embedded media are never loaded. ``heading_level``
+    is 1-9 for headings, 0 for the Title style and None for body text.
+    """
+    with zipfile.ZipFile(_as_stream(source)) as zipf:
+        heading_styles = _docx_heading_styles(zipf)
+        with zipf.open(DOCX_BODY_PART) as body:
+            # Open elements from the root down; the last one is the parent of the element that just ended
+            ancestors = []
+            for event, elem in ET.iterparse(body, events=("start", "end")):
+                if event == "start":
+                    ancestors.append(elem)
+                    continue
+                ancestors.pop()
+                paragraph = None
+                if elem.tag == f"{W_NS}p":
+                    paragraph = (_docx_paragraph_level(elem, heading_styles), _docx_paragraph_text(elem))
+                if ancestors and (paragraph is not None or ancestors[-1].tag == f"{W_NS}body"):
+                    ancestors[-1].remove(elem)
+                    elem.clear()
+                if paragraph is not None and paragraph[1].strip():
+                    yield paragraph
+
+
+def extract_docx(source):
+    """Extract text from a DOCX given as a path or an in-memory buffer.
+
+    Returns (text, outline) where outline lists (level, title, offset) for
+    every heading, ``offset`` being where the heading starts in ``text``.
+    """
+    paragraphs = []
+    outline = []
+    offset = 0
+    for level, text in iter_docx_paragraphs(source):
+        if level is not None:
+            outline.append((level, text, offset))
+        paragraphs.append(text)
+        offset += len(text) + 1
+    return "\n".join(paragraphs), outline
+
+
+def extract_txt(source):
+    """Decode a UTF-8 text file given as a path or an in-memory buffer."""
+    if is_buffer(source):
+        return str(source, "utf-8")
+    with open(source, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def _init_pdf_worker(data):
+    """Keep one copy of in-memory PDF bytes per worker process rather than one per task."""
+    global _worker_pdf_data
+    _worker_pdf_data = data
+
+
+def _extract_pdf_page_range(pdf_path, start, stop):
+    """Extract pages [start, stop) of a PDF; runs inside a worker process.
+
+    ``pdf_path`` is None when the worker was initialised with the PDF bytes.
+    """
+    source = _worker_pdf_data if pdf_path is None else pdf_path
+    reader = PyPDF2.PdfReader(_as_stream(source))
+    return start, [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def join_pages(pages):
+    """Join page texts once, returning (text, page_spans) with (start, end) offsets per page."""
+    spans = []
+    offset = 0
+    for page in pages:
+        spans.append((offset, offset + len(page)))
+        offset += len(page) + 1
+    return "\n".join(pages), spans
+
+
+def extract_pdf(source, max_workers=None, progress_callback=None):
+    """Extract a PDF's text with page ranges spread across a process pool.
+
+    ``source`` is a path or an in-memory buffer. Returns (text, page_spans).
+    ``progress_callback(done_pages, total_pages)`` is called from the calling
+    thread as page ranges finish.
+    """
+    reader = PyPDF2.PdfReader(_as_stream(source))
+    total = len(reader.pages)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if total < PDF_PARALLEL_MIN_PAGES or max_workers == 1:
+        pages = [page.extract_text() or "" for page in reader.pages]
+        if progress_callback:
+            progress_callback(total, total)
+        return join_pages(pages)
+
+    if is_buffer(source):
+        # memoryviews can't be pickled for spawned workers
+        pool_args = {"initializer": _init_pdf_worker, "initargs": (bytes(source),)}
+        pdf_path = None
+    else:
+        pool_args = {}
+        pdf_path = source
+
+    pages = [""] * total
+    done = 0
+    with ProcessPoolExecutor(max_workers=max_workers, **pool_args) as executor:
+        futures = [
+            executor.submit(_extract_pdf_page_range, pdf_path, start, min(start + PDF_PAGES_PER_TASK, total))
+            for start in range(0, total, PDF_PAGES_PER_TASK)
+        ]
+        for future in as_completed(futures):
+            start, texts = future.result()
+            pages[start:start + len(texts)] = texts
+            done += len(texts)
+            if progress_callback:
+                progress_callback(done, total)
+
+    return join_pages(pages)
+
+
+# Extraction engines per format: {format: {name: engine}}. An engine takes
+# (source, progress_callback) and returns (text, info), where info may carry
+# "pages" (PDF page spans) or "outline" (DOCX headings).
+ENGINES = {"pdf": {}, "docx": {}, "txt": {}}
+DEFAULT_ENGINES = {"pdf": "pypdf2", "docx": "stream", "txt": "utf8"}
+
+
+def register_engine(file_format, name):
+    """Decorator adding an extraction engine for ``file_format`` under ``name``."""
+    def decorator(engine):
+        ENGINES.setdefault(file_format, {})[name] = engine
+        return engine
+    return decorator
+
+
+def parse_engine_config(value):
+    """Parse "pdf=pymupdf,docx=stream" into {"pdf": "pymupdf", "docx": "stream"}."""
+    engines = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            file_format, name = item.split("=", 1)
+            engines[file_format.strip().lower()] = name.strip().lower()
+    return engines
+
+
+def resolve_engine(file_format, engines=None):
+    """Name of the engine to use for ``file_format``.
+
+    A configured engine that isn't registered (unknown, or its optional
+    dependency isn't installed) falls back to the default engine.
+    """
+    name = (engines or {}).get(file_format)
+    if name in ENGINES.get(file_format, {}):
+        return name
+    return DEFAULT_ENGINES[file_format]
+
+
+def probe_format(source):
+    """Detect "pdf" or "docx" from a file's leading bytes, or None if neither matches."""
+    if is_buffer(source):
+        head = bytes(memoryview(source)[:_PROBE_BYTES])
+    else:
+        with open(source, "rb") as file:
+            head = file.read(_PROBE_BYTES)
+
+    if head.lstrip().startswith(PDF_MAGIC):
+        return "pdf"
+    if head.startswith(ZIP_MAGIC):
+        try:
+            with zipfile.ZipFile(_as_stream(source)) as zipf:
+                if DOCX_BODY_PART in zipf.namelist():
+                    return "docx"
+        except zipfile.BadZipFile:
+            pass
+    return None
+
+
+def extract_document(source, fallback_format=None, engines=None, progress_callback=None):
+    """Extract text from a path or buffer with the engine configured for its format.
+
+    The format is probed from magic bytes, and ``fallback_format`` (usually
+    the file extension) is used only when probing finds nothing, as for
+    plain text. Returns (text, info) where info holds "format" and "engine"
+    plus whatever layout the engine reports. Raises ValueError for
+    unsupported formats.
+    """
+    file_format = probe_format(source) or fallback_format
+    if file_format not in ENGINES:
+        raise ValueError(f"Unsupported file type: {file_format}")
+
+    name = resolve_engine(file_format, engines)
+    text, info = ENGINES[file_format][name](source, progress_callback)
+    return text, dict(info, format=file_format, engine=name)
+
+
+@register_engine("pdf", "pypdf2")
+def _pypdf2_engine(source, progress_callback=None):
+    text, page_spans = extract_pdf(source, progress_callback=progress_callback)
+    return text, {"pages": page_spans}
+
+
+if pymupdf is not None:
+    @register_engine("pdf", "pymupdf")
+    def _pymupdf_engine(source, progress_callback=None):
+        if is_buffer(source):
+            document = pymupdf.open(stream=bytes(source), filetype="pdf")
+        else:
+            document = pymupdf.open(source)
+        with document:
+            pages = []
+            for page in document:
+                pages.append(page.get_text())
+                if progress_callback:
+                    progress_callback(len(pages), document.page_count)
+        text, page_spans = join_pages(pages)
+        return text, {"pages": page_spans}
+
+
+if pypdfium2 is not None:
+    @register_engine("pdf", "pdfium")
+    def _pdfium_engine(source, progress_callback=None):
+        document = pypdfium2.PdfDocument(bytes(source) if is_buffer(source) else source)
+        try:
+            total = len(document)
+            pages = []
+            for index in range(total):
+                page = document[index]
+                textpage = page.get_textpage()
+                # pdfium ends lines with CRLF
+                pages.append(textpage.get_text_range().replace("\r\n", "\n"))
+                textpage.close()
+                page.close()
+                if progress_callback:
+                    progress_callback(index + 1, total)
+        finally:
+            document.close()
+        text, page_spans = join_pages(pages)
+        return text, {"pages": page_spans}
+
+
+@register_engine("docx", "stream")
+def _stream_docx_engine(source, progress_callback=None):
+    text, outline = extract_docx(source)
+    return text, {"outline": outline}
+
+
+@register_engine("docx", "docx2txt")
+def _docx2txt_engine(source, progress_callback=None):
+    return docx2txt.process(_as_stream(source)), {}
+
+
+@register_engine("txt", "utf8")
+def _utf8_engine(source, progress_callback=None):
+    return extract_txt(source), {}
@@ -0,0 +1,132 @@
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from github import InputGitTreeElement
+
+# Parallel ref creations; GitHub's secondary rate limits kick in well above this
+DEFAULT_BRANCH_WORKERS = 8
+
+
+def git_blob_sha(content):
+    """SHA-1 that git assigns to ``content`` as a blob, computed locally."""
+    data = content.encode("utf-8") if isinstance(content, str) else bytes(content)
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class RemoteFileIndex:
+    """Blob SHAs of files on each branch, fetched with one recursive tree listing per branch.
+
+    Lets a push compare a locally computed ``git_blob_sha`` against what is
+    already on GitHub and skip the write, or update without reading the file.
+    """
+
+    def __init__(self, repo):
+        self.repo = repo
+        self._lock = threading.Lock()
+        self._branches = {}
+
+    def _files(self, branch_name):
+        with self._lock:
+            files = self._branches.get(branch_name)
+        if files is None:
+            tree = self.repo.get_git_tree(branch_name, recursive=True)
+            files = {item.path: item.sha for item in tree.tree if item.type == "blob"}
+            with self._lock:
+                self._branches[branch_name] = files
+        return files
+
+    def sha(self, branch_name, file_path):
+        """Remote blob SHA of ``file_path`` on ``branch_name``, or None if it doesn't exist."""
+        return self._files(branch_name).get(file_path)
+
+    def update(self, branch_name, file_path, sha):
+        with self._lock:
+            self._branches.setdefault(branch_name, {})[file_path] = sha
+
+
+def resolve_base_sha(repo, base="main"):
+    """Head commit SHA of ``base``, or None if the branch doesn't exist."""
+    try:
+        return repo.get_branch(base).commit.sha
+    except Exception:
+        return None
+
+
+def list_branch_names(repo, prefix="feature_"):
+    """Names of existing branches starting with ``prefix``, from one matching-refs listing."""
+    return {
+        ref.ref[len("refs/heads/"):]
+        for ref in repo.get_git_matching_refs(f"heads/{prefix}")
+    }
+
+
+def create_branch_with_file(repo, branch_name, base_commit, file_path, content, message):
+    """Create ``branch_name`` with a single commit adding ``file_path`` on top of ``base_commit``.
+
+    Goes through the Git Data API (blob, tree, commit, ref) so nothing has to
+    be read back from the branch. ``base_commit`` is a GitCommit resolved
+    once per run with ``repo.get_git_commit(base_sha)``.
+    """
+    blob = repo.create_git_blob(content, "utf-8")
+    tree = repo.create_git_tree(
+        [InputGitTreeElement(file_path, "100644", "blob", sha=blob.sha)],
+        base_tree=base_commit.tree
+    )
+    commit = repo.create_git_commit(message, tree, [base_commit])
+    repo.create_git_ref(ref=f"refs/heads/{branch_name}", sha=commit.sha)
+    return commit.sha
+
+
+def create_branches(repo, branch_names, base_sha, existing=(), max_workers=DEFAULT_BRANCH_WORKERS,
+                    progress_callback=None, file_for=None):
+    """Create every branch in ``branch_names`` that isn't in ``existing``.
+
+    Missing refs are created concurrently on a bounded pool. A failure only
+    affects its own branch. ``progress_callback(done, total)`` runs on the
+    calling thread. Returns {branch_name: (status, message)} where status is
+    "exists", "created" or "failed".
+
+    When ``file_for(branch_name)`` is given it runs on the worker thread and
+    returns (file_path, content, message) or None; the branch is then created
+    already pointing at a commit that adds that file.
+    """
+    results = {}
+    to_create = []
+    for branch_name in branch_names:
+        if branch_name in existing:
+            results[branch_name] = ("exists", "Already on GitHub")
+        elif branch_name not in to_create:
+            to_create.append(branch_name)
+
+    total = len(results) + len(to_create)
+    if progress_callback and results:
+        progress_callback(len(results), total)
+
+    base_commit = repo.get_git_commit(base_sha) if file_for and to_create else None
+
+    def create(branch_name):
+        new_file = file_for(branch_name) if file_for else None
+        if new_file:
+            file_path, content, message = new_file
+            create_branch_with_file(repo, branch_name, base_commit, file_path, content, message)
+            return "Includes test cases"
+        repo.create_git_ref(ref=f"refs/heads/{branch_name}", sha=base_sha)
+        return ""
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(create, name): name for name in to_create}
+        for future in as_completed(futures):
+            branch_name = futures[future]
+            try:
+                results[branch_name] = ("created", future.result())
+            except Exception as e:
+                # A concurrent run may have created it in the meantime
+                if "Reference already exists" in str(e):
+                    results[branch_name] = ("exists", "Already on GitHub")
+                else:
+                    results[branch_name] = ("failed", str(e))
+            if progress_callback:
+                progress_callback(len(results), total)
+
+    return results
@@ -0,0 +1,495 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tree_executor import DEFAULT_MAX_WORKERS, child_path, count_tree_nodes, run_tree
+
+# (connect, read) timeouts in seconds for every Jira call
+DEFAULT_TIMEOUT = (5, 30)
+# Connections kept open per host; sized for concurrent issue creation
+DEFAULT_POOL_SIZE = 16
+
+# Retry/backoff settings for throttled or unavailable responses
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+RETRY_STATUSES = (429, 503)
+
+# Consecutive failed calls before the circuit opens, and how long it stays open (seconds)
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+# How long fetched issue types stay valid before Jira is asked again (seconds)
+ISSUE_TYPE_CACHE_TTL = 600
+
+# (base_url, project_key) -> (fetched_at, [issue type names])
+_issue_type_cache = {}
+_issue_type_lock = threading.Lock()
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Jira while the circuit breaker is open."""
+
+
+def parse_retry_delay(headers):
+    """Seconds to wait according to Retry-After or X-RateLimit-Reset, or None."""
+    retry_after = headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                reset_at = parsedate_to_datetime(retry_after)
+                return max(0.0, (reset_at - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+
+    reset = headers.get("X-RateLimit-Reset")
+    if reset:
+        try:
+            reset_at = datetime.fromisoformat(reset.replace("Z", "+00:00"))
+            if reset_at.tzinfo is None:
+                reset_at = reset_at.replace(tzinfo=timezone.utc)
+            return max(0.0, (reset_at - datetime.now(timezone.utc)).total_seconds())
+        except ValueError:
+            pass
+    return None
+
+
+class JiraClient:
+    """Keep-alive session for the Jira REST API with shared auth, headers and timeouts.
+
+    Throttled (429) and unavailable (503) responses are retried with jittered
+    exponential backoff, honouring Retry-After / X-RateLimit-Reset. After
+    ``breaker_threshold`` calls in a row fail, the circuit opens and calls
+    raise ``CircuitOpenError`` until ``breaker_cooldown`` has passed.
+    """
+
+    def __init__(self, base_url, email, api_token, timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE,
+                 max_retries=MAX_RETRIES, breaker_threshold=BREAKER_THRESHOLD,
+                 breaker_cooldown=BREAKER_COOLDOWN):
+        self.base_url = (base_url or "").rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+
+        self.session = requests.Session()
+        self.session.auth = (email, api_token)
+        self.session.headers.update({
+            "Accept": "application/json",
+            "Content-Type": "application/json"
+        })
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._open_until = 0.0
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "throttled": 0,
+            "throttled_seconds": 0.0,
+            "circuit_opens": 0
+        }
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        url = f"{self.base_url}{path}"
+
+        with self._lock:
+            if time.monotonic() < self._open_until:
+                raise CircuitOpenError("Jira is failing repeatedly; calls are paused, try again shortly.")
+
+        attempt = 0
+        while True:
+            with self._lock:
+                self.stats["requests"] += 1
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.ConnectionError:
+                # Only reads are safe to resend when we don't know if the server saw the call
+                if method != "GET" or attempt >= self.max_retries:
+                    self._record_failure()
+                    raise
+                response = None
+
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                self._record_result(response.status_code < 500)
+                return response
+            if attempt >= self.max_retries:
+                self._record_failure()
+                return response
+
+            delay = parse_retry_delay(response.headers) if response is not None else None
+            if delay is None:
+                delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+            else:
+                # Spread out clients that were all told the same reset time
+                delay = min(BACKOFF_MAX, delay) + random.uniform(0, BACKOFF_BASE)
+
+            with self._lock:
+                self.stats["retries"] += 1
+                if response is not None and response.status_code == 429:
+                    self.stats["throttled"] += 1
+                    self.stats["throttled_seconds"] += delay
+            time.sleep(delay)
+            attempt += 1
+
+    def _record_result(self, ok):
+        if ok:
+            with self._lock:
+                self._consecutive_failures = 0
+        else:
+            self._record_failure()
+
+    def _record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= self.breaker_threshold:
+                self._open_until = time.monotonic() + self.breaker_cooldown
+                self._consecutive_failures = 0
+                self.stats["circuit_opens"] += 1
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def throttle_stats(self):
+        """Snapshot of request, retry and throttling counters."""
+        with self._lock:
+            return dict(self.stats)
+
+    def close(self):
+        self.session.close()
+
+
+def fetch_issue_types(client, project_key=None):
+    """Fetch issue type names, scoped to the project when a key is given."""
+    if project_key:
+        path = f"/rest/api/3/issue/createmeta/{project_key}/issuetypes"
+        response = client.get(path, params={"maxResults": 200})
+        if response.status_code == 200:
+            data = response.json()
+            items = data.get("issueTypes", data.get("values", []))
+            return [item["name"] for item in items]
+
+    # Fall back to the global list when createmeta is unavailable
+    response = client.get("/rest/api/3/issuetype")
+    if response.status_code == 200:
+        return [item["name"] for item in response.json()]
+    return []
+
+
+def get_cached_issue_types(client, project_key=None, ttl=ISSUE_TYPE_CACHE_TTL):
+    """Return issue type names for a project, fetching at most once per TTL."""
+    cache_key = (client.base_url, project_key)
+    with _issue_type_lock:
+        entry = _issue_type_cache.get(cache_key)
+        if entry and time.monotonic() - entry[0] < ttl:
+            return list(entry[1])
+
+    issue_types = fetch_issue_types(client, project_key)
+
+    # Don't cache failed lookups, otherwise every issue falls back to "Task"
+    if issue_types:
+        with _issue_type_lock:
+            _issue_type_cache[cache_key] = (time.monotonic(), issue_types)
+    return list(issue_types)
+
+
+def invalidate_issue_types(base_url=None, project_key=None):
+    """Drop cached issue types matching the given base URL and/or project key."""
+    if base_url is not None:
+        base_url = base_url.rstrip("/")
+    with _issue_type_lock:
+        for cache_key in list(_issue_type_cache):
+            cached_url, cached_project = cache_key
+            if base_url is not None and cached_url != base_url:
+                continue
+            if project_key is not None and cached_project != project_key:
+                continue
+            del _issue_type_cache[cache_key]
+
+
+# Jira Cloud accepts at most 50 issues per bulk request
+BULK_BATCH_SIZE = 50
+
+
+def build_issue_payload(project_key, summary, description, issue_type_name, parent_key=None):
+    """Build the create-issue payload used by both the single and bulk endpoints."""
+    payload = {
+        "fields": {
+            "project": {"key": project_key},
+            "summary": summary,
+            "description": {
+                "type": "doc",
+                "version": 1,
+                "content": [
+                    {
+                        "type": "paragraph",
+                        "content": [{"type": "text", "text": description or ""}]
+                    }
+                ]
+            },
+            "issuetype": {"name": issue_type_name}
+        }
+    }
+
+    if issue_type_name in ("Task", "Subtask") and parent_key:
+        payload["fields"]["parent"] = {"key": parent_key}
+    return payload
+
+
+def resolve_issue_type(parent_type, valid_types):
+    """Pick the issue type for a node from its parent's type, like create_jira_issue does."""
+    if parent_type is None:
+        issue_type_name = "Epic"
+    elif parent_type == "Epic":
+        issue_type_name = "Task"
+    elif parent_type == "Task":
+        issue_type_name = "Subtask"
+    else:
+        issue_type_name = "Task"
+
+    if issue_type_name not in valid_types:
+        issue_type_name = "Task"
+    return issue_type_name
+
+
+def create_issue(client, project_key, summary, description, issue_type_name, parent_key=None):
+    """Create a single issue. Returns (issue_key, error)."""
+    payload = build_issue_payload(project_key, summary, description, issue_type_name, parent_key=parent_key)
+    try:
+        response = client.post("/rest/api/3/issue", json=payload)
+    except Exception as e:
+        return None, f"Error creating issue: {e}"
+
+    if response.status_code == 201:
+        return response.json().get("key"), None
+    return None, response.text
+
+
+def _format_bulk_error(error):
+    element_errors = error.get("elementErrors", {})
+    messages = list(element_errors.get("errorMessages", []))
+    messages += [f"{field}: {message}" for field, message in element_errors.get("errors", {}).items()]
+    return "; ".join(messages) or f"HTTP {error.get('status')}"
+
+
+def bulk_create_issues(client, payloads, batch_size=BULK_BATCH_SIZE):
+    """Create issues through /issue/bulk.
+
+    Returns a list of (issue_key, error) tuples aligned with ``payloads``.
+    """
+    results = []
+
+    for start in range(0, len(payloads), batch_size):
+        batch = payloads[start:start + batch_size]
+        try:
+            response = client.post("/rest/api/3/issue/bulk", json={"issueUpdates": batch})
+        except Exception as e:
+            results.extend((None, f"Error creating issues: {e}") for _ in batch)
+            continue
+
+        # 201 is full success, 400 may still carry partially created issues
+        if response.status_code not in (201, 400):
+            results.extend((None, f"Failed to create issues: {response.text}") for _ in batch)
+            continue
+
+        try:
+            data = response.json()
+        except ValueError:
+            results.extend((None, f"Failed to create issues: {response.text}") for _ in batch)
+            continue
+
+        failed = {
+            error.get("failedElementNumber"): _format_bulk_error(error)
+            for error in data.get("errors", [])
+        }
+        # Created issues come back in request order with the failed items left out
+        created = iter(data.get("issues", []))
+        for index in range(len(batch)):
+            if index in failed:
+                results.append((None, failed[index]))
+                continue
+            issue = next(created, None)
+            if issue:
+                results.append((issue.get("key"), None))
+            else:
+                results.append((None, "Issue missing from bulk response"))
+
+    return results
+
+
+def create_issue_tree_bulk(client, project_key, tasks_data, valid_types, batch_size=BULK_BATCH_SIZE,
+                           max_depth=3, existing=None, progress_callback=None, result_callback=None):
+    """Create the whole task tree level by level through the bulk endpoint.
+
+    Nodes are identified by their tree path (T1, T1.2, T1.2.3). Returns a
+    dict mapping each path to {"title", "key", "type", "error"}; children of
+    nodes that failed are reported as skipped. Only the Epic, Task and
+    Subtask levels (``max_depth``) are created.
+
+    ``existing`` maps paths to already created {"key", "type"} entries; those
+    nodes are not sent again but still act as parents for their children.
+    ``result_callback(path, result)`` is called after every batch so progress
+    can be persisted before the next request.
+    """
+    existing = existing or {}
+    total = count_tree_nodes(tasks_data, max_depth)
+    done = 0
+    depth = 1
+    results = {}
+
+    # (path, node, parent_key, parent_type)
+    level = [(child_path("T", idx), task, None, None) for idx, task in enumerate(tasks_data)]
+
+    while level:
+        finished = []
+        to_create = []
+        for path, node, parent_key, parent_type in level:
+            if path in existing:
+                finished.append((path, node, {
+                    "title": node.get("title", ""),
+                    "key": existing[path]["key"],
+                    "type": existing[path]["type"],
+                    "error": None
+                }))
+            else:
+                to_create.append((path, node, parent_key, resolve_issue_type(parent_type, valid_types)))
+
+        for start in range(0, len(to_create), batch_size):
+            batch = to_create[start:start + batch_size]
+            payloads = [
+                build_issue_payload(
+                    project_key,
+                    node.get("title", ""),
+                    node.get("description", ""),
+                    issue_type_name,
+                    parent_key=parent_key
+                )
+                for _, node, parent_key, issue_type_name in batch
+            ]
+            outcomes = bulk_create_issues(client, payloads, batch_size=batch_size)
+            for (path, node, _, issue_type_name), (issue_key, error) in zip(batch, outcomes):
+                result = {
+                    "title": node.get("title", ""),
+                    "key": issue_key,
+                    "type": issue_type_name,
+                    "error": error
+                }
+                finished.append((path, node, result))
+                if result_callback:
+                    result_callback(path, result)
+
+        next_level = []
+        for path, node, result in finished:
+            results[path] = result
+            done += 1
+            children = node.get("subtasks", []) if depth < max_depth else []
+            if result["key"]:
+                next_level.extend(
+                    (child_path(path, idx), child, result["key"], result["type"])
+                    for idx, child in enumerate(children)
+                )
+            else:
+                done += _mark_skipped(results, path, children, depth + 1, max_depth)
+
+        if progress_callback:
+            progress_callback(done, total)
+        level = next_level
+        depth += 1
+
+    return results
+
+
+def _mark_skipped(results, parent_path, children, depth, max_depth):
+    if depth > max_depth:
+        return 0
+    skipped = 0
+    for idx, child in enumerate(children):
+        path = child_path(parent_path, idx)
+        results[path] = {
+            "title": child.get("title", ""),
+            "key": None,
+            "type": None,
+            "error": f"Skipped because parent {parent_path} was not created"
+        }
+        skipped += 1 + _mark_skipped(results, path, child.get("subtasks", []), depth + 1, max_depth)
+    return skipped
+
+
+def create_issue_tree_concurrent(client, project_key, tasks_data, valid_types, max_workers=DEFAULT_MAX_WORKERS,
+                                 max_depth=3, existing=None, progress_callback=None, result_callback=None):
+    """Create the task tree one issue per request, siblings in parallel.
+
+    Children are started as soon as their parent exists, with at most
+    ``max_workers`` requests in flight. Takes the same ``existing`` and
+    ``result_callback`` arguments and returns the same path-keyed result
+    dict as ``create_issue_tree_bulk``.
+    """
+    existing = existing or {}
+
+    def create_node(path, node, parent):
+        if path in existing:
+            return {
+                "title": node.get("title", ""),
+                "key": existing[path]["key"],
+                "type": existing[path]["type"],
+                "error": None
+            }
+
+        parent_key = parent["key"] if parent else None
+        parent_type = parent["type"] if parent else None
+        issue_type_name = resolve_issue_type(parent_type, valid_types)
+        issue_key, error = create_issue(
+            client,
+            project_key,
+            node.get("title", ""),
+            node.get("description", ""),
+            issue_type_name,
+            parent_key=parent_key
+        )
+        return {
+            "title": node.get("title", ""),
+            "key": issue_key,
+            "type": issue_type_name,
+            "error": error
+        }
+
+    def record(path, result):
+        if result_callback and path not in existing:
+            result_callback(path, result)
+
+    results = run_tree(
+        tasks_data,
+        create_node,
+        max_workers=max_workers,
+        max_depth=max_depth,
+        should_descend=lambda result: bool(result["key"]),
+        progress_callback=progress_callback,
+        result_callback=record
+    )
+    _fill_skipped(results, tasks_data, "T", 1, max_depth)
+    return results
+
+
+def _fill_skipped(results, tasks, parent_path, depth, max_depth):
+    for idx, task in enumerate(tasks):
+        path = child_path(parent_path, idx)
+        children = task.get("subtasks", [])
+        if results[path]["key"]:
+            if depth < max_depth:
+                _fill_skipped(results, children, path, depth + 1, max_depth)
+        else:
+            _mark_skipped(results, path, children, depth + 1, max_depth)
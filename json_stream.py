@@ -0,0 +1,272 @@
+import json
+import re
+
+# Where the task array starts in a {"tasks": [...]} response
+_TASKS_ARRAY = re.compile(r'"tasks"\s*:\s*\[')
+# Characters kept while looking for the array start, enough for a key split across fragments
+_SEEK_TAIL = 64
+
+_SEEKING, _IN_ARRAY, _DONE = range(3)
+# Characters that make up a bare JSON literal: numbers, true, false, null
+_LITERAL_CHARS = set("0123456789+-.eEaAfFlLnNoOrRsStTuU")
+_LITERAL_FIXES = {"True": "true", "False": "false", "None": "null"}
+# A complete JSON number; anything else made of literal characters is not a finished value
+_JSON_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+
+
+def task_schema(depth=4):
+    """JSON schema of a {"tasks": [...]} response with subtasks nested ``depth`` levels deep.
+
+    Each level is spelled out because Gemini's response schemas can't refer
+    to themselves.
+    """
+    fields = {"title": {"type": "string"}, "description": {"type": "string"}}
+    item = {"type": "object", "properties": dict(fields), "required": ["title", "description"]}
+    for _ in range(depth - 1):
+        item = {
+            "type": "object",
+            "properties": dict(fields, subtasks={"type": "array", "items": item}),
+            "required": ["title", "description"]
+        }
+    return {"type": "object", "properties": {"tasks": {"type": "array", "items": item}}, "required": ["tasks"]}
+
+
+# Schema requested from backends that can constrain their output
+TASK_SCHEMA = task_schema()
+
+
+def repair_json(text):
+    """Best-effort fix of the JSON object in a model response, for backends without constrained output.
+
+    Drops prose and code fences around the object, inserts missing commas
+    between values, removes trailing commas, escapes raw newlines inside
+    strings, maps Python literals to JSON and closes whatever a truncated
+    response left open, dropping a literal it cut short. Raises ValueError
+    if there is no object at all.
+    """
+    start = (text or "").find("{")
+    if start == -1:
+        raise ValueError("No JSON object found in model response")
+
+    out = []
+    # One entry per open container: "{" or "[", and for objects whether a key is expected next
+    stack = []
+    expecting_key = []
+    in_string = False
+    escape = False
+    string_is_key = False
+    after_value = False
+    i = start
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            if escape:
+                escape = False
+                out.append(char)
+            elif char == "\\":
+                escape = True
+                out.append(char)
+            elif char == '"':
+                in_string = False
+                after_value = not string_is_key
+                out.append(char)
+            elif char == "\n":
+                out.append("\\n")
+            elif char == "\r":
+                out.append("\\r")
+            elif char == "\t":
+                out.append("\\t")
+            else:
+                out.append(char)
+            i += 1
+            continue
+
+        if char in " \t\r\n":
+            out.append(char)
+        elif char in "{[":
+            if after_value:
+                _begin_next(out, stack, expecting_key)
+            stack.append(char)
+            expecting_key.append(char == "{")
+            after_value = False
+            out.append(char)
+        elif char in "}]":
+            if not stack:
+                break
+            _drop_trailing_comma(out)
+            if stack[-1] == "{" and _ends_with_key(out):
+                out.append(": null")
+            out.append("}" if stack.pop() == "{" else "]")
+            expecting_key.pop()
+            after_value = True
+            if not stack:
+                break
+        elif char == '"':
+            if after_value:
+                _begin_next(out, stack, expecting_key)
+            string_is_key = bool(stack) and stack[-1] == "{" and expecting_key[-1]
+            in_string = True
+            after_value = False
+            out.append(char)
+        elif char == ",":
+            if stack and stack[-1] == "{":
+                expecting_key[-1] = True
+            after_value = False
+            out.append(char)
+        elif char == ":":
+            if stack and stack[-1] == "{":
+                expecting_key[-1] = False
+            after_value = False
+            out.append(char)
+        elif char in _LITERAL_CHARS:
+            end = i
+            while end < len(text) and text[end] in _LITERAL_CHARS:
+                end += 1
+            literal = _LITERAL_FIXES.get(text[i:end], text[i:end])
+            if end == len(text) and literal not in ("true", "false", "null") and not _JSON_NUMBER.fullmatch(literal):
+                # Cut off inside the literal ("-", "nul"); drop it and let the closing below fill in null
+                break
+            if after_value:
+                _begin_next(out, stack, expecting_key)
+            out.append(literal)
+            after_value = True
+            i = end
+            continue
+        # Anything else outside a string (backticks, stray prose) is dropped
+        i += 1
+
+    # Close what a truncated response left open
+    if in_string:
+        if escape:
+            out.pop()
+        out.append('"')
+    while stack:
+        _drop_trailing_comma(out)
+        if "".join(out).rstrip().endswith(":"):
+            out.append(" null")
+        elif stack[-1] == "{" and _ends_with_key(out):
+            out.append(": null")
+        out.append("}" if stack.pop() == "{" else "]")
+        expecting_key.pop()
+    return "".join(out)
+
+
+def _begin_next(out, stack, expecting_key):
+    """Insert the comma a model left out between two values."""
+    out.append(",")
+    if stack and stack[-1] == "{":
+        expecting_key[-1] = True
+
+
+def _drop_trailing_comma(out):
+    idx = len(out) - 1
+    while idx >= 0 and out[idx].isspace():
+        idx -= 1
+    if idx >= 0 and out[idx] == ",":
+        del out[idx]
+
+
+def _ends_with_key(out):
+    """True if the object being closed ends with a key that has no value yet."""
+    text = "".join(out).rstrip()
+    if not text.endswith('"'):
+        return False
+    # Walk back to the opening quote of the last string, then look at what precedes it
+    idx = len(text) - 2
+    while idx >= 0:
+        if text[idx] == '"':
+            backslashes = 0
+            j = idx - 1
+            while j >= 0 and text[j] == "\\":
+                backslashes += 1
+                j -= 1
+            if backslashes % 2 == 0:
+                break
+        idx -= 1
+    before = text[:idx].rstrip()
+    return before.endswith(("{", ","))
+
+
+class TaskStreamParser:
+    """Incremental parser for a streamed {"tasks": [...]} model response.
+
+    ``feed(fragment)`` returns the top-level task objects whose closing
+    brace arrived in that fragment, so each epic can be shown while the
+    rest is still being generated. Anything before the array (prose, code
+    fences) is skipped. Malformed items go through ``repair_json`` and are
+    skipped only if that fails too. Only the item currently being received
+    is buffered.
+    """
+
+    def __init__(self):
+        self._state = _SEEKING
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._item_start = None
+        self.tasks = []
+
+    def feed(self, fragment):
+        """Consume a text fragment and return the list of tasks it completed."""
+        if self._state == _DONE or not fragment:
+            return []
+        self._text += fragment
+
+        if self._state == _SEEKING:
+            match = _TASKS_ARRAY.search(self._text)
+            if not match:
+                self._text = self._text[-_SEEK_TAIL:]
+                return []
+            self._text = self._text[match.end():]
+            self._pos = 0
+            self._state = _IN_ARRAY
+
+        completed = []
+        text = self._text
+        consumed = 0
+        i = self._pos
+        while i < len(text):
+            char = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0 and char == "{":
+                    self._item_start = i
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # End of the tasks array
+                    self._state = _DONE
+                    consumed = i + 1
+                    break
+                self._depth -= 1
+                if self._depth == 0 and self._item_start is not None:
+                    try:
+                        task = json.loads(text[self._item_start:i + 1])
+                    except ValueError:
+                        try:
+                            task = json.loads(repair_json(text[self._item_start:i + 1]))
+                        except ValueError:
+                            task = None
+                    if isinstance(task, dict):
+                        completed.append(task)
+                    self._item_start = None
+                    consumed = i + 1
+            i += 1
+
+        # Drop everything up to the last finished item so the buffer stays small
+        self._text = text[consumed:]
+        self._pos = i - consumed if self._state != _DONE else 0
+        if self._item_start is not None:
+            self._item_start -= consumed
+        self.tasks.extend(completed)
+        return completed
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+from tree_executor import iter_tree
+
+# Ledger of task trees whose source document is unknown, e.g. summaries saved by older versions
+LEDGER_FILE = "workflow_ledger.json"
+# One ledger file per source document lives here
+LEDGER_DIR = "workflow_ledgers"
+
+
+def document_key(data):
+    """Short content hash of an uploaded document, naming its ledger."""
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def ledger_path(key, directory=LEDGER_DIR):
+    """Ledger file for the document with ``document_key`` ``key``; None gives the shared LEDGER_FILE."""
+    return os.path.join(directory, f"{key}.json") if key else LEDGER_FILE
+
+
+class WorkflowLedger:
+    """Persistent record of what each task tree node has been turned into.
+
+    Entries are keyed by tree path (T1, T1.2, T1.2.3) rather than by title, so
+    repeated titles under different epics don't collide. Each entry keeps the
+    node title it was recorded for; once the node is edited, the old entry no
+    longer counts as done. The file is rewritten after every update so a
+    crashed run can resume without creating duplicates; inside ``deferred()``
+    updates are only written on ``flush``, so a run can persist once per
+    tree level instead of once per node.
+    """
+
+    def __init__(self, path=LEDGER_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._deferred = 0
+        self._dirty = False
+        self.nodes = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get("nodes", {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"nodes": self.nodes}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def get(self, path, title=None):
+        """Return the entry for ``path``, or {} if missing or recorded for another title."""
+        with self._lock:
+            entry = self.nodes.get(path, {})
+            if title is not None and entry.get("title") != title:
+                return {}
+            return dict(entry)
+
+    def record(self, path, title, **fields):
+        """Merge ``fields`` into the entry for ``path`` and persist the ledger, or mark it for the next flush."""
+        with self._lock:
+            entry = self.nodes.get(path, {})
+            if entry.get("title") != title:
+                entry = {"title": title}
+            entry.update(fields)
+            self.nodes[path] = entry
+            if self._deferred:
+                self._dirty = True
+            else:
+                self._save()
+
+    def flush(self):
+        """Write updates held back by ``deferred()``."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+                self._dirty = False
+
+    @contextmanager
+    def deferred(self):
+        """Hold writes until ``flush`` or the end of the block, which flushes even when it raises."""
+        with self._lock:
+            self._deferred += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._deferred -= 1
+            self.flush()
+
+    def existing_issues(self, tasks, project_key, max_depth=3):
+        """{path: {"key", "type"}} of tree nodes already created as issues in ``project_key``."""
+        existing = {}
+        for path, node, _ in iter_tree(tasks, max_depth=max_depth):
+            entry = self.get(path, node.get("title", ""))
+            if entry.get("jira_key") and entry.get("jira_project") == project_key:
+                existing[path] = {"key": entry["jira_key"], "type": entry["jira_type"]}
+        return existing
+
+    def clear(self):
+        with self._lock:
+            self.nodes = {}
+            self._dirty = False
+            self._save()
@@ -0,0 +1,181 @@
+"""LLM settings and task extraction steps shared by the Streamlit apps.
+
+Nothing here calls Streamlit: each app passes in its backend and
+settings, and messages for the page come back through ``report(kind,
+message)`` with ``kind`` one of "caption", "warning" or "error".
+"""
+import json
+import os
+from collections import namedtuple
+
+from chunking import DEFAULT_CHUNK_CHARS, DEFAULT_CHUNK_WORKERS, DEFAULT_OVERLAP_CHARS, map_reduce_tasks, split_into_chunks
+from compact_tasks import resolve_task_format
+from llm_backends import default_rate_limits
+from llm_cache import DEFAULT_MAX_BYTES, DEFAULT_TTL
+from section_filter import filter_excluded_sections, tokens_saved
+from summary_prompt import SUMMARY_PROMPTS
+from testcase_batching import DEFAULT_MAX_BATCH
+
+# One app's LLM configuration; see read_llm_settings for the environment variables behind each field
+LLMSettings = namedtuple("LLMSettings", [
+    "backend", "model", "max_concurrency", "cache_ttl_hours", "cache_mb", "rpm", "tpm", "chunk_chars",
+    "chunk_overlap", "chunk_workers", "task_format", "build_prompt", "temperature", "prefilter",
+    "test_case_batch_size"
+])
+
+
+def read_llm_settings(default_backend="gemini", default_models=None, default_chunk_chars=DEFAULT_CHUNK_CHARS,
+                      default_prompt="standard", temperature=0.1):
+    """LLMSettings from the environment, with this app's defaults for anything unset.
+
+    ``default_models`` maps backend names to the model used when LLM_MODEL
+    is unset; other backends use their own default model.
+    """
+    # Backend for task extraction and test case generation: "gemini", "ollama" or "groq"
+    backend = os.getenv("LLM_BACKEND", default_backend).lower()
+    rpm, tpm = default_rate_limits(backend)
+    return LLMSettings(
+        backend=backend,
+        model=os.getenv("LLM_MODEL") or (default_models or {}).get(backend),
+        # Concurrent requests to the backend; unset uses the backend's default
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "0")) or None,
+        # LLM responses are reused for identical requests within this many hours
+        cache_ttl_hours=int(os.getenv("LLM_CACHE_TTL_HOURS", str(DEFAULT_TTL // 3600))),
+        cache_mb=int(os.getenv("LLM_CACHE_MB", str(DEFAULT_MAX_BYTES // (1024 * 1024)))),
+        # Requests and tokens per minute allowed across all threads; 0 disables a limit. Unset uses
+        # the backend's free-tier quota, and no limit for a local Ollama server
+        rpm=int(os.getenv("LLM_RPM", str(rpm))),
+        tpm=int(os.getenv("LLM_TPM", str(tpm))),
+        # Documents longer than this many characters are summarized in overlapping chunks
+        chunk_chars=int(os.getenv("SUMMARY_CHUNK_CHARS", str(default_chunk_chars))),
+        chunk_overlap=int(os.getenv("SUMMARY_CHUNK_OVERLAP", str(DEFAULT_OVERLAP_CHARS))),
+        chunk_workers=int(os.getenv("SUMMARY_CHUNK_WORKERS", str(DEFAULT_CHUNK_WORKERS))),
+        # Extraction output: "json", or "outline" for a compact heading outline that is expanded
+        # locally into the same task tree and costs far fewer output tokens
+        task_format=resolve_task_format(os.getenv("SUMMARY_OUTPUT_FORMAT", "json")),
+        # Extraction prompt: "standard", or "local" for small local models
+        build_prompt=SUMMARY_PROMPTS.get(os.getenv("SUMMARY_PROMPT", default_prompt), SUMMARY_PROMPTS[default_prompt]),
+        temperature=temperature,
+        # Drop Overview/Scope, tech stack, estimate, design note and effort sections locally before
+        # prompting; 0 sends the whole document
+        prefilter=os.getenv("SUMMARY_PREFILTER", "1") != "0",
+        # Tickets packed into one test case request, further capped by the model's context window;
+        # 1 disables batching
+        test_case_batch_size=int(os.getenv("TEST_CASE_BATCH_SIZE", str(DEFAULT_MAX_BATCH)))
+    )
+
+
+def generate_with_llm(backend, prompt, bypass_cache=False, temperature=None, json_schema=None, output_tokens=None,
+                      system=None):
+    """Response text from ``backend``, served from its response cache unless ``bypass_cache``.
+
+    Safe to call from worker threads as long as the caller resolved
+    ``backend`` and ``bypass_cache`` on the script thread.
+    """
+    return backend.generate(prompt, system=system, temperature=temperature, bypass_cache=bypass_cache,
+                            json_schema=json_schema, output_tokens=output_tokens)
+
+
+def stream_with_llm(backend, prompt, bypass_cache=False, temperature=None, json_schema=None):
+    """Yield response text from ``backend`` as it is generated; a cached response comes as one fragment."""
+    return backend.stream(prompt, temperature=temperature, bypass_cache=bypass_cache, json_schema=json_schema)
+
+
+def llm_cache_caption(cache, max_mb):
+    """Hit rate and size line for an LLM response cache, or None before its first lookup."""
+    if cache.hit_rate() is None:
+        return None
+    return (f"LLM cache: hit rate {cache.hit_rate():.0%} ({cache.hits}/{cache.hits + cache.misses}) · "
+            f"{cache.size_bytes() / (1024 * 1024):.1f}/{max_mb} MB")
+
+
+def prefilter_document(text, outline, settings, report=None):
+    """Drop the sections the prompt excludes before prompting and report the input tokens saved.
+
+    Returns (text, boundaries) for summarize_with_llm; ``boundaries`` are
+    the kept DOCX heading offsets, or None without an outline.
+    """
+    if not settings.prefilter:
+        return text, [offset for _, _, offset in outline] if outline else None
+    filtered = filter_excluded_sections(text, outline)
+    if filtered.removed and report:
+        saved, before = tokens_saved(text, filtered)
+        titles = ", ".join(title for _, title, _ in filtered.removed[:5])
+        if len(filtered.removed) > 5:
+            titles += ", ..."
+        report("caption", f"Pre-filter dropped {len(filtered.removed)} excluded sections ({titles}): "
+                          f"~{saved:,} of {before:,} input tokens saved ({saved / before:.0%})")
+    return filtered.text, filtered.boundaries
+
+
+def summarize_with_llm_single(backend, settings, text, bypass_cache=False, on_tasks=None, report=None):
+    """Task tree JSON string for ``text`` from one streamed request, or None after reporting an error.
+
+    ``on_tasks(tasks)`` is called with the epics parsed so far while the
+    response streams.
+    """
+    task_format = settings.task_format
+    prompt = settings.build_prompt(text, task_format)
+    try:
+        # Parse the response while it streams so finished epics can be shown right away
+        parser = task_format.stream_parser()
+        fragments = []
+        for fragment in stream_with_llm(backend, prompt, bypass_cache, settings.temperature, task_format.json_schema):
+            fragments.append(fragment)
+            if parser.feed(fragment) and on_tasks:
+                on_tasks(parser.tasks)
+        try:
+            tasks = task_format.parse("".join(fragments))
+        except ValueError as e:
+            if not parser.tasks:
+                # Unreadable text is never handed on to be saved as the summary
+                if report:
+                    report("error", f"Could not read tasks from the model response: {e}")
+                return None
+            tasks = parser.tasks
+        return json.dumps({"tasks": tasks}, indent=2, ensure_ascii=False)
+    except Exception as e:
+        if report:
+            report("error", f"LLM backend error ({backend.name}): {e}")
+        return None
+
+
+def summarize_with_llm(backend, settings, text, boundaries=None, bypass_cache=False, on_tasks=None,
+                       progress_callback=None, report=None):
+    """Summarize a document into a task tree JSON string, or None after reporting an error.
+
+    Documents longer than ``settings.chunk_chars`` are split on section
+    ``boundaries`` (or detected headings) into overlapping chunks whose task
+    trees are extracted concurrently and merged. ``on_tasks(tasks)`` gets
+    the tasks extracted so far and ``progress_callback(done, total)`` the
+    chunk count, both on the calling thread.
+    """
+    chunks = split_into_chunks(text, settings.chunk_chars, settings.chunk_overlap, boundaries)
+    if len(chunks) <= 1:
+        return summarize_with_llm_single(backend, settings, text, bypass_cache, on_tasks, report)
+
+    task_format = settings.task_format
+
+    def extract_chunk(chunk):
+        # Runs on worker threads
+        prompt = settings.build_prompt(chunk, task_format)
+        return task_format.parse(generate_with_llm(backend, prompt, bypass_cache, settings.temperature,
+                                                   task_format.json_schema))
+
+    if progress_callback:
+        progress_callback(0, len(chunks))
+    tasks, errors = map_reduce_tasks(
+        chunks,
+        extract_chunk,
+        max_workers=settings.chunk_workers,
+        progress_callback=progress_callback,
+        partial_callback=on_tasks
+    )
+    if report:
+        for idx, message in errors:
+            report("warning", f"Section {idx + 1} of {len(chunks)} failed: {message}")
+    if not tasks:
+        if report:
+            report("error", "The model returned no tasks for any document section.")
+        return None
+    return json.dumps({"tasks": tasks}, indent=2, ensure_ascii=False)
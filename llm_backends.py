@@ -0,0 +1,304 @@
+import abc
+import asyncio
+import json
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ollama_client import DEFAULT_KEEP_ALIVE, DEFAULT_OLLAMA_HOST, OllamaClient
+from pipeline import DEFAULT_LLM_RPM, DEFAULT_LLM_TPM, DEFAULT_OUTPUT_TOKENS, estimate_tokens
+
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
+
+# Model used when a backend is created without one
+DEFAULT_MODELS = {
+    "gemini": "gemini-2.0-flash",
+    "ollama": "llama3.1",
+    "groq": "llama-3.1-8b-instant"
+}
+# (context window, output limit) in tokens of known models; others get DEFAULT_MODEL_LIMITS
+MODEL_LIMITS = {
+    "gemini-2.0-flash": (1048576, 8192),
+    "llama-3.1-8b-instant": (131072, 8192),
+    "llama3-70b-8192": (8192, 8192)
+}
+DEFAULT_MODEL_LIMITS = (8192, 2048)
+# Ollama's context window when num_ctx isn't set
+OLLAMA_DEFAULT_NUM_CTX = 2048
+# Concurrent requests per backend; a local Ollama server handles few at once
+DEFAULT_CONCURRENCY = {"gemini": 8, "ollama": 2, "groq": 4}
+# (requests, tokens) per minute a rate limiter should allow; 0 is no limit. Free tiers of the hosted
+# APIs (Groq's for llama-3.1-8b-instant); a local Ollama server has no quota to respect
+DEFAULT_RATE_LIMITS = {
+    "gemini": (DEFAULT_LLM_RPM, DEFAULT_LLM_TPM),
+    "ollama": (0, 0),
+    "groq": (30, 6000)
+}
+# Environment variables read for options the caller doesn't pass
+ENV_OPTIONS = {
+    "gemini": {"api_key": "GEMINI_API_KEY"},
+    "ollama": {"host": "OLLAMA_HOST", "keep_alive": "OLLAMA_KEEP_ALIVE", "num_ctx": "OLLAMA_NUM_CTX",
+               "num_thread": "OLLAMA_NUM_THREAD"},
+    "groq": {"api_key": "GROQ_API_KEY", "url": "GROQ_API_URL"}
+}
+DEFAULT_GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
+# (connect, read) timeouts in seconds for hosted APIs
+DEFAULT_TIMEOUT = (5, 120)
+
+BACKENDS = {}
+
+
+def register_backend(name):
+    """Class decorator adding an LLM backend under ``name``."""
+    def decorator(cls):
+        cls.name = name
+        BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+class LLMBackend(abc.ABC):
+    """One model on one provider, with a pooled client shared by every caller.
+
+    Subclasses implement ``_generate`` and may override ``_stream``. The public
+    ``generate`` / ``stream`` / ``agenerate`` wrap them with the optional
+    response ``cache`` and rate ``limiter`` and hold one of
+    ``max_concurrency`` slots per request, so the same backend object can be
+    used from any number of threads or tasks.
+
+    ``json_schema`` asks for JSON matching the schema. Backends that can
+    constrain decoding to it set ``supports_schema``; the others at best
+    switch to a generic JSON mode, so callers still parse the reply
+    tolerantly.
+    """
+
+    name = None
+    supports_schema = False
+
+    def __init__(self, model=None, max_concurrency=None, cache=None, limiter=None):
+        self.model = model or DEFAULT_MODELS[self.name]
+        self.max_concurrency = max_concurrency or DEFAULT_CONCURRENCY[self.name]
+        self.cache = cache
+        self.limiter = limiter
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+
+    @abc.abstractmethod
+    def _generate(self, prompt, system, temperature, json_schema):
+        """The full response text for one request."""
+
+    def _stream(self, prompt, system, temperature, json_schema):
+        yield self._generate(prompt, system, temperature, json_schema)
+
+    def _acquire(self, prompt, system, output_tokens):
+        if self.limiter is not None:
+            self.limiter.acquire(estimate_tokens(f"{system}\n\n{prompt}" if system else prompt,
+                                                 output_tokens or DEFAULT_OUTPUT_TOKENS))
+
+    def _cache_prompt(self, prompt, system, json_schema):
+        # The system prompt and the output schema are part of the request, so they are part of the key
+        key = f"{system}\n\n{prompt}" if system else prompt
+        if json_schema:
+            key += "\n\n" + json.dumps(json_schema, sort_keys=True)
+        return key
+
+    def generate(self, prompt, system=None, temperature=None, bypass_cache=False, json_schema=None,
+                 output_tokens=None):
+        """Completion text for ``prompt``; only cache misses count against the limiter.
+
+        ``output_tokens`` is the expected reply length charged to the
+        limiter, DEFAULT_OUTPUT_TOKENS when not given.
+        """
+        def call():
+            self._acquire(prompt, system, output_tokens)
+            with self._slots:
+                return self._generate(prompt, system, temperature, json_schema)
+
+        if self.cache is None:
+            return call()
+        return self.cache.cached_call(self.name, self.model, self._cache_prompt(prompt, system, json_schema), call,
+                                      temperature=temperature, bypass=bypass_cache)
+
+    def stream(self, prompt, system=None, temperature=None, bypass_cache=False, json_schema=None,
+               output_tokens=None):
+        """Yield completion text as it is generated; a cached response comes as one fragment."""
+        def stream():
+            self._acquire(prompt, system, output_tokens)
+            with self._slots:
+                yield from self._stream(prompt, system, temperature, json_schema)
+
+        if self.cache is None:
+            return stream()
+        return self.cache.cached_stream(self.name, self.model, self._cache_prompt(prompt, system, json_schema),
+                                        stream, temperature=temperature, bypass=bypass_cache)
+
+    async def agenerate(self, prompt, system=None, temperature=None, bypass_cache=False, json_schema=None,
+                        output_tokens=None):
+        """Coroutine form of ``generate`` for asyncio callers; the request runs on a worker thread."""
+        return await asyncio.to_thread(self.generate, prompt, system, temperature, bypass_cache, json_schema,
+                                       output_tokens)
+
+    def limits(self):
+        """(context window, output limit) in tokens, for sizing prompts and batches."""
+        return MODEL_LIMITS.get(self.model, DEFAULT_MODEL_LIMITS)
+
+    def warmup(self):
+        """Prepare the model for the first request; returns False if that failed."""
+        return True
+
+    def close(self):
+        pass
+
+
+if genai is not None:
+    @register_backend("gemini")
+    class GeminiBackend(LLMBackend):
+        """Google Gemini through google-generativeai, reusing one model object per system prompt."""
+
+        supports_schema = True
+
+        def __init__(self, model=None, api_key=None, **kwargs):
+            super().__init__(model, **kwargs)
+            if api_key:
+                genai.configure(api_key=api_key)
+            self._models = {}
+            self._lock = threading.Lock()
+
+        def _model(self, system):
+            with self._lock:
+                model = self._models.get(system)
+                if model is None:
+                    model = genai.GenerativeModel(self.model, system_instruction=system or None)
+                    self._models[system] = model
+                return model
+
+        def _config(self, temperature, json_schema):
+            config = {}
+            if temperature is not None:
+                config["temperature"] = temperature
+            if json_schema:
+                config["response_mime_type"] = "application/json"
+                config["response_schema"] = json_schema
+            return config or None
+
+        def _generate(self, prompt, system, temperature, json_schema):
+            config = self._config(temperature, json_schema)
+            return self._model(system).generate_content(prompt, generation_config=config).text
+
+        def _stream(self, prompt, system, temperature, json_schema):
+            config = self._config(temperature, json_schema)
+            for chunk in self._model(system).generate_content(prompt, generation_config=config, stream=True):
+                if chunk.parts:
+                    yield chunk.text
+
+
+@register_backend("ollama")
+class OllamaBackend(LLMBackend):
+    """A local Ollama server over its HTTP API; see OllamaClient."""
+
+    supports_schema = True
+
+    def __init__(self, model=None, host=DEFAULT_OLLAMA_HOST, keep_alive=DEFAULT_KEEP_ALIVE, num_ctx=None,
+                 num_thread=None, **kwargs):
+        super().__init__(model, **kwargs)
+        self.client = OllamaClient(host, keep_alive=keep_alive or DEFAULT_KEEP_ALIVE, num_ctx=num_ctx,
+                                   num_thread=num_thread, pool_size=self.max_concurrency)
+
+    def _options(self, temperature):
+        return {"temperature": temperature} if temperature is not None else None
+
+    def _generate(self, prompt, system, temperature, json_schema):
+        return self.client.generate(self.model, prompt, self._options(temperature), system=system,
+                                    format=json_schema)
+
+    def _stream(self, prompt, system, temperature, json_schema):
+        return self.client.generate_stream(self.model, prompt, self._options(temperature), system=system,
+                                           format=json_schema)
+
+    def limits(self):
+        # The prompt and the reply share the configured window
+        num_ctx = self.client.options.get("num_ctx", OLLAMA_DEFAULT_NUM_CTX)
+        return num_ctx, num_ctx
+
+    def warmup(self):
+        return self.client.warmup(self.model)
+
+    def close(self):
+        self.client.close()
+
+
+@register_backend("groq")
+class GroqBackend(LLMBackend):
+    """Groq's OpenAI-compatible chat completions API over a pooled keep-alive session.
+
+    A ``json_schema`` turns on JSON mode, which guarantees valid JSON but
+    not the schema. Raises RuntimeError when the API answers with an error
+    status.
+    """
+
+    def __init__(self, model=None, api_key=None, url=DEFAULT_GROQ_URL, timeout=DEFAULT_TIMEOUT, **kwargs):
+        super().__init__(model, **kwargs)
+        self.url = url or DEFAULT_GROQ_URL
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _post(self, prompt, system, temperature, json_schema=None, stream=False):
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": prompt})
+        payload = {"model": self.model, "messages": messages, "stream": stream}
+        if temperature is not None:
+            payload["temperature"] = temperature
+        if json_schema:
+            payload["response_format"] = {"type": "json_object"}
+        response = self.session.post(self.url, json=payload, timeout=self.timeout, stream=stream)
+        if response.status_code != 200:
+            raise RuntimeError(f"API error {response.status_code}: {response.text}")
+        return response
+
+    def _generate(self, prompt, system, temperature, json_schema):
+        return self._post(prompt, system, temperature, json_schema).json()["choices"][0]["message"]["content"]
+
+    def _stream(self, prompt, system, temperature, json_schema):
+        # Server-sent events: "data: {...}" lines ending with "data: [DONE]"
+        with self._post(prompt, system, temperature, json_schema, stream=True) as response:
+            for line in response.iter_lines():
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[len(b"data:"):].strip()
+                if data == b"[DONE]":
+                    break
+                content = json.loads(data)["choices"][0]["delta"].get("content")
+                if content:
+                    yield content
+
+    def close(self):
+        self.session.close()
+
+
+def default_rate_limits(name):
+    """(requests, tokens) per minute for backend ``name``; unknown backends get the Gemini free tier."""
+    return DEFAULT_RATE_LIMITS.get((name or "").strip().lower(), (DEFAULT_LLM_RPM, DEFAULT_LLM_TPM))
+
+
+def create_backend(name, model=None, **options):
+    """Backend ``name`` ("gemini", "ollama" or "groq") for ``model``.
+
+    Options not passed are read from the environment variables in
+    ENV_OPTIONS. Raises ValueError for an unknown backend or one whose
+    client library isn't installed.
+    """
+    name = (name or "").strip().lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown or unavailable LLM backend: {name!r} (available: {', '.join(sorted(BACKENDS))})")
+    for option, variable in ENV_OPTIONS.get(name, {}).items():
+        if options.get(option) is None and os.getenv(variable):
+            options[option] = os.getenv(variable)
+    return BACKENDS[name](model, **options)
@@ -0,0 +1,137 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+LLM_CACHE_FILE = "llm_cache.sqlite3"
+# Responses older than this are treated as misses and purged
+DEFAULT_TTL = 7 * 24 * 3600
+# Total size of stored responses before the least recently used are evicted
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+
+
+def normalize_prompt(prompt):
+    """Ignore differences in line endings and trailing whitespace between otherwise equal prompts."""
+    lines = prompt.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def cache_key(backend, model, prompt, temperature=None):
+    """SHA-256 over backend, model name, temperature and the normalized prompt."""
+    temperature = "" if temperature is None else repr(float(temperature))
+    material = "\0".join([backend, model, temperature, normalize_prompt(prompt)])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite-backed cache of LLM completions with a TTL and a size bound.
+
+    One connection is shared behind a lock, so the cache can be used from
+    worker threads. Hit and miss counts cover the lifetime of the instance.
+    """
+
+    def __init__(self, path=LLM_CACHE_FILE, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " backend TEXT, model TEXT,"
+            " response TEXT, size INTEGER,"
+            " created REAL, last_used REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    def get(self, backend, model, prompt, temperature=None):
+        """Cached response text, or None if missing or older than the TTL."""
+        key = cache_key(backend, model, prompt, temperature)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, backend, model, prompt, response, temperature=None):
+        """Store a response, then drop expired entries and the least recently used beyond the size bound."""
+        key = cache_key(backend, model, prompt, temperature)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, backend, model, response, len(response.encode("utf-8")), now, now)
+            )
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                for old_key, size in self._conn.execute(
+                    "SELECT key, size FROM responses ORDER BY last_used"
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                    total -= size
+            self._conn.commit()
+
+    def cached_call(self, backend, model, prompt, call, temperature=None, bypass=False):
+        """Return the cached response for this request, or run ``call()`` and cache its text.
+
+        With ``bypass`` the cache isn't read, but the fresh response still
+        replaces the stored one. Empty responses are not cached.
+        """
+        if not bypass:
+            cached = self.get(backend, model, prompt, temperature)
+            if cached is not None:
+                return cached
+        response = call()
+        if response:
+            self.put(backend, model, prompt, response, temperature)
+        return response
+
+    def cached_stream(self, backend, model, prompt, stream, temperature=None, bypass=False):
+        """Streaming counterpart of ``cached_call``: yield text fragments from ``stream()``.
+
+        A cached response is yielded as one fragment. A fresh response is
+        stored only once the stream has been read to the end.
+        """
+        if not bypass:
+            cached = self.get(backend, model, prompt, temperature)
+            if cached is not None:
+                yield cached
+                return
+        parts = []
+        for fragment in stream():
+            parts.append(fragment)
+            yield fragment
+        response = "".join(parts)
+        if response:
+            self.put(backend, model, prompt, response, temperature)
+
+    def hit_rate(self):
+        """Fraction of lookups served from the cache, or None before the first lookup."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    def size_bytes(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
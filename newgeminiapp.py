@@ -1,8 +1,5 @@
 import streamlit as st
-import docx2txt
 import subprocess
-import tempfile
-import requests
 import pandas as pd
 import os
 import re
@@ -10,8 +7,14 @@ import json
 import time
 from dotenv import load_dotenv
 from github import Github
+from jira_client import JiraClient, get_cached_issue_types
 import openai
-import google.generativeai as genai
+from llm_backends import create_backend
+from pipeline import TokenBucketLimiter
+from testcase_batching import generate_batched
+from llm_cache import LLMResponseCache
+from llm_app import generate_with_llm, llm_cache_caption, prefilter_document, read_llm_settings, summarize_with_llm
+from extractors import SPILL_THRESHOLD_BYTES, extract_document, parse_engine_config, spilled
 # Load environment variables from .env file
 load_dotenv()
 
@@ -27,15 +30,23 @@ GITHUB_REPO = os.getenv("GITHUB_REPO")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
 GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=GEMINI_API_KEY)
+# LLM backend, response cache, rate limits and task extraction; see llm_app.read_llm_settings
+LLM = read_llm_settings()
+# Uploads above this size are spilled to a temp file instead of parsed in memory
+UPLOAD_SPILL_MB = int(os.getenv("UPLOAD_SPILL_MB", str(SPILL_THRESHOLD_BYTES // (1024 * 1024))))
+# Extraction engine per format, e.g. "pdf=pymupdf,docx=stream"; unset formats use the defaults
+EXTRACTION_ENGINES = parse_engine_config(os.getenv("EXTRACTION_ENGINES", ""))
 
 OLLAMA_MODEL_NAME = "deepseek-r1"  # Change to your actual model name from `ollama list`
 
 
 
-def extract_text_from_docx(docx_path):
-    return docx2txt.process(docx_path)
+def extract_text_from_file(source, file_type):
+    """Extract text from a file path or in-memory buffer, probing its format from magic bytes."""
+    text, info = extract_document(source, fallback_format=file_type, engines=EXTRACTION_ENGINES)
+    # (level, title, offset) of each DOCX heading in the text, for the pre-filter and chunking
+    st.session_state.document_outline = info.get("outline")
+    return text
 
 def prrse_tasks(text):
     lines = text.split('\n')
@@ -44,79 +55,25 @@ def prrse_tasks(text):
 def clean_text(text):
     return text.encode("utf-8", errors="ignore").decode("utf-8", errors="ignore")
 
-def summarize_with_gemini(text):
-    prompt = f"""
-Document Task Extraction for Jira Issues
-
-Please analyze the provided document (PDF, DOCX, or TXT) and extract all tasks that should be created as Jira issues. Organize them hierarchically as follows:
-
-1. Identify main tasks/topics that will serve as "Epics" in Jira
-2. Identify secondary tasks that will be "Tasks" under their respective Epics
-3. Identify detailed work items that will be "Subtasks" under their respective Tasks
-4. If a sub-subtask has its own subtasks, include them as sub-subtasks
-5. the description should be taken from the document
-6. keep the descriptions as short as possible but meaningful and concise which match in my document.
-7. make sure to don't miss-out and infromation from the document
-8. Do not include any sections related to Overview, Purpose, Scope, Tech stack suggestions, Time or hour estimates, Web design notes, Total days or effort summaries.
-Format the output as JSON with the following structure:
-{{
-  "tasks": [
-    {{
-      "title": "Main Task 1",
-      "description": "Take description of main task 1 from document",
-      "subtasks": [
-        {{
-          "title": "Subtask 1.1",
-          "description": "Take description of subtask 1.1 from document",
-          "subtasks": [
-            {{
-              "title": "Sub-subtask 1.1.1",
-              "description": "Take description of sub-subtask 1.1.1 from document"
-            }}
-          ]
-        }}
-      ]
-    }}
-  ]
-}}
-Important Guidelines:
-- don't add None, Select, and choose between  in description of tasks
-- if round brackets are used in the document then remove them from the description
-- if there are smimilar sub-tasks put them in under one related task 
-- if description is more than 200 characters then convert into subtasks
-- use only text from the document to fill in the JSON structure
-- Do not add any additional text or comments outside the JSON structure
-- don't include any explanations or summaries
-- don't use any extra text outside from the document
-- Stricly Don't use \n or \t in the title and description
-- Don't use any special characters in the title and description
-Given the following document content, remove any sections related to:
-- Overview Purpose Scope
-- Tech stack suggestions
-- Time or hour estimates
-- Web design notes
-- Total days or effort summaries
-Document Content:
-\"\"\"
-{text}
-\"\"\"
-"""
-    try:
-        model = genai.GenerativeModel("gemini-2.0-flash")
-        response = model.generate_content(prompt,
-        generation_config={"temperature": 0.1})
-        raw_output = response.text.strip()
-
-        match = re.search(r"\{[\s\S]*\}", raw_output)
-        if match:
-            return match.group(0)
-        else:
-            st.warning("No JSON block found in Gemini response.")
-            return raw_output  # fallback
-    except Exception as e:
-        st.error(f"Gemini API error: {e}")
-        return None
+@st.cache_resource
+def get_llm_cache():
+    """LLM response cache shared across reruns, so hit counts accumulate"""
+    return LLMResponseCache(ttl=LLM.cache_ttl_hours * 3600, max_bytes=LLM.cache_mb * 1024 * 1024)
+
+@st.cache_resource
+def get_llm_limiter():
+    """LLM rate limiter shared by every thread and rerun, so the budget is global"""
+    return TokenBucketLimiter(rpm=LLM.rpm, tpm=LLM.tpm)
 
+@st.cache_resource
+def get_llm_backend():
+    """Configured LLM backend; its pooled client is shared across reruns and threads"""
+    return create_backend(LLM.backend, LLM.model, max_concurrency=LLM.max_concurrency,
+                          cache=get_llm_cache(), limiter=get_llm_limiter())
+
+def report_message(kind, message):
+    """Show a message from llm_app as st.caption, st.warning or st.error"""
+    getattr(st, kind)(message)
 
 def count_tasks(tasks_data):
     """Count total number of tasks, subtasks, and sub-subtasks"""
@@ -250,26 +207,19 @@ def display_task_table(tasks_data):
     df = pd.DataFrame(table_data)
     st.dataframe(df, use_container_width=True, hide_index=True)
 
-def get_valid_issue_types():
-    url = f"{JIRA_BASE_URL}/rest/api/3/issuetype"
-    auth = (JIRA_EMAIL, JIRA_API_TOKEN)
-    response = requests.get(url, auth=auth)
-    if response.status_code == 200:
-        return [item["name"] for item in response.json()]
-    return []
+@st.cache_resource
+def get_jira_client():
+    """Shared Jira client whose connection pool survives Streamlit reruns"""
+    return JiraClient(JIRA_BASE_URL, JIRA_EMAIL, JIRA_API_TOKEN)
+
+def get_valid_issue_types(project_key=None):
+    return get_cached_issue_types(get_jira_client(), project_key)
 
 
 def create_jira_issue(summary, description, issue_type="Epic", parent_id=None, parent_type=None):
     st.write(f"📝 Creating Jira issue: {summary}")
 
-    url = f"{JIRA_BASE_URL}/rest/api/3/issue"
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json"
-    }
-    auth = (JIRA_EMAIL, JIRA_API_TOKEN)
-
-    valid_types = get_valid_issue_types()
+    valid_types = get_valid_issue_types(JIRA_PROJECT_KEY)
 
     # Auto-determine issue type based on parent
     if not parent_id:
@@ -310,7 +260,7 @@ def create_jira_issue(summary, description, issue_type="Epic", parent_id=None, p
     
         
 
-    response = requests.post(url, json=payload, headers=headers, auth=auth)
+    response = get_jira_client().post("/rest/api/3/issue", json=payload)
 
     if response.status_code == 201:
         issue_key = response.json().get("key")
@@ -321,17 +271,23 @@ def create_jira_issue(summary, description, issue_type="Epic", parent_id=None, p
         st.code(response.text)
         return None, None
 
-def create_github_branch(branch_name, base="main"):
-    g = Github(GITHUB_TOKEN)
-    repo = g.get_repo(GITHUB_REPO)
+@st.cache_resource
+def get_github_repo(repo_name):
+    """Cached GitHub client and repository handle, reused across branches and reruns"""
+    return Github(GITHUB_TOKEN).get_repo(repo_name)
 
+def get_base_sha(base="main"):
+    """Resolve the head commit of the base branch; call once per run"""
     try:
-        source = repo.get_branch(base)
+        return get_github_repo(GITHUB_REPO).get_branch(base).commit.sha
     except Exception as e:
         st.error(f"⚠️ Could not find base branch '{base}'. Check if it exists in your GitHub repo.")
         st.stop()
 
-    repo.create_git_ref(ref=f"refs/heads/{branch_name}", sha=source.commit.sha)
+def create_github_branch(branch_name, base="main", base_sha=None):
+    if base_sha is None:
+        base_sha = get_base_sha(base)
+    get_github_repo(GITHUB_REPO).create_git_ref(ref=f"refs/heads/{branch_name}", sha=base_sha)
 
 def simulate_test_case_generation(ticket, output_dir="test_cases"):
     os.makedirs(output_dir, exist_ok=True)
@@ -374,29 +330,42 @@ Title: {ticket['summary']}
 Description: {ticket['description']}
 """
 
-def simulate_test_case_generation_ai(ticket, output_dir="test_cases"):
-    import google.generativeai as genai
-    try:
-        os.makedirs(output_dir, exist_ok=True)
-        file_path = os.path.join(output_dir, f"{ticket['key']}_test_cases.md")
-
-        prompt = generate_test_case_prompt(ticket)
-
-        # Use Gemini to generate test cases
-        model = genai.GenerativeModel("gemini-2.0-flash")
-        response = model.generate_content(prompt)
-        ai_output = response.text.strip()
+def simulate_test_case_generation_ai(tickets, output_dir="test_cases"):
+    """Write a test case file per ticket, packing several tickets into each LLM request.
 
+    Batches hold up to LLM.test_case_batch_size tickets and fit the model's
+    context window; each reply is split back into per-ticket files, and
+    tickets it misses are retried alone. Returns the number of requests made.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    context_tokens, output_tokens = llm_backend.limits()
+    progress = st.progress(0, text="Generating test cases...")
+    texts, errors, requests = generate_batched(
+        tickets,
+        lambda prompt, output_tokens: generate_with_llm(llm_backend, prompt, bypass_llm_cache,
+                                                        output_tokens=output_tokens),
+        generate_test_case_prompt,
+        context_tokens,
+        output_tokens,
+        max_batch=LLM.test_case_batch_size,
+        progress_callback=lambda done, total: progress.progress(done / total, text=f"Generated {done}/{total} test cases")
+    )
+    progress.empty()
+
+    for ticket in tickets:
+        file_path = os.path.join(output_dir, f"{ticket['key']}_test_cases.md")
+        if ticket["key"] in errors:
+            print(f"❌ Unexpected error during test case generation for {ticket['key']}: {errors[ticket['key']]}")
+            fallback_path = os.path.join(output_dir, f"{ticket['key']}_error.log")
+            with open(fallback_path, "w", encoding="utf-8") as f:
+                f.write(f"# Critical error while processing {ticket['key']}\nError: {errors[ticket['key']]}")
+            continue
         try:
             with open(file_path, "w", encoding="utf-8") as f:
-                f.write(f"# Test Cases for {ticket['key']} - {ticket['summary']}\n\n{ai_output}")
+                f.write(f"# Test Cases for {ticket['key']} - {ticket['summary']}\n\n{texts[ticket['key']]}")
         except Exception as file_error:
             print(f"❌ Error writing test cases to file for {ticket['key']}: {file_error}")
-    except Exception as e:
-        print(f"❌ Unexpected error during test case generation for {ticket['key']}: {e}")
-        fallback_path = os.path.join(output_dir, f"{ticket['key']}_error.log")
-        with open(fallback_path, "w", encoding="utf-8") as f:
-            f.write(f"# Critical error while processing {ticket['key']}\nError: {str(e)}")
+    return requests
 
 def sanitize_branch_name(name):
     # Replace spaces with underscores, remove invalid characters
@@ -527,16 +496,31 @@ st.markdown("""
 """, unsafe_allow_html=True)
 st.title("📄📌 Jira Task Extractor using Gemini ")
 
+# Resolved here on the script thread so worker threads can use them
+llm_cache = get_llm_cache()
+try:
+    llm_backend = get_llm_backend()
+except ValueError as e:
+    st.error(f"❌ {e}")
+    st.stop()
+bypass_llm_cache = st.checkbox(
+    "♻️ Bypass LLM response cache",
+    help="Call the model even for a request it has answered before; the fresh response replaces the cached one."
+)
+if llm_cache_caption(llm_cache, LLM.cache_mb):
+    st.caption(llm_cache_caption(llm_cache, LLM.cache_mb))
+st.caption(f"LLM backend: {llm_backend.name} · {llm_backend.model}")
+
 uploaded_file = st.file_uploader("Upload a project document", type=["docx", "pdf", "txt"])
 
 if uploaded_file is not None:
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp_file:
-        tmp_file.write(uploaded_file.read())
-        temp_docx_path = tmp_file.name
+    file_extension = uploaded_file.name.split('.')[-1].lower()
 
     st.success("File uploaded successfully!")
 
-    text = extract_text_from_docx(temp_docx_path)
+    # Parse straight from the upload buffer; only very large files go through a temp file
+    with spilled(uploaded_file.getvalue(), f".{file_extension}", UPLOAD_SPILL_MB * 1024 * 1024) as source:
+        text = extract_text_from_file(source, file_extension)
     cleaned_text = clean_text(text)
     tasks = prrse_tasks(text)
 
@@ -544,7 +528,28 @@ if uploaded_file is not None:
 
     st.subheader(" Generating Summary ")
     if st.button("genrate response"):
-        summary = summarize_with_gemini(cleaned_text)
+        # Each epic is shown as soon as its JSON object has streamed in
+        live_tasks = st.empty()
+
+        def show_partial_tasks(tasks_so_far):
+            with live_tasks.container():
+                display_task_statistics(tasks_so_far)
+                display_tasks(tasks_so_far)
+
+        # Excluded sections are dropped first; DOCX heading offsets make the best chunk boundaries
+        prompt_text, section_starts = prefilter_document(cleaned_text, st.session_state.get("document_outline"), LLM,
+                                                         report=report_message)
+        progress = st.empty()
+        summary = summarize_with_llm(
+            llm_backend, LLM, prompt_text,
+            boundaries=section_starts,
+            bypass_cache=bypass_llm_cache,
+            on_tasks=show_partial_tasks,
+            progress_callback=lambda done, total: progress.progress(
+                done / total, text=f"Extracted tasks from {done}/{total} document sections"),
+            report=report_message
+        )
+        progress.empty()
         st.write("### Summary:")
         if summary:
             with open("geminisummary.json", "w", encoding="utf-8") as f:
@@ -562,9 +567,6 @@ if uploaded_file is not None:
         else:
             st.error("Failed to generate summary from the document.")
 
-    # Clean up temp file
-    os.unlink(temp_docx_path)
-
 
 use_saved = st.checkbox("🔁 View the extracted tasks ")
 if use_saved:
@@ -611,22 +613,23 @@ if use_saved:
                     st.error(f"❌ Jira issue creation failed: {e}")
             #  github brnaches creation button
             if st.button(" Create Github Branches "):
+                base_sha = get_base_sha()
                 for t_idx, t in enumerate(tasks_data):
                     branch_name = f"feature_{t_idx+1}_{sanitize_branch_name(t['title'])}".lower()
                     try:
-                        create_github_branch(branch_name)
+                        create_github_branch(branch_name, base_sha=base_sha)
                     except Exception as e:
                         st.error(f"Failed to create branch {branch_name}: {e}")
                     for st_idx, stask in enumerate(t.get("subtasks", [])):
                         sub_branch_name = f"feature_{t_idx+1}_{st_idx+1}_{sanitize_branch_name(stask['title'])}".lower()
                         try:
-                            create_github_branch(sub_branch_name)
+                            create_github_branch(sub_branch_name, base_sha=base_sha)
                         except Exception as e:
                             st.error(f"Failed to create branch {sub_branch_name}: {e}")
                         for sst_idx, sstask in enumerate(stask.get("subtasks", [])):
                             sub_sub_branch_name = f"feature_{t_idx+1}_{st_idx+1}_{sst_idx+1}_{sanitize_branch_name(sstask['title'])}".lower()
                             try:
-                                create_github_branch(sub_sub_branch_name)
+                                create_github_branch(sub_sub_branch_name, base_sha=base_sha)
                             except Exception as e:
                                 st.error(f"Failed to create branch {sub_sub_branch_name}: {e}")
                             # st.success("All branches created!")
@@ -634,20 +637,21 @@ if use_saved:
             if st.button("Create test cases "):
                 # Simulate test case generation for each task, subtask, and sub-subtask
                 def walk_tasks_for_test_cases(tasks, parent_key="T"):
+                    tickets = []
                     for idx, task in enumerate(tasks):
                         task_key = f"{parent_key}{idx+1}"
-                        ticket = {
+                        tickets.append({
                             "key": task_key,
                             "summary": task.get("title", ""),
                             "description": task.get("description", "")
-                        }
-                        # replace with this Simulate_test_case_generation_ai for gerating test cases through AI 
-                        simulate_test_case_generation_ai(ticket)
-                        # time.sleep(2)  # Add a 2-second delay after each test case generation
+                        })
                         # Subtasks
                         if "subtasks" in task and task["subtasks"]:
-                            walk_tasks_for_test_cases(task["subtasks"], parent_key=f"{task_key}.")
-                walk_tasks_for_test_cases(tasks_data)
+                            tickets.extend(walk_tasks_for_test_cases(task["subtasks"], parent_key=f"{task_key}."))
+                    return tickets
+                # All tickets go to the model together so they can share requests
+                requests_made = simulate_test_case_generation_ai(walk_tasks_for_test_cases(tasks_data))
+                st.caption(f"Generated test cases with {requests_made} LLM requests")
                 st.success("✅  test cases generated for all tasks!")
                 # st.write("Creating test is coming soon")
 
@@ -1,15 +1,19 @@
 import streamlit as st
-import docx2txt
-import subprocess
-import tempfile
-import requests
+import threading
 import pandas as pd
 import os
-import re
 import json
 from dotenv import load_dotenv
 from github import Github
+from jira_client import JiraClient, get_cached_issue_types
 import openai
+from llm_cache import LLMResponseCache
+from ollama_client import DEFAULT_KEEP_ALIVE, DEFAULT_OLLAMA_HOST
+from llm_backends import create_backend, default_rate_limits
+from pipeline import TokenBucketLimiter
+from testcase_batching import generate_batched
+from llm_app import generate_with_llm, llm_cache_caption, prefilter_document, read_llm_settings, summarize_with_llm
+from extractors import SPILL_THRESHOLD_BYTES, extract_document, parse_engine_config, spilled
 # Load environment variables from .env file
 load_dotenv()
 
@@ -25,14 +29,41 @@ GITHUB_REPO = os.getenv("GITHUB_REPO")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
 GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+# Uploads above this size are spilled to a temp file instead of parsed in memory
+UPLOAD_SPILL_MB = int(os.getenv("UPLOAD_SPILL_MB", str(SPILL_THRESHOLD_BYTES // (1024 * 1024))))
+# Extraction engine per format, e.g. "docx=docx2txt"; unset formats use the defaults
+EXTRACTION_ENGINES = parse_engine_config(os.getenv("EXTRACTION_ENGINES", ""))
 
 
 OLLAMA_MODEL_NAME = "llama3.1"  # Change to your actual model name from `ollama list`
-
-
-
-def extract_text_from_docx(docx_path):
-    return docx2txt.process(docx_path)
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", DEFAULT_OLLAMA_HOST)
+# How long the Ollama server keeps the model loaded after a request, e.g. "30m" or "-1" for always
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", DEFAULT_KEEP_ALIVE)
+# Context window in tokens and CPU threads for generation; unset leaves Ollama's own defaults
+OLLAMA_NUM_CTX = os.getenv("OLLAMA_NUM_CTX", "8192")
+OLLAMA_NUM_THREAD = os.getenv("OLLAMA_NUM_THREAD")
+# Groq model used for test case generation
+GROQ_TEST_CASE_MODEL = "llama3-70b-8192"
+# Task extraction runs on Ollama with OLLAMA_MODEL_NAME and the shorter local prompt unless
+# LLM_BACKEND says otherwise (see llm_app.read_llm_settings). Documents are chunked at 6000
+# characters so the prompt and the JSON answer fit in OLLAMA_NUM_CTX
+LLM = read_llm_settings(default_backend="ollama", default_models={"ollama": OLLAMA_MODEL_NAME},
+                        default_chunk_chars=6000, default_prompt="local", temperature=None)
+# Backend and model for test case generation; unset model uses GROQ_TEST_CASE_MODEL on Groq
+TEST_CASE_BACKEND = os.getenv("TEST_CASE_BACKEND", "groq").lower()
+TEST_CASE_MODEL = os.getenv("TEST_CASE_MODEL") or (GROQ_TEST_CASE_MODEL if TEST_CASE_BACKEND == "groq" else None)
+# Requests and tokens per minute for test case generation when it runs on another backend than
+# task extraction (LLM_RPM / LLM_TPM); 0 disables a limit
+TEST_CASE_RPM = int(os.getenv("TEST_CASE_RPM", str(default_rate_limits(TEST_CASE_BACKEND)[0])))
+TEST_CASE_TPM = int(os.getenv("TEST_CASE_TPM", str(default_rate_limits(TEST_CASE_BACKEND)[1])))
+
+
+
+def extract_text_from_docx(source):
+    text, info = extract_document(source, fallback_format="docx", engines=EXTRACTION_ENGINES)
+    # (level, title, offset) of each DOCX heading in the text, for the pre-filter and chunking
+    st.session_state.document_outline = info.get("outline")
+    return text
 
 def prrse_tasks(text):
     lines = text.split('\n')
@@ -41,74 +72,60 @@ def prrse_tasks(text):
 def clean_text(text):
     return text.encode("utf-8", errors="ignore").decode("utf-8", errors="ignore")
 
-def summarize_with_ollama(text, model_name):
-    prompt = f"""
-Document Task Extraction for Jira Issues
-
-Please analyze the provided document (PDF, DOCX, or TXT) and extract all tasks that should be created as Jira issues. Organize them hierarchically as follows:
-
-1. Identify main tasks/topics that will serve as "Epics" in Jira
-2. Identify secondary tasks that will be "Tasks" under their respective Epics
-3. Identify detailed work items that will be "Subtasks" under their respective Tasks
-4. don't use comma(,) and dot(.) in the title and description
-Format the output as JSON with the following structure:
-{{
-  "tasks": [
-    {{
-      "title": "Main Task 1"
-      "description": " take Description of main task 1 from document"
-      "subtasks": [
-        {{
-          "title": "Subtask 1.1"
-          "description": "take Description of subtask 1.1 from document"
-          "subtasks": [
-            {{
-              "title": "Sub-subtask 1.1.1"
-              "description": " take Description of sub-subtask 1.1.1  from document"
-            }}
-          ]
-        }}
-      ]
-    }}
-  ]
-}}
-Important guidelines:
-- Use the exact titles and descriptions from the document
-- Ensure that the JSON is valid and well-structured
-- Extract only actionable tasks/items that represent work to be done
-- Maintain the hierarchical relationships between items
-- Ensure no valuable tasks are missed from the document
-
-Please analyze the document thoroughly and provide the complete JSON output ready for Jira import.
-\"\"\"
-{text}
-\"\"\"
-"""
-    try:
-        result = subprocess.run(
-            ["ollama", "run", model_name],
-            input=prompt,
-            capture_output=True,
-            text=True,
-            encoding='utf-8'
-        )
-
-        if result.returncode == 0:
-            raw_output = result.stdout.strip()
-
-            # Use regex to extract only the JSON block
-            match = re.search(r"\{[\s\S]*\}", raw_output)
-            if match:
-                return match.group(0)
-            else:
-                st.warning("No JSON block found in model response.")
-                return raw_output  # fallback to raw output
-        else:
-            st.error("Error from Ollama:\n" + result.stderr)
-            return None
-    except Exception as e:
-        st.error(f"An error occurred while running Ollama: {e}")
-        return None
+@st.cache_resource
+def get_llm_cache():
+    """LLM response cache shared across reruns, so hit counts accumulate"""
+    return LLMResponseCache(ttl=LLM.cache_ttl_hours * 3600, max_bytes=LLM.cache_mb * 1024 * 1024)
+
+def backend_options(name):
+    """Options from this app's config for backend ``name``; anything missing comes from the environment"""
+    if name == "ollama":
+        return {"host": OLLAMA_HOST, "keep_alive": OLLAMA_KEEP_ALIVE, "num_ctx": OLLAMA_NUM_CTX,
+                "num_thread": OLLAMA_NUM_THREAD}
+    if name == "groq":
+        return {"api_key": GROQ_API_KEY, "url": GROQ_API_URL}
+    return {}
+
+@st.cache_resource
+def get_llm_limiter(name):
+    """Rate limiter for backend ``name``, shared by every thread and rerun so the provider's quota is global.
+
+    Both backends on one provider share a limiter under the task extraction limits.
+    """
+    rpm, tpm = (LLM.rpm, LLM.tpm) if name == LLM.backend else (TEST_CASE_RPM, TEST_CASE_TPM)
+    return TokenBucketLimiter(rpm=rpm, tpm=tpm)
+
+@st.cache_resource
+def get_llm_backend():
+    """Task extraction backend; its pooled client survives Streamlit reruns"""
+    return create_backend(LLM.backend, LLM.model, max_concurrency=LLM.max_concurrency, cache=get_llm_cache(),
+                          limiter=get_llm_limiter(LLM.backend), **backend_options(LLM.backend))
+
+@st.cache_resource
+def get_test_case_backend():
+    """Test case generation backend; its pooled client survives Streamlit reruns"""
+    return create_backend(TEST_CASE_BACKEND, TEST_CASE_MODEL, max_concurrency=LLM.max_concurrency,
+                          cache=get_llm_cache(), limiter=get_llm_limiter(TEST_CASE_BACKEND),
+                          **backend_options(TEST_CASE_BACKEND))
+
+@st.cache_resource
+def warm_llm_backend():
+    """Load the extraction model in the background once per server process so the first summary doesn't pay for it"""
+    thread = threading.Thread(target=get_llm_backend().warmup, daemon=True)
+    thread.start()
+    return thread
+
+def generate_test_case_text(prompt, system_prompt, temperature=None, output_tokens=None):
+    """Test case completion text, served from the LLM response cache unless it is bypassed.
+
+    Raises RuntimeError when the API answers with an error status.
+    """
+    return generate_with_llm(test_case_backend, prompt, bypass_llm_cache, temperature, output_tokens=output_tokens,
+                             system=system_prompt)
+
+def report_message(kind, message):
+    """Show a message from llm_app as st.caption, st.warning or st.error"""
+    getattr(st, kind)(message)
 
 def count_tasks(tasks_data):
     """Count total number of tasks, subtasks, and sub-subtasks"""
@@ -242,26 +259,19 @@ def display_task_table(tasks_data):
     df = pd.DataFrame(table_data)
     st.dataframe(df, use_container_width=True, hide_index=True)
 
-def get_valid_issue_types():
-    url = f"{JIRA_BASE_URL}/rest/api/3/issuetype"
-    auth = (JIRA_EMAIL, JIRA_API_TOKEN)
-    response = requests.get(url, auth=auth)
-    if response.status_code == 200:
-        return [item["name"] for item in response.json()]
-    return []
+@st.cache_resource
+def get_jira_client():
+    """Shared Jira client whose connection pool survives Streamlit reruns"""
+    return JiraClient(JIRA_BASE_URL, JIRA_EMAIL, JIRA_API_TOKEN)
+
+def get_valid_issue_types(project_key=None):
+    return get_cached_issue_types(get_jira_client(), project_key)
 
 
 def create_jira_issue(summary, description, issue_type="Epic", parent_id=None, parent_type=None):
     st.write(f"📝 Creating Jira issue: {summary}")
 
-    url = f"{JIRA_BASE_URL}/rest/api/3/issue"
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json"
-    }
-    auth = (JIRA_EMAIL, JIRA_API_TOKEN)
-
-    valid_types = get_valid_issue_types()
+    valid_types = get_valid_issue_types(JIRA_PROJECT_KEY)
 
     # Auto-determine issue type based on parent
     if not parent_id:
@@ -302,7 +312,7 @@ def create_jira_issue(summary, description, issue_type="Epic", parent_id=None, p
     
         
 
-    response = requests.post(url, json=payload, headers=headers, auth=auth)
+    response = get_jira_client().post("/rest/api/3/issue", json=payload)
 
     if response.status_code == 201:
         issue_key = response.json().get("key")
@@ -313,17 +323,23 @@ def create_jira_issue(summary, description, issue_type="Epic", parent_id=None, p
         st.code(response.text)
         return None, None
 
-def create_github_branch(branch_name, base="main"):
-    g = Github(GITHUB_TOKEN)
-    repo = g.get_repo(GITHUB_REPO)
+@st.cache_resource
+def get_github_repo(repo_name):
+    """Cached GitHub client and repository handle, reused across branches and reruns"""
+    return Github(GITHUB_TOKEN).get_repo(repo_name)
 
+def get_base_sha(base="main"):
+    """Resolve the head commit of the base branch; call once per run"""
     try:
-        source = repo.get_branch(base)
+        return get_github_repo(GITHUB_REPO).get_branch(base).commit.sha
     except Exception as e:
         st.error(f"⚠️ Could not find base branch '{base}'. Check if it exists in your GitHub repo.")
         st.stop()
 
-    repo.create_git_ref(ref=f"refs/heads/{branch_name}", sha=source.commit.sha)
+def create_github_branch(branch_name, base="main", base_sha=None):
+    if base_sha is None:
+        base_sha = get_base_sha(base)
+    get_github_repo(GITHUB_REPO).create_git_ref(ref=f"refs/heads/{branch_name}", sha=base_sha)
 
 def simulate_test_case_generation(ticket, output_dir="test_cases"):
     os.makedirs(output_dir, exist_ok=True)
@@ -366,49 +382,42 @@ Title: {ticket['summary']}
 Description: {ticket['description']}
 """
 
-def simulate_test_case_generation_ai(ticket, output_dir="test_cases"):
-    try:
-        print("in try block for test case generation")
-        os.makedirs(output_dir, exist_ok=True)
-        file_path = os.path.join(output_dir, f"{ticket['key']}_test_cases.md")
-
-        prompt = generate_test_case_prompt(ticket)
-
-        response = requests.post(
-            GROQ_API_URL,
-            headers={
-                "Authorization": f"Bearer {GROQ_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "llama3-70b-8192",
-                "messages": [
-                    {"role": "system", "content": "You generate QA test cases."},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.5
-            }
-        )
+def simulate_test_case_generation_ai(tickets, output_dir="test_cases"):
+    """Write a test case file per ticket, packing several tickets into each LLM request.
 
-        # Handle API response
-        if response.status_code == 200:
-            result = response.json()
-            ai_output = result['choices'][0]['message']['content']
-            try:
+    Batches hold up to LLM.test_case_batch_size tickets and fit the test case
+    model's context window; each reply is split back into per-ticket files,
+    and tickets it misses are retried alone. Returns the number of requests
+    made.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    context_tokens, output_tokens = test_case_backend.limits()
+    progress = st.progress(0, text="Generating test cases...")
+    texts, errors, requests = generate_batched(
+        tickets,
+        lambda prompt, output_tokens: generate_test_case_text(prompt, "You generate QA test cases.", temperature=0.5,
+                                                              output_tokens=output_tokens),
+        generate_test_case_prompt,
+        context_tokens,
+        output_tokens,
+        max_batch=LLM.test_case_batch_size,
+        progress_callback=lambda done, total: progress.progress(done / total, text=f"Generated {done}/{total} test cases")
+    )
+    progress.empty()
+
+    for ticket in tickets:
+        file_path = os.path.join(output_dir, f"{ticket['key']}_test_cases.md")
+        try:
+            if ticket["key"] in errors:
+                print(f"❌ {errors[ticket['key']]}")
                 with open(file_path, "w") as f:
-                    f.write(f"# Test Cases for {ticket['key']} - {ticket['summary']}\n\n{ai_output}")
-            except Exception as file_error:
-                print(f"❌ Error writing test cases to file for {ticket['key']}: {file_error}")
-        else:
-            error_msg = f"API error {response.status_code}: {response.text}"
-            print(f"❌ {error_msg}")
+                    f.write(f"# Failed to generate test cases for {ticket['key']}\n{errors[ticket['key']]}")
+                continue
             with open(file_path, "w") as f:
-                f.write(f"# Failed to generate test cases for {ticket['key']}\n{error_msg}")
-    except Exception as e:
-        print(f"❌ Unexpected error during test case generation for {ticket['key']}: {e}")
-        fallback_path = os.path.join(output_dir, f"{ticket['key']}_error.log")
-        with open(fallback_path, "w") as f:
-            f.write(f"# Critical error while processing {ticket['key']}\nError: {str(e)}")
+                f.write(f"# Test Cases for {ticket['key']} - {ticket['summary']}\n\n{texts[ticket['key']]}")
+        except Exception as file_error:
+            print(f"❌ Error writing test cases to file for {ticket['key']}: {file_error}")
+    return requests
 
 
 # Streamlit UI
@@ -529,16 +538,32 @@ st.markdown("""
 """, unsafe_allow_html=True)
 st.title("📄📌 Jira Task Extractor using  LLama via Ollama")
 
+# Resolved here on the script thread so worker threads can use them
+llm_cache = get_llm_cache()
+try:
+    llm_backend = get_llm_backend()
+    test_case_backend = get_test_case_backend()
+except ValueError as e:
+    st.error(f"❌ {e}")
+    st.stop()
+warm_llm_backend()
+bypass_llm_cache = st.checkbox(
+    "♻️ Bypass LLM response cache",
+    help="Call the model even for a request it has answered before; the fresh response replaces the cached one."
+)
+if llm_cache_caption(llm_cache, LLM.cache_mb):
+    st.caption(llm_cache_caption(llm_cache, LLM.cache_mb))
+st.caption(f"Task extraction: {llm_backend.name} · {llm_backend.model} — "
+           f"test cases: {test_case_backend.name} · {test_case_backend.model}")
+
 uploaded_file = st.file_uploader("Upload a .docx project document", type=["docx"])
 
 if uploaded_file is not None:
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp_file:
-        tmp_file.write(uploaded_file.read())
-        temp_docx_path = tmp_file.name
-
     st.success("File uploaded successfully!")
 
-    text = extract_text_from_docx(temp_docx_path)
+    # Parse straight from the upload buffer; only very large files go through a temp file
+    with spilled(uploaded_file.getvalue(), ".docx", UPLOAD_SPILL_MB * 1024 * 1024) as source:
+        text = extract_text_from_docx(source)
     cleaned_text = clean_text(text)
     tasks = prrse_tasks(text)
 
@@ -548,7 +573,28 @@ if uploaded_file is not None:
 
     st.subheader("🧠 Generating Summary with LLaMA...")
     if st.button("genrate response"):
-        summary = summarize_with_ollama(cleaned_text, OLLAMA_MODEL_NAME)
+        # Each epic is shown as soon as its JSON object has streamed in
+        live_tasks = st.empty()
+
+        def show_partial_tasks(tasks_so_far):
+            with live_tasks.container():
+                display_task_statistics(tasks_so_far)
+                display_tasks(tasks_so_far)
+
+        # Excluded sections are dropped first; DOCX heading offsets make the best chunk boundaries
+        prompt_text, section_starts = prefilter_document(cleaned_text, st.session_state.get("document_outline"), LLM,
+                                                         report=report_message)
+        progress = st.empty()
+        summary = summarize_with_llm(
+            llm_backend, LLM, prompt_text,
+            boundaries=section_starts,
+            bypass_cache=bypass_llm_cache,
+            on_tasks=show_partial_tasks,
+            progress_callback=lambda done, total: progress.progress(
+                done / total, text=f"Extracted tasks from {done}/{total} document sections"),
+            report=report_message
+        )
+        progress.empty()
         st.write("### Summary:")
         if summary:
             # create the view to store llama response
@@ -567,9 +613,6 @@ if uploaded_file is not None:
         else:
             st.error("Failed to generate summary from the document.")
 
-    # Clean up temp file
-    os.unlink(temp_docx_path)
-
      #  view hierarchy code start here 
     
     # if summary:
@@ -664,24 +707,25 @@ if use_saved:
                     st.error(f"❌ Jira issue creation failed: {e}")
             #  github brnaches creation button
             if st.button("🚀 Create Github Branches "):
+                base_sha = get_base_sha()
                 for t in tasks_data:
                     branch_name = f"{t['title'].replace(' ', '_').replace('.', '_')}".lower()
                     try:
-                        create_github_branch(branch_name)
+                        create_github_branch(branch_name, base_sha=base_sha)
                         # st.success(f"Created branch: {branch_name}")
                     except Exception as e:
                         st.error(f"Failed to create branch {branch_name}: {e}")
                     for stask in t.get("subtasks", []):
                         sub_branch_name = f"{t['title'].replace(' ', '_').replace('.', '_')}".lower()
                         try:
-                            create_github_branch(sub_branch_name)
+                            create_github_branch(sub_branch_name, base_sha=base_sha)
                             # st.success(f"Created branch: {sub_branch_name}")
                         except Exception as e:
                             st.error(f"Failed to create branch {sub_branch_name}: {e}")
                         for sstask in stask.get("subtasks", []):
                             sub_sub_branch_name = f"{t['title'].replace(' ', '_').replace('.', '_')}".lower()
                             try:
-                                create_github_branch(sub_sub_branch_name)
+                                create_github_branch(sub_sub_branch_name, base_sha=base_sha)
                                 # st.success(f"Created branch: {sub_sub_branch_name}")
                             except Exception as e:
                                 st.error(f"Failed to create branch {sub_sub_branch_name}: {e}")
@@ -690,19 +734,21 @@ if use_saved:
             if st.button("🚀 Create test cases is comming soon "):
                 # Simulate test case generation for each task, subtask, and sub-subtask
                 def walk_tasks_for_test_cases(tasks, parent_key="T"):
+                    tickets = []
                     for idx, task in enumerate(tasks):
                         task_key = f"{parent_key}{idx+1}"
-                        ticket = {
+                        tickets.append({
                             "key": task_key,
                             "summary": task.get("title", ""),
                             "description": task.get("description", "")
-                        }
-                        # replace with this Simulate_test_case_generation_ai for gerating test cases through AI 
-                        simulate_test_case_generation_ai(ticket)
+                        })
                         # Subtasks
                         if "subtasks" in task and task["subtasks"]:
-                            walk_tasks_for_test_cases(task["subtasks"], parent_key=f"{task_key}.")
-                walk_tasks_for_test_cases(tasks_data)
+                            tickets.extend(walk_tasks_for_test_cases(task["subtasks"], parent_key=f"{task_key}."))
+                    return tickets
+                # All tickets go to the model together so they can share requests
+                requests_made = simulate_test_case_generation_ai(walk_tasks_for_test_cases(tasks_data))
+                st.caption(f"Generated test cases with {requests_made} LLM requests")
                 st.success("✅  test cases generated for all tasks!")
                 # st.write("Creating test is coming soon")
 
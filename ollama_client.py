@@ -0,0 +1,102 @@
+import json
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_OLLAMA_HOST = "http://localhost:11434"
+# (connect, read) timeouts in seconds; generation on CPU can take minutes
+DEFAULT_TIMEOUT = (5, 600)
+# Connections kept open to the Ollama server; sized for concurrent chunk extraction
+DEFAULT_POOL_SIZE = 8
+# How long Ollama keeps the model loaded after the last request
+DEFAULT_KEEP_ALIVE = "30m"
+
+
+class OllamaError(RuntimeError):
+    """Raised when the Ollama server can't be reached or answers with an error."""
+
+
+class OllamaClient:
+    """Pooled keep-alive session for the local Ollama HTTP API.
+
+    Every request carries ``keep_alive`` so the model stays loaded between
+    calls, and the ``num_ctx`` / ``num_thread`` runtime options when set.
+    """
+
+    def __init__(self, host=DEFAULT_OLLAMA_HOST, keep_alive=DEFAULT_KEEP_ALIVE, num_ctx=None, num_thread=None,
+                 timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE):
+        self.host = (host or DEFAULT_OLLAMA_HOST).rstrip("/")
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.options = {}
+        if num_ctx:
+            self.options["num_ctx"] = int(num_ctx)
+        if num_thread:
+            self.options["num_thread"] = int(num_thread)
+
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _post(self, path, payload, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        try:
+            response = self.session.post(f"{self.host}{path}", json=payload, **kwargs)
+        except requests.exceptions.RequestException as e:
+            raise OllamaError(f"Could not reach Ollama at {self.host}: {e}") from e
+        if response.status_code != 200:
+            try:
+                message = response.json().get("error", response.text)
+            except ValueError:
+                message = response.text
+            raise OllamaError(f"Ollama error {response.status_code}: {message}")
+        return response
+
+    def _payload(self, model, prompt, options=None, stream=False, system=None, format=None):
+        payload = {"model": model, "prompt": prompt, "stream": stream, "keep_alive": self.keep_alive}
+        if system:
+            payload["system"] = system
+        if format:
+            # "json" or a JSON schema the output is constrained to
+            payload["format"] = format
+        merged = dict(self.options, **(options or {}))
+        if merged:
+            payload["options"] = merged
+        return payload
+
+    def generate(self, model, prompt, options=None, system=None, format=None):
+        """Full completion text for ``prompt``; ``options`` override the client defaults."""
+        response = self._post("/api/generate", self._payload(model, prompt, options, system=system, format=format))
+        return response.json().get("response", "")
+
+    def generate_stream(self, model, prompt, options=None, system=None, format=None):
+        """Yield completion text fragments as the server produces them."""
+        payload = self._payload(model, prompt, options, stream=True, system=system, format=format)
+        response = self._post("/api/generate", payload, stream=True)
+        with response:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise OllamaError(f"Ollama error: {chunk['error']}")
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+
+    def warmup(self, model):
+        """Load ``model`` into memory without generating anything; returns False if that failed."""
+        payload = {"model": model, "keep_alive": self.keep_alive}
+        if self.options:
+            payload["options"] = dict(self.options)
+        try:
+            self._post("/api/generate", payload)
+            return True
+        except OllamaError:
+            return False
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,182 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Gemini 2.0 Flash free-tier limits; raise them for paid projects
+DEFAULT_LLM_RPM = 15
+DEFAULT_LLM_TPM = 1000000
+# Output tokens budgeted per request when only the prompt is known
+DEFAULT_OUTPUT_TOKENS = 1024
+
+
+def estimate_tokens(prompt, output_tokens=DEFAULT_OUTPUT_TOKENS):
+    """Rough token count of a request: ~4 characters per prompt token plus the expected output."""
+    return len(prompt) // 4 + output_tokens
+
+
+class TokenBucketLimiter:
+    """Keeps LLM calls under ``rpm`` requests and ``tpm`` tokens per minute across threads.
+
+    Both buckets start full and refill continuously, so up to a minute's
+    budget can go out in a burst. ``acquire`` blocks until the request fits
+    in both. A limit of None or 0 disables that bucket.
+    """
+
+    def __init__(self, rpm=DEFAULT_LLM_RPM, tpm=DEFAULT_LLM_TPM):
+        self.rpm = rpm or 0
+        self.tpm = tpm or 0
+        self._requests = float(self.rpm)
+        self._tokens = float(self.tpm)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited_seconds = 0.0
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def acquire(self, tokens=0):
+        """Wait until one request of ``tokens`` tokens is allowed; returns the seconds waited."""
+        # A request bigger than the whole bucket would never fit, so cap it at one minute's budget
+        if self.tpm:
+            tokens = min(tokens, self.tpm)
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                delay = 0.0
+                if self.rpm and self._requests < 1:
+                    delay = (1 - self._requests) * 60 / self.rpm
+                if self.tpm and self._tokens < tokens:
+                    delay = max(delay, (tokens - self._tokens) * 60 / self.tpm)
+                if delay == 0.0:
+                    if self.rpm:
+                        self._requests -= 1
+                    if self.tpm:
+                        self._tokens -= tokens
+                    waited = now - started
+                    self.waited_seconds += waited
+                    return waited
+            time.sleep(delay)
+
+
+class StageStats:
+    """Item counts and timings for one pipeline stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.done = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.first_start = None
+        self.last_end = None
+
+    def record(self, started, ended, ok):
+        if ok:
+            self.done += 1
+        else:
+            self.failed += 1
+        self.busy_seconds += ended - started
+        self.first_start = started if self.first_start is None else min(self.first_start, started)
+        self.last_end = ended if self.last_end is None else max(self.last_end, ended)
+
+    def as_row(self):
+        active = (self.last_end - self.first_start) if self.first_start is not None else 0.0
+        handled = self.done + self.failed
+        return {
+            "Stage": self.name,
+            "Done": self.done,
+            "Failed": self.failed,
+            "Items/min": round(handled * 60 / active, 1) if active else None,
+            "Avg seconds": round(self.busy_seconds / handled, 2) if handled else None
+        }
+
+
+def run_stages(items, stages, progress_callback=None, result_callback=None, batches=None):
+    """Push every item through ``stages`` with each stage running on its own bounded pool.
+
+    ``items`` is a list of (key, value) pairs and ``stages`` a list of
+    (name, func, max_workers). ``func(key, value)`` returns the value handed
+    to the next stage, so different items occupy different stages at the
+    same time. An exception stops that item only. ``progress_callback(done,
+    total)`` and ``result_callback(key, value, error)`` run on the calling
+    thread once an item leaves the pipeline.
+
+    With ``batches`` (lists of item keys) the first stage runs once per
+    batch instead: ``func(keys, values)`` returns (values, errors) dicts
+    keyed by item key, and each item moves on alone as soon as its batch
+    finishes. Items a batch leaves out of both dicts fail.
+
+    Returns (results, stats) where results maps key -> (value, error) and
+    stats is a list of StageStats in stage order.
+    """
+    stats = [StageStats(name) for name, _, _ in stages]
+    results = {}
+    total = len(items)
+    executors = [ThreadPoolExecutor(max_workers=max_workers) for _, _, max_workers in stages]
+
+    def timed(stage_idx, key, value):
+        started = time.monotonic()
+        try:
+            value, error = stages[stage_idx][1](key, value), None
+        except Exception as e:
+            value, error = None, e
+        return started, time.monotonic(), value, error
+
+    def timed_batch(keys, values):
+        started = time.monotonic()
+        try:
+            outputs, errors = stages[0][1](keys, values)
+        except Exception as e:
+            outputs, errors = {}, {key: e for key in keys}
+        ended = time.monotonic()
+        return [
+            (started, ended, outputs[key], None) if key in outputs
+            else (started, ended, None, errors.get(key) or RuntimeError(f"No result for {key}"))
+            for key in keys
+        ]
+
+    try:
+        pending = {}
+
+        def advance(stage_idx, key, started, ended, value, error):
+            stats[stage_idx].record(started, ended, error is None)
+            if error is None and stage_idx + 1 < len(stages):
+                next_future = executors[stage_idx + 1].submit(timed, stage_idx + 1, key, value)
+                pending[next_future] = (stage_idx + 1, key, False)
+                return
+
+            results[key] = (value, error)
+            if result_callback:
+                result_callback(key, value, error)
+            if progress_callback:
+                progress_callback(len(results), total)
+
+        if batches is None:
+            for key, value in items:
+                pending[executors[0].submit(timed, 0, key, value)] = (0, key, False)
+        else:
+            values = dict(items)
+            for batch in batches:
+                keys = list(batch)
+                pending[executors[0].submit(timed_batch, keys, [values[key] for key in keys])] = (0, keys, True)
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage_idx, key, batched = pending.pop(future)
+                if batched:
+                    for item_key, outcome in zip(key, future.result()):
+                        advance(stage_idx, item_key, *outcome)
+                else:
+                    advance(stage_idx, key, *future.result())
+    finally:
+        for executor in executors:
+            executor.shutdown(wait=True)
+
+    return results, stats
@@ -0,0 +1,134 @@
+import re
+from collections import namedtuple
+
+from chunking import find_section_starts
+from pipeline import estimate_tokens
+
+# Sections the extraction prompt tells the model to ignore, by heading wording:
+# Overview/Purpose/Scope, tech stack suggestions, time or hour estimates, web
+# design notes and total days or effort summaries. A heading is excluded only
+# if it is nothing but these words (plus the qualifiers below), so "Scope of
+# Work" or "Design the login page" are kept.
+EXCLUDED_SECTIONS = {
+    "overview": r"overview|purpose|scope",
+    "tech stack": r"tech(?:nology)? stack(?: suggestions?)?",
+    "time estimates": r"(?:(?:time|hours?) )?estimat(?:e|es|ion|ions)",
+    "design notes": r"(?:web )?design notes?",
+    "effort summary": r"total (?:days|effort)(?: summary)?|(?:days|effort) summary"
+}
+_QUALIFIER = r"(?:(?:project|document|system|application|app|product|overall|general|the|our|proposed|suggested" \
+             r"|recommended|high level|high-level)\s+)*"
+_OF_SUFFIX = r"(?:\s+of\s+(?:the\s+)?(?:project|document|system|application))?"
+_EXCLUDED_HEADINGS = {
+    category: re.compile(_QUALIFIER + f"(?:{pattern})" + _OF_SUFFIX) for category, pattern in EXCLUDED_SECTIONS.items()
+}
+# "Purpose and Scope", "Overview, Purpose & Scope"
+_HEADING_PARTS = re.compile(r"\s*(?:,|&|\band\b)\s*")
+# Leading "#", "2.1", "3)" or "IV." numbering and trailing ":" of a heading line
+_HEADING_DECORATION = re.compile(r"^[\s#*_]*(?:(?:\d+(?:\.\d+)*|[ivxlc]+)[.)]?\s+)?|[\s:.*_-]+$", re.IGNORECASE)
+_NUMBERING = re.compile(r"^\s*(#{1,6})?\s*(\d+(?:\.\d+)*)?")
+
+# Stand-alone effort lines outside any excluded section: "Total: 120 hours", "Estimated days - 15".
+# The time unit is required, so "Total users: 500" is a requirement and stays.
+_EFFORT_UNIT = r"(?:hours?|hrs?|days?|weeks?|man[- ]?days?)"
+_EFFORT_LINE = re.compile(
+    r"^[ \t*_-]*(?:grand )?(?:total|estimated?)\b"
+    r"(?:[\w \t/()]{0,40}?[:=\-–]?[ \t]*\d+(?:\.\d+)?[ \t]*" + _EFFORT_UNIT +
+    r"|[ \t]+(?:effort[ \t]+)?" + _EFFORT_UNIT + r"[ \t]*[:=\-–]?[ \t]*\d+(?:\.\d+)?)\b[ \t*_.]*$",
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Filtered document text: ``boundaries`` are the kept section starts in the new text
+# (None when no outline was given) and ``removed`` lists (category, title, chars)
+FilteredText = namedtuple("FilteredText", ["text", "boundaries", "removed"])
+
+
+def classify_heading(title):
+    """Excluded-section category of a heading, or None for a section to keep."""
+    heading = _HEADING_DECORATION.sub("", (title or "").strip()).lower()
+    heading = re.sub(r"\s+", " ", heading)
+    if not heading:
+        return None
+    category = None
+    for part in _HEADING_PARTS.split(heading):
+        if not part:
+            continue
+        part_category = next((name for name, pattern in _EXCLUDED_HEADINGS.items() if pattern.fullmatch(part)), None)
+        if part_category is None:
+            return None
+        category = category or part_category
+    return category
+
+
+def _detected_headings(text):
+    """(level, title, offset) of heading-like lines, with the level taken from # marks or numbering depth."""
+    headings = []
+    for offset in find_section_starts(text):
+        end = text.find("\n", offset)
+        line = text[offset:end if end != -1 else len(text)]
+        marks, number = _NUMBERING.match(line).groups()
+        level = len(marks) if marks else number.count(".") + 1 if number else 1
+        headings.append((level, line.strip(), offset))
+    return headings
+
+
+def _excluded_spans(text, headings):
+    """(start, end, category, title) of each excluded section, running to the next heading at its level or above."""
+    spans = []
+    covered = 0
+    for idx, (level, title, offset) in enumerate(headings):
+        if offset < covered:
+            continue
+        category = classify_heading(title) if level else None
+        if category is None:
+            continue
+        end = next((later for later_level, _, later in headings[idx + 1:] if later_level <= level), len(text))
+        spans.append((offset, end, category, title.strip()))
+        covered = end
+    return spans
+
+
+def filter_excluded_sections(text, outline=None):
+    """Drop the sections the extraction prompt would have the model ignore anyway.
+
+    Sections come from the DOCX ``outline`` of (level, title, offset) when
+    there is one and from heading-like lines otherwise; an excluded section
+    takes its subsections with it. Short "Total: 40 hours" lines are dropped
+    wherever they are. If nothing would be left, the text is kept as is.
+    """
+    headings = sorted(outline, key=lambda heading: heading[2]) if outline else _detected_headings(text)
+    spans = _excluded_spans(text, headings)
+
+    # Effort lines outside the excluded sections
+    for match in _EFFORT_LINE.finditer(text):
+        if not any(start <= match.start() < end for start, end, _, _ in spans):
+            end = min(match.end() + 1, len(text))
+            spans.append((match.start(), end, "effort summary", match.group().strip()))
+    spans.sort()
+
+    pieces = []
+    position = 0
+    for start, end, _, _ in spans:
+        pieces.append(text[position:start])
+        position = end
+    pieces.append(text[position:])
+    filtered = "".join(pieces)
+    if not spans or not filtered.strip():
+        return FilteredText(text, [offset for _, _, offset in outline] if outline else None, [])
+
+    boundaries = None
+    if outline:
+        # Shift kept headings left by the text removed before them
+        boundaries = []
+        for _, _, offset in headings:
+            if any(start <= offset < end for start, end, _, _ in spans):
+                continue
+            boundaries.append(offset - sum(end - start for start, end, _, _ in spans if end <= offset))
+    removed = [(category, title, end - start) for start, end, category, title in spans]
+    return FilteredText(filtered, boundaries, removed)
+
+
+def tokens_saved(text, filtered):
+    """(tokens saved, tokens before) of a FilteredText against its original ``text``, estimated alike."""
+    before = estimate_tokens(text, 0)
+    return before - estimate_tokens(filtered.text, 0), before
@@ -0,0 +1,67 @@
+def build_summary_prompt(text, task_format):
+    """Task extraction prompt for ``text``, asking for output in ``task_format`` (see compact_tasks)."""
+    return f"""
+Document Task Extraction for Jira Issues
+
+Please analyze the provided document (PDF, DOCX, or TXT) and extract all tasks that should be created as Jira issues. Organize them hierarchically as follows:
+
+1. Identify main tasks/topics that will serve as "Epics" in Jira
+2. Identify secondary tasks that will be "Tasks" under their respective Epics
+3. Identify detailed work items that will be "Subtasks" under their respective Tasks
+4. If a sub-subtask has its own subtasks, include them as sub-subtasks
+5. the description should be taken from the document
+6. keep the descriptions as short as possible but meaningful and concise which match in my document.
+7. make sure to don't miss-out and infromation from the document
+8. Do not include any sections related to Overview, Purpose, Scope, Tech stack suggestions, Time or hour estimates, Web design notes, Total days or effort summaries.
+{task_format.prompt_block}
+Important Guidelines:
+- don't add None, Select, and choose between  in description of tasks
+- if round brackets are used in the document then remove them from the description
+- if there are smimilar sub-tasks put them in under one related task
+- if description is more than 200 characters then convert into subtasks
+- don't include any explanations or summaries
+- don't use any extra text outside from the document
+- Stricly Don't use \n or \t in the title and description
+Given the following document content, remove any sections related to:
+- Overview Purpose Scope
+- Tech stack suggestions
+- Time or hour estimates
+- Web design notes
+- Total days or effort summaries
+Document Content:
+\"\"\"
+{text}
+\"\"\"
+"""
+
+
+def build_local_summary_prompt(text, task_format):
+    """Shorter extraction prompt for small local models such as LLaMA on Ollama."""
+    return f"""
+Document Task Extraction for Jira Issues
+
+Please analyze the provided document (PDF, DOCX, or TXT) and extract all tasks that should be created as Jira issues. Organize them hierarchically as follows:
+
+1. Identify main tasks/topics that will serve as "Epics" in Jira
+2. Identify secondary tasks that will be "Tasks" under their respective Epics
+3. Identify detailed work items that will be "Subtasks" under their respective Tasks
+4. don't use comma(,) and dot(.) in the title and description
+{task_format.prompt_block}
+Important guidelines:
+- Use the exact titles and descriptions from the document
+- Extract only actionable tasks/items that represent work to be done
+- Maintain the hierarchical relationships between items
+- Ensure no valuable tasks are missed from the document
+
+Please analyze the document thoroughly and provide the complete output ready for Jira import.
+\"\"\"
+{text}
+\"\"\"
+"""
+
+
+# Extraction prompts by name, for tools that compare them
+SUMMARY_PROMPTS = {
+    "standard": build_summary_prompt,
+    "local": build_local_summary_prompt
+}
@@ -0,0 +1,153 @@
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pipeline import estimate_tokens
+
+# Output tokens budgeted per ticket for two detailed test cases
+TICKET_OUTPUT_TOKENS = 700
+# Share of the context window and output limit a batch may fill, leaving room for estimation error
+BATCH_SAFETY = 0.75
+# Upper bound on tickets per request however large the window is
+DEFAULT_MAX_BATCH = 10
+# Batch requests in flight at once
+DEFAULT_BATCH_WORKERS = 2
+
+BATCH_INSTRUCTIONS = """
+You are a senior QA engineer. For each task below, write two detailed test cases including:
+- A title
+- Description
+- Steps
+- Expected Result
+- Priority
+
+Answer every task, in order. Start each answer with a line "=== TICKET <id> ===" using the task's id
+and end it with a line "=== END <id> ===". Write nothing outside these blocks.
+"""
+
+# "=== TICKET T1.2 ===", tolerating extra "=", spaces or markdown emphasis around the marker
+_TICKET_HEADER = re.compile(r"^[ \t*_#]*=+[ \t]*TICKET[ \t]+([^\s=*]+)[ \t]*=+[ \t*_]*$", re.MULTILINE)
+_TICKET_END = re.compile(r"^[ \t*_#]*=+[ \t]*END\b.*$", re.MULTILINE)
+
+
+def _ticket_block(ticket):
+    return f"Task {ticket['key']}:\nTitle: {ticket['summary']}\nDescription: {ticket['description']}\n"
+
+
+def build_batch_prompt(tickets):
+    """One prompt asking for the test cases of every ticket, with the shared instructions stated once."""
+    return BATCH_INSTRUCTIONS + "\n" + "\n".join(_ticket_block(ticket) for ticket in tickets)
+
+
+def split_batch_response(response, keys):
+    """Map each ticket key to its section of a batch reply.
+
+    Sections run from a ticket's header to its END marker, or to the next
+    header if the marker is missing. Keys that weren't asked for and empty
+    sections are dropped, so callers can retry whatever is absent.
+    """
+    wanted = set(keys)
+    headers = list(_TICKET_HEADER.finditer(response or ""))
+    sections = {}
+    for header, following in zip(headers, headers[1:] + [None]):
+        key = header.group(1)
+        body = response[header.end():following.start() if following else len(response)]
+        end = _TICKET_END.search(body)
+        if end:
+            body = body[:end.start()]
+        body = body.strip()
+        if key in wanted and body and key not in sections:
+            sections[key] = body
+    return sections
+
+
+def plan_batches(tickets, context_tokens, output_tokens, max_batch=DEFAULT_MAX_BATCH):
+    """Group tickets in order into batches that fit the model's context window and output limit."""
+    context_budget = int(context_tokens * BATCH_SAFETY)
+    output_budget = int(output_tokens * BATCH_SAFETY)
+    overhead = estimate_tokens(BATCH_INSTRUCTIONS, 0)
+
+    batches = []
+    current = []
+    prompt_tokens = overhead
+    for ticket in tickets:
+        ticket_tokens = estimate_tokens(_ticket_block(ticket), 0)
+        reply_tokens = (len(current) + 1) * TICKET_OUTPUT_TOKENS
+        fits = (len(current) < max_batch
+                and prompt_tokens + ticket_tokens + reply_tokens <= context_budget
+                and reply_tokens <= output_budget)
+        if current and not fits:
+            batches.append(current)
+            current = []
+            prompt_tokens = overhead
+        current.append(ticket)
+        prompt_tokens += ticket_tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def generate_batch(batch, generate, single_prompt):
+    """Test case text for one planned batch of tickets.
+
+    A batch of several tickets is sent as one request. Tickets its reply
+    leaves out (or every ticket, if that request failed) are retried one at
+    a time with ``single_prompt(ticket)``. ``generate(prompt,
+    output_tokens=...)`` is told the expected reply length, so a rate
+    limiter charges a batch for all of its tickets. Returns (texts, errors,
+    requests) as ``generate_batched`` does, for this batch only.
+    """
+    texts = {}
+    errors = {}
+    requests = 0
+    if len(batch) > 1:
+        requests += 1
+        try:
+            reply = generate(build_batch_prompt(batch), output_tokens=len(batch) * TICKET_OUTPUT_TOKENS)
+            texts = split_batch_response(reply, [t["key"] for t in batch])
+        except Exception:
+            texts = {}
+    for ticket in batch:
+        if ticket["key"] in texts:
+            continue
+        requests += 1
+        try:
+            text = (generate(single_prompt(ticket), output_tokens=TICKET_OUTPUT_TOKENS) or "").strip()
+        except Exception as e:
+            errors[ticket["key"]] = str(e)
+            continue
+        if text:
+            texts[ticket["key"]] = text
+        else:
+            errors[ticket["key"]] = "Empty response from the model"
+    return texts, errors, requests
+
+
+def generate_batched(tickets, generate, single_prompt, context_tokens, output_tokens, max_batch=DEFAULT_MAX_BATCH,
+                     max_workers=DEFAULT_BATCH_WORKERS, progress_callback=None):
+    """Generate test case text for many tickets with as few requests as fit the model.
+
+    ``generate(prompt, output_tokens=...) -> text`` runs on worker threads;
+    see ``generate_batch`` for how each batch is sent and retried.
+    ``progress_callback(done, total)`` runs on the calling thread as
+    tickets finish.
+
+    Returns (texts, errors, requests) where texts maps ticket key -> test
+    case text, errors maps key -> message for tickets that failed even
+    alone, and requests is the number of model calls made.
+    """
+    batches = plan_batches(tickets, context_tokens, output_tokens, max_batch) if max_batch > 1 else \
+        [[ticket] for ticket in tickets]
+
+    texts = {}
+    errors = {}
+    requests = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(generate_batch, batch, generate, single_prompt) for batch in batches]
+        for future in as_completed(futures):
+            batch_texts, batch_errors, batch_requests = future.result()
+            texts.update(batch_texts)
+            errors.update(batch_errors)
+            requests += batch_requests
+            if progress_callback:
+                progress_callback(len(texts) + len(errors), len(tickets))
+    return texts, errors, requests
@@ -0,0 +1,41 @@
+import pytest
+
+from chunking import split_into_chunks
+
+
+def _document(sections=12, lines=8):
+    return "".join(
+        f"# Section {idx}\n" + "".join(f"Requirement {idx}.{line} of the system\n" for line in range(lines))
+        for idx in range(sections)
+    )
+
+
+def test_short_text_is_one_chunk():
+    assert split_into_chunks("# One\nsmall\n", max_chars=100) == ["# One\nsmall\n"]
+    assert split_into_chunks("  \n", max_chars=100) == []
+
+
+def test_chunks_cut_on_sections_and_cover_the_text():
+    text = _document()
+    chunks = split_into_chunks(text, max_chars=600, overlap_chars=0)
+    assert len(chunks) > 1
+    assert "".join(chunks) == text
+    assert all(chunk.startswith("# Section") for chunk in chunks)
+    assert all(len(chunk) <= 600 for chunk in chunks)
+
+
+def test_chunks_start_with_tail_of_previous():
+    chunks = split_into_chunks(_document(), max_chars=600, overlap_chars=60)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        last_line = previous.splitlines(keepends=True)[-1]
+        assert chunk.startswith(last_line)
+
+
+@pytest.mark.parametrize("overlap_chars", [600, 5000])
+def test_overlap_not_shorter_than_chunk_is_capped(overlap_chars):
+    text = _document()
+    chunks = split_into_chunks(text, max_chars=600, overlap_chars=overlap_chars)
+    assert len(chunks) < len(text) // 100
+    assert all(len(chunk) <= 600 for chunk in chunks)
+    for idx in range(12):
+        assert any(f"Requirement {idx}.7 " in chunk for chunk in chunks)
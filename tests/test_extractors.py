@@ -0,0 +1,36 @@
+import io
+import zipfile
+
+from extractors import extract_docx, iter_docx_paragraphs
+
+W_NAMESPACE = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def paragraph(text, outline_level=None):
+    ppr = f'<w:pPr><w:outlineLvl w:val="{outline_level}"/></w:pPr>' if outline_level is not None else ""
+    return f"<w:p>{ppr}<w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def make_docx(body):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zipf:
+        zipf.writestr("word/document.xml", f"<w:document {W_NAMESPACE}><w:body>{body}</w:body></w:document>")
+    return buffer.getvalue()
+
+
+def test_outline_levels_and_table_cells():
+    data = make_docx(
+        paragraph("Login", 0)
+        + paragraph("Form", 1)
+        + "<w:tbl><w:tr><w:tc>" + paragraph("Cell") + "</w:tc></w:tr></w:tbl>"
+        + paragraph("Plain", 9)
+    )
+    assert list(iter_docx_paragraphs(data)) == [(1, "Login"), (2, "Form"), (None, "Cell"), (None, "Plain")]
+
+
+def test_malformed_outline_level_is_body_text():
+    data = make_docx(paragraph("Bad", "x") + paragraph("Negative", -1) + paragraph("Heading", 0))
+    assert list(iter_docx_paragraphs(data)) == [(None, "Bad"), (None, "Negative"), (1, "Heading")]
+    text, outline = extract_docx(data)
+    assert text == "Bad\nNegative\nHeading"
+    assert outline == [(1, "Heading", len("Bad\nNegative\n"))]
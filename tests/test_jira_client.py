@@ -0,0 +1,263 @@
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import requests
+
+from jira_client import (
+    CircuitOpenError,
+    JiraClient,
+    bulk_create_issues,
+    create_issue_tree_bulk,
+    create_issue_tree_concurrent,
+    parse_retry_delay,
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._data = data
+        self.text = json.dumps(data) if data is not None else ""
+
+    def json(self):
+        if self._data is None:
+            raise ValueError("No JSON body")
+        return self._data
+
+
+class FakeSession:
+    """Stand-in for requests.Session that answers each call with ``respond(method, url, json)``."""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.calls = []
+
+    def request(self, method, url, json=None, **kwargs):
+        self.calls.append((method, url, json))
+        return self.respond(method, url, json)
+
+    def close(self):
+        pass
+
+
+def make_client(respond, **options):
+    client = JiraClient("https://example.atlassian.net/", "me@example.com", "token", **options)
+    client.session = FakeSession(respond)
+    return client
+
+
+def scripted(*replies):
+    """Responder that plays ``replies`` in order; an exception instance is raised instead of returned."""
+    replies = list(replies)
+
+    def respond(method, url, body):
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    return respond
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Delays the client would have slept for, without the jitter."""
+    delays = []
+    monkeypatch.setattr("jira_client.time.sleep", delays.append)
+    monkeypatch.setattr("jira_client.random.uniform", lambda low, high: low)
+    return delays
+
+
+def bulk_responder(fail_titles=()):
+    """Create every issue in a bulk request except those titled in ``fail_titles``."""
+    created = []
+
+    def respond(method, url, body):
+        assert url.endswith("/rest/api/3/issue/bulk")
+        issues, errors = [], []
+        for idx, update in enumerate(body["issueUpdates"]):
+            title = update["fields"]["summary"]
+            if title in fail_titles:
+                errors.append({"failedElementNumber": idx, "status": 400,
+                               "elementErrors": {"errors": {"summary": f"{title} rejected"}}})
+            else:
+                created.append(update["fields"])
+                issues.append({"key": f"KEY-{len(created)}"})
+        return FakeResponse(400 if errors else 201, {"issues": issues, "errors": errors})
+
+    respond.created = created
+    return respond
+
+
+def test_failed_element_numbers_map_to_their_payloads():
+    client = make_client(bulk_responder(fail_titles={"b", "e"}))
+    payloads = [{"fields": {"summary": title}} for title in "abcde"]
+    results = bulk_create_issues(client, payloads, batch_size=3)
+    # failedElementNumber is relative to each batch of three
+    assert results == [("KEY-1", None), (None, "summary: b rejected"), ("KEY-2", None),
+                       ("KEY-3", None), (None, "summary: e rejected")]
+    assert len(client.session.calls) == 2
+
+
+def test_whole_batch_fails_on_unexpected_status():
+    client = make_client(lambda method, url, body: FakeResponse(403, {"errorMessages": ["forbidden"]}))
+    results = bulk_create_issues(client, [{"fields": {"summary": "a"}}] * 2)
+    assert [key for key, _ in results] == [None, None]
+    assert all("forbidden" in error for _, error in results)
+
+
+TREE = [
+    {"title": "Epic 1", "subtasks": [{"title": "Task 1.1", "subtasks": [{"title": "Sub 1.1.1"}]}]},
+    {"title": "Epic 2", "subtasks": [{"title": "Task 2.1", "subtasks": [{"title": "Sub 2.1.1"}]},
+                                     {"title": "Task 2.2"}]},
+]
+VALID_TYPES = ["Epic", "Task", "Subtask"]
+
+
+def test_tree_is_created_level_by_level_under_its_parents():
+    respond = bulk_responder()
+    client = make_client(respond)
+    recorded = []
+    results = create_issue_tree_bulk(client, "PRJ", TREE, VALID_TYPES,
+                                     result_callback=lambda path, result: recorded.append(path))
+
+    assert len(client.session.calls) == 3
+    assert [result["type"] for result in results.values()] == ["Epic", "Epic", "Task", "Task", "Task",
+                                                               "Subtask", "Subtask"]
+    parents = {fields["summary"]: fields.get("parent", {}).get("key") for fields in respond.created}
+    assert parents["Task 2.2"] == results["T2"]["key"]
+    assert parents["Sub 1.1.1"] == results["T1.1"]["key"]
+    assert sorted(recorded) == sorted(results)
+
+
+def test_descendants_of_a_failed_parent_are_skipped():
+    client = make_client(bulk_responder(fail_titles={"Epic 1"}))
+    progress = []
+    results = create_issue_tree_bulk(client, "PRJ", TREE, VALID_TYPES,
+                                     progress_callback=lambda done, total: progress.append((done, total)))
+
+    assert results["T1"]["error"] == "summary: Epic 1 rejected"
+    for path in ("T1.1", "T1.1.1"):
+        assert results[path]["key"] is None
+        assert results[path]["error"].startswith("Skipped because parent")
+    assert all(results[path]["key"] for path in ("T2", "T2.1", "T2.1.1", "T2.2"))
+    # Skipped nodes were never sent
+    sent = [update["fields"]["summary"] for _, _, body in client.session.calls for update in body["issueUpdates"]]
+    assert "Task 1.1" not in sent and "Sub 1.1.1" not in sent
+    assert progress[-1] == (7, 7)
+
+
+def test_existing_nodes_are_not_sent_again_but_parent_their_children():
+    client = make_client(bulk_responder())
+    existing = {"T1": {"key": "OLD-1", "type": "Epic"}, "T1.1": {"key": "OLD-2", "type": "Task"}}
+    results = create_issue_tree_bulk(client, "PRJ", TREE[:1], VALID_TYPES, existing=existing)
+
+    assert results["T1"]["key"] == "OLD-1"
+    assert len(client.session.calls) == 1
+    (_, _, body), = client.session.calls
+    assert body["issueUpdates"][0]["fields"]["parent"] == {"key": "OLD-2"}
+
+
+def test_concurrent_tree_creates_children_under_created_parents():
+    lock = threading.Lock()
+    created = {}
+
+    def respond(method, url, body):
+        assert url.endswith("/rest/api/3/issue")
+        fields = body["fields"]
+        if fields["summary"] == "Epic 1":
+            return FakeResponse(400, {"errors": {"summary": "rejected"}})
+        with lock:
+            key = f"KEY-{len(created) + 1}"
+            created[fields["summary"]] = (key, fields.get("parent", {}).get("key"))
+        return FakeResponse(201, {"key": key})
+
+    client = make_client(respond)
+    results = create_issue_tree_concurrent(client, "PRJ", TREE, VALID_TYPES, max_workers=4)
+
+    assert results["T1"]["key"] is None
+    assert results["T1.1.1"]["error"].startswith("Skipped because parent")
+    assert set(created) == {"Epic 2", "Task 2.1", "Sub 2.1.1", "Task 2.2"}
+    assert created["Task 2.2"][1] == results["T2"]["key"]
+    assert created["Sub 2.1.1"][1] == results["T2.1"]["key"]
+    assert results["T2.1.1"]["type"] == "Subtask"
+
+
+def test_retry_after_seconds_is_honoured(sleeps):
+    client = make_client(scripted(FakeResponse(429, headers={"Retry-After": "7"}), FakeResponse(200, {})))
+    assert client.get("/rest/api/3/myself").status_code == 200
+    assert sleeps == [7.0]
+    stats = client.throttle_stats()
+    assert (stats["requests"], stats["retries"], stats["throttled"]) == (2, 1, 1)
+
+
+def test_retry_delay_headers():
+    in_30s = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 28 < parse_retry_delay({"Retry-After": format_datetime(in_30s, usegmt=True)}) <= 30
+    reset = in_30s.isoformat().replace("+00:00", "Z")
+    assert 28 < parse_retry_delay({"X-RateLimit-Reset": reset}) <= 30
+    past = (datetime.now(timezone.utc) - timedelta(seconds=30)).isoformat()
+    assert parse_retry_delay({"X-RateLimit-Reset": past}) == 0.0
+    assert parse_retry_delay({"Retry-After": "soon"}) is None
+    assert parse_retry_delay({}) is None
+
+
+def test_rate_limit_reset_is_honoured_and_capped(sleeps):
+    reset = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
+    client = make_client(scripted(FakeResponse(503, headers={"X-RateLimit-Reset": reset}), FakeResponse(201, {})))
+    assert client.post("/rest/api/3/issue", json={}).status_code == 201
+    assert sleeps == [60.0]
+
+
+def test_retries_stop_after_max_retries(sleeps):
+    client = make_client(lambda method, url, body: FakeResponse(429), max_retries=2)
+    assert client.get("/rest/api/3/issuetype").status_code == 429
+    assert len(client.session.calls) == 3
+    # Jittered exponential backoff without a Retry-After header
+    assert len(sleeps) == 2
+
+
+def test_connection_error_is_retried_for_get_only(sleeps):
+    client = make_client(scripted(requests.ConnectionError("reset"), FakeResponse(200, {})))
+    assert client.get("/rest/api/3/issuetype").status_code == 200
+    assert len(client.session.calls) == 2
+
+    client = make_client(scripted(requests.ConnectionError("reset"), FakeResponse(201, {})))
+    with pytest.raises(requests.ConnectionError):
+        client.post("/rest/api/3/issue", json={})
+    assert len(client.session.calls) == 1
+    assert sleeps == [0.0]
+
+
+def test_breaker_opens_after_consecutive_failures(sleeps):
+    client = make_client(lambda method, url, body: FakeResponse(500), breaker_threshold=3, breaker_cooldown=60)
+    for _ in range(3):
+        assert client.get("/rest/api/3/issuetype").status_code == 500
+    with pytest.raises(CircuitOpenError):
+        client.get("/rest/api/3/issuetype")
+    assert len(client.session.calls) == 3
+    assert client.throttle_stats()["circuit_opens"] == 1
+
+
+def test_success_resets_the_failure_count(sleeps):
+    client = make_client(scripted(FakeResponse(500), FakeResponse(500), FakeResponse(200, {}), FakeResponse(500),
+                                  FakeResponse(500)), breaker_threshold=3)
+    for _ in range(5):
+        client.get("/rest/api/3/issuetype")
+    assert client.throttle_stats()["circuit_opens"] == 0
+
+
+def test_breaker_closes_after_cooldown(sleeps, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("jira_client.time.monotonic", lambda: now[0])
+    client = make_client(scripted(FakeResponse(500), FakeResponse(200, {})), breaker_threshold=1,
+                         breaker_cooldown=30)
+    client.get("/rest/api/3/issuetype")
+    with pytest.raises(CircuitOpenError):
+        client.get("/rest/api/3/issuetype")
+    now[0] += 31
+    assert client.get("/rest/api/3/issuetype").status_code == 200
@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+from json_stream import repair_json
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('Here:\n```json\n{"tasks": []}\n```', {"tasks": []}),
+    ('{"a": 1 "b": 2,}', {"a": 1, "b": 2}),
+    ('{"a": True, "b": None}', {"a": True, "b": None}),
+    ('{"a": "line1\nline2', {"a": "line1\nline2"}),
+    ('{"a": [1, {"b": ', {"a": [1, {"b": None}]}),
+])
+def test_repair_json(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"n": -', {"n": None}),
+    ('{"k": nul', {"k": None}),
+    ('{"x": 1.5e', {"x": None}),
+    ('{"a": [1, 2, -', {"a": [1, 2]}),
+    ('{"a": 1, "b": 12', {"a": 1, "b": 12}),
+])
+def test_repair_json_drops_literal_cut_short(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+def test_repair_json_without_object():
+    with pytest.raises(ValueError):
+        repair_json("no json here")
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+from jira_client import create_issue_tree_bulk
+from ledger import LEDGER_FILE, WorkflowLedger, document_key, ledger_path
+
+TREE = [
+    {"title": "Epic 1", "subtasks": [{"title": "Task 1.1"}, {"title": "Task 1.2"}]},
+    {"title": "Epic 2", "subtasks": [{"title": "Task 2.1"}]},
+]
+
+
+class Crash(BaseException):
+    """Stands in for the app process dying mid-run."""
+
+
+class FakeResponse:
+    status_code = 201
+
+    def __init__(self, data):
+        self.data = data
+        self.text = json.dumps(data)
+
+    def json(self):
+        return self.data
+
+
+class FakeJira:
+    """Bulk endpoint that numbers created issues and can die before answering the Nth request."""
+
+    base_url = "https://example.atlassian.net"
+
+    def __init__(self, crash_on_request=None):
+        self.crash_on_request = crash_on_request
+        self.sent = []
+
+    def post(self, path, json=None):
+        if len(self.sent) + 1 == self.crash_on_request:
+            raise Crash()
+        updates = json["issueUpdates"]
+        self.sent.append([update["fields"]["summary"] for update in updates])
+        return FakeResponse({"issues": [{"key": f"PRJ-{len(self.sent)}{idx}"} for idx in range(len(updates))],
+                             "errors": []})
+
+
+def run_creation(ledger, client):
+    """What the app does: skip recorded issues, record new ones, flush once per level."""
+    existing = ledger.existing_issues(TREE, "PRJ")
+
+    def record_issue(path, result):
+        if result["key"]:
+            ledger.record(path, result["title"], jira_key=result["key"], jira_type=result["type"],
+                          jira_project="PRJ")
+
+    with ledger.deferred():
+        return create_issue_tree_bulk(client, "PRJ", TREE, ["Epic", "Task", "Subtask"], existing=existing,
+                                      progress_callback=lambda done, total: ledger.flush(),
+                                      result_callback=record_issue)
+
+
+def test_restart_resumes_from_the_ledger(tmp_path):
+    path = ledger_path(document_key(b"project document"), tmp_path)
+
+    # The first run dies before the second level goes out
+    with pytest.raises(Crash):
+        run_creation(WorkflowLedger(path), FakeJira(crash_on_request=2))
+
+    # A fresh process loads the same document's ledger and only creates the missing level
+    ledger = WorkflowLedger(path)
+    assert ledger.get("T1", "Epic 1")["jira_key"] == "PRJ-10"
+    client = FakeJira()
+    results = run_creation(ledger, client)
+    assert client.sent == [["Task 1.1", "Task 1.2", "Task 2.1"]]
+    assert results["T1"]["key"] == "PRJ-10"
+    assert results["T1.2"]["key"] == "PRJ-11"
+    assert WorkflowLedger(path).get("T2.1", "Task 2.1")["jira_key"] == "PRJ-12"
+
+
+def test_deferred_writes_wait_for_flush(tmp_path):
+    path = tmp_path / "ledger.json"
+    ledger = WorkflowLedger(str(path))
+    with ledger.deferred():
+        ledger.record("T1", "Epic 1", jira_key="PRJ-1")
+        ledger.record("T2", "Epic 2", jira_key="PRJ-2")
+        assert not path.exists()
+        ledger.flush()
+        assert WorkflowLedger(str(path)).get("T2")["jira_key"] == "PRJ-2"
+        ledger.record("T3", "Epic 3", jira_key="PRJ-3")
+        assert WorkflowLedger(str(path)).get("T3") == {}
+    assert WorkflowLedger(str(path)).get("T3")["jira_key"] == "PRJ-3"
+
+    # Outside deferred() every record is written straight away
+    ledger.record("T4", "Epic 4")
+    assert WorkflowLedger(str(path)).get("T4") == {"title": "Epic 4"}
+
+
+def test_edited_titles_and_other_projects_are_not_existing(tmp_path):
+    ledger = WorkflowLedger(str(tmp_path / "ledger.json"))
+    ledger.record("T1", "Old epic title", jira_key="PRJ-1", jira_type="Epic", jira_project="PRJ")
+    ledger.record("T2", "Epic 2", jira_key="OTH-1", jira_type="Epic", jira_project="OTH")
+    assert ledger.existing_issues(TREE, "PRJ") == {}
+    assert ledger.existing_issues(TREE, "OTH") == {"T2": {"key": "OTH-1", "type": "Epic"}}
+
+
+def test_each_document_gets_its_own_file(tmp_path):
+    first = ledger_path(document_key(b"first document"), tmp_path)
+    second = ledger_path(document_key(b"second document"), tmp_path)
+    assert first != second
+    assert first == ledger_path(document_key(b"first document"), tmp_path)
+    assert ledger_path(None) == LEDGER_FILE
@@ -0,0 +1,105 @@
+import json
+
+from llm_app import llm_cache_caption, prefilter_document, read_llm_settings, summarize_with_llm
+
+
+class FakeBackend:
+    """Answers every extraction prompt with one epic named after the first document line."""
+
+    name = "fake"
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.calls = []
+
+    def _reply(self, prompt, bypass_cache):
+        self.calls.append(bypass_cache)
+        document = prompt.split('"""')[1].strip()
+        if self.fail_on and self.fail_on in document:
+            raise RuntimeError("quota exceeded")
+        title = document.splitlines()[0].lstrip("# ")
+        return json.dumps({"tasks": [{"title": title, "description": "", "subtasks": []}]})
+
+    def generate(self, prompt, system=None, temperature=None, bypass_cache=False, json_schema=None,
+                 output_tokens=None):
+        return self._reply(prompt, bypass_cache)
+
+    def stream(self, prompt, temperature=None, bypass_cache=False, json_schema=None):
+        reply = self._reply(prompt, bypass_cache)
+        yield reply[:10]
+        yield reply[10:]
+
+
+def _document(sections):
+    return "".join(f"# Section {idx}\n" + "Build the part of the system.\n" * 8 for idx in range(sections))
+
+
+def _settings(monkeypatch, **env):
+    for name in ("LLM_BACKEND", "SUMMARY_CHUNK_CHARS", "SUMMARY_PREFILTER"):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    return read_llm_settings()
+
+
+def test_settings_defaults_and_overrides(monkeypatch):
+    settings = _settings(monkeypatch, LLM_BACKEND="Ollama")
+    assert settings.backend == "ollama"
+    assert (settings.rpm, settings.tpm) == (0, 0)
+    local = read_llm_settings(default_backend="ollama", default_models={"ollama": "llama3.1"}, default_chunk_chars=6000)
+    assert (local.model, local.chunk_chars) == ("llama3.1", 6000)
+
+
+def test_short_document_streams_one_request(monkeypatch):
+    partial = []
+    summary = summarize_with_llm(FakeBackend(), _settings(monkeypatch), _document(1), on_tasks=partial.append)
+    assert [task["title"] for task in json.loads(summary)["tasks"]] == ["Section 0"]
+    assert partial
+
+
+def test_long_document_is_chunked_and_failures_reported(monkeypatch):
+    settings = _settings(monkeypatch, SUMMARY_CHUNK_CHARS="600")
+    backend = FakeBackend(fail_on="Section 1\n")
+    messages, progress = [], []
+    summary = summarize_with_llm(backend, settings, _document(6), bypass_cache=True,
+                                 progress_callback=lambda done, total: progress.append((done, total)),
+                                 report=lambda kind, message: messages.append((kind, message)))
+    titles = [task["title"] for task in json.loads(summary)["tasks"]]
+    assert len(backend.calls) == progress[-1][1] > 1
+    assert progress[0][0] == 0
+    assert all(backend.calls)
+    assert "Section 0" in titles and "Section 1" not in titles
+    assert [kind for kind, _ in messages] == ["warning"]
+
+
+def test_backend_error_is_reported(monkeypatch):
+    messages = []
+    summary = summarize_with_llm(FakeBackend(fail_on="Section"), _settings(monkeypatch), _document(1),
+                                 report=lambda kind, message: messages.append((kind, message)))
+    assert summary is None
+    assert messages == [("error", "LLM backend error (fake): quota exceeded")]
+
+
+def test_prefilter_reports_and_keeps_outline_boundaries(monkeypatch):
+    text = "Overview\nWhat this is.\nLogin\nBuild the login page.\n"
+    outline = [(1, "Overview", 0), (1, "Login", 23)]
+    messages = []
+    kept, boundaries = prefilter_document(text, outline, _settings(monkeypatch),
+                                          report=lambda kind, message: messages.append(kind))
+    assert kept == "Login\nBuild the login page.\n"
+    assert boundaries == [0]
+    assert messages == ["caption"]
+    assert prefilter_document(text, outline, _settings(monkeypatch, SUMMARY_PREFILTER="0")) == (text, [0, 23])
+
+
+def test_cache_caption():
+    class Cache:
+        hits, misses = 3, 1
+
+        def hit_rate(self):
+            return 0.75
+
+        def size_bytes(self):
+            return 2 * 1024 * 1024
+
+    assert llm_cache_caption(Cache(), 64) == "LLM cache: hit rate 75% (3/4) · 2.0/64 MB"
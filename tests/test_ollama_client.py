@@ -0,0 +1,102 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ollama_client import OllamaClient, OllamaError
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Stand-in for the /api/generate endpoint of a local Ollama server."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        # The client port identifies the TCP connection a request came in on
+        self.server.requests.append((body, self.client_address[1]))
+        status = 200
+        if body.get("model") == "missing":
+            status, data = 404, json.dumps({"error": "model 'missing' not found"}).encode()
+        elif body.get("model") == "broken":
+            status, data = 500, b"internal failure"
+        elif body.get("stream"):
+            lines = [{"response": word, "done": False} for word in ("Hel", "lo")] + [{"done": True}]
+            data = b"".join(json.dumps(line).encode() + b"\n" for line in lines)
+        else:
+            data = json.dumps({"response": f"echo {body.get('prompt', '')}", "done": True}).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllamaHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(server):
+    client = OllamaClient(f"http://127.0.0.1:{server.server_port}", keep_alive="45m", num_ctx="4096", num_thread=4)
+    yield client
+    client.close()
+
+
+def test_payload_carries_keep_alive_and_options(server, client):
+    assert client.generate("llama3.1", "hi", {"temperature": 0.2}, system="Be brief", format="json") == "echo hi"
+    payload, _ = server.requests[0]
+    assert payload["model"] == "llama3.1"
+    assert payload["keep_alive"] == "45m"
+    assert payload["stream"] is False
+    assert payload["system"] == "Be brief"
+    assert payload["format"] == "json"
+    # Per-call options are merged over the client's runtime options
+    assert payload["options"] == {"num_ctx": 4096, "num_thread": 4, "temperature": 0.2}
+
+
+def test_warmup_loads_model_without_prompt(server, client):
+    assert client.warmup("llama3.1") is True
+    payload, _ = server.requests[0]
+    assert "prompt" not in payload
+    assert payload["keep_alive"] == "45m"
+    assert payload["options"] == {"num_ctx": 4096, "num_thread": 4}
+
+
+def test_stream_yields_fragments(server, client):
+    assert list(client.generate_stream("llama3.1", "hi")) == ["Hel", "lo"]
+    assert server.requests[0][0]["stream"] is True
+
+
+def test_requests_reuse_one_connection(server, client):
+    for idx in range(3):
+        client.generate("llama3.1", f"prompt {idx}")
+    list(client.generate_stream("llama3.1", "stream"))
+    client.generate("llama3.1", "after stream")
+    assert len({port for _, port in server.requests}) == 1
+
+
+def test_error_body_is_surfaced(client):
+    with pytest.raises(OllamaError, match="404: model 'missing' not found"):
+        client.generate("missing", "hi")
+    with pytest.raises(OllamaError, match="500: internal failure"):
+        client.generate("broken", "hi")
+    with pytest.raises(OllamaError, match="404"):
+        list(client.generate_stream("missing", "hi"))
+
+
+def test_unreachable_server():
+    client = OllamaClient("http://127.0.0.1:1", timeout=(1, 1))
+    with pytest.raises(OllamaError, match="Could not reach Ollama"):
+        client.generate("llama3.1", "hi")
+    assert client.warmup("llama3.1") is False
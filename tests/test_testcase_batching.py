@@ -0,0 +1,116 @@
+import threading
+
+from testcase_batching import (
+    DEFAULT_MAX_BATCH,
+    TICKET_OUTPUT_TOKENS,
+    build_batch_prompt,
+    generate_batched,
+    plan_batches,
+    split_batch_response
+)
+
+
+def make_tickets(count, description="Do the thing"):
+    return [{"key": f"T{idx}", "summary": f"Task {idx}", "description": description} for idx in range(1, count + 1)]
+
+
+def batch_reply(tickets):
+    return "\n".join(f"=== TICKET {t['key']} ===\nCases for {t['key']}\n=== END {t['key']} ===" for t in tickets)
+
+
+def test_build_batch_prompt_states_instructions_once():
+    prompt = build_batch_prompt(make_tickets(3))
+    assert prompt.count("senior QA engineer") == 1
+    for key in ("T1", "T2", "T3"):
+        assert f"Task {key}:" in prompt
+
+
+def test_split_batch_response_maps_sections_to_keys():
+    response = "Intro\n=== TICKET T1 ===\none\n=== END T1 ===\n**=== TICKET T2 ===**\ntwo\n=== END T2 ===\n"
+    assert split_batch_response(response, ["T1", "T2"]) == {"T1": "one", "T2": "two"}
+
+
+def test_split_batch_response_runs_to_next_header_without_end_marker():
+    response = "=== TICKET T1 ===\none\n=== TICKET T2 ===\ntwo"
+    assert split_batch_response(response, ["T1", "T2"]) == {"T1": "one", "T2": "two"}
+
+
+def test_split_batch_response_drops_unknown_empty_and_repeated_sections():
+    response = (
+        "=== TICKET T1 ===\nfirst\n=== END T1 ===\n"
+        "=== TICKET T1 ===\nsecond\n=== END T1 ===\n"
+        "=== TICKET T2 ===\n\n=== END T2 ===\n"
+        "=== TICKET X9 ===\nstray\n=== END X9 ===\n"
+    )
+    assert split_batch_response(response, ["T1", "T2"]) == {"T1": "first"}
+    assert split_batch_response(None, ["T1"]) == {}
+
+
+def test_plan_batches_caps_batch_size_and_keeps_order():
+    tickets = make_tickets(25)
+    batches = plan_batches(tickets, context_tokens=10 ** 6, output_tokens=10 ** 6)
+    assert [len(batch) for batch in batches] == [DEFAULT_MAX_BATCH, DEFAULT_MAX_BATCH, 5]
+    assert [t for batch in batches for t in batch] == tickets
+
+
+def test_plan_batches_respects_output_limit():
+    # 75% of the output limit leaves room for three tickets' replies
+    batches = plan_batches(make_tickets(7), context_tokens=10 ** 6, output_tokens=TICKET_OUTPUT_TOKENS * 4)
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+
+
+def test_plan_batches_respects_context_window():
+    tickets = make_tickets(4, description="x" * 4000)
+    batches = plan_batches(tickets, context_tokens=4000, output_tokens=10 ** 6)
+    assert all(len(batch) == 1 for batch in batches)
+    assert len(batches) == 4
+
+
+def test_generate_batched_uses_one_request_per_batch():
+    tickets = make_tickets(4)
+    charged = []
+    lock = threading.Lock()
+
+    def generate(prompt, output_tokens=None):
+        with lock:
+            charged.append(output_tokens)
+        return batch_reply([t for t in tickets if f"Task {t['key']}:" in prompt])
+
+    texts, errors, requests = generate_batched(tickets, generate, lambda t: t["key"], 10 ** 6, 10 ** 6)
+    assert requests == 1
+    # The rate limiter is charged for every ticket's reply, not one default-sized reply
+    assert charged == [4 * TICKET_OUTPUT_TOKENS]
+    assert errors == {}
+    assert texts == {t["key"]: f"Cases for {t['key']}" for t in tickets}
+
+
+def test_generate_batched_retries_missing_tickets_alone():
+    tickets = make_tickets(3)
+
+    def generate(prompt, output_tokens=None):
+        if prompt.startswith("single "):
+            key = prompt.split()[1]
+            if key == "T3":
+                raise RuntimeError("boom")
+            return f"alone {key}"
+        # The batch reply leaves out T2 and T3
+        return batch_reply(tickets[:1])
+
+    progress = []
+    texts, errors, requests = generate_batched(
+        tickets, generate, lambda t: f"single {t['key']}", 10 ** 6, 10 ** 6,
+        progress_callback=lambda done, total: progress.append((done, total))
+    )
+    assert texts == {"T1": "Cases for T1", "T2": "alone T2"}
+    assert errors == {"T3": "boom"}
+    assert requests == 3
+    assert progress[-1] == (3, 3)
+
+
+def test_generate_batched_without_batching_sends_one_request_per_ticket():
+    tickets = make_tickets(3)
+    texts, errors, requests = generate_batched(tickets, lambda prompt, output_tokens: f"text {prompt}",
+                                               lambda t: t["key"], 10 ** 6, 10 ** 6, max_batch=1)
+    assert requests == 3
+    assert texts == {"T1": "text T1", "T2": "text T2", "T3": "text T3"}
+    assert errors == {}
@@ -0,0 +1,85 @@
+import threading
+import time
+
+from tree_executor import count_tree_nodes, iter_tree, run_tree
+
+TREE = [
+    {"title": "A", "subtasks": [{"title": "A1", "subtasks": [{"title": "A1a"}]}, {"title": "A2"}]},
+    {"title": "B", "subtasks": [{"title": "B1"}]},
+    {"title": "C"},
+]
+
+
+def test_iter_and_count():
+    assert [path for path, _, _ in iter_tree(TREE)] == ["T1", "T1.1", "T1.1.1", "T1.2", "T2", "T2.1", "T3"]
+    assert [path for path, _, _ in iter_tree(TREE, max_depth=1)] == ["T1", "T2", "T3"]
+    assert count_tree_nodes(TREE) == 7
+    assert count_tree_nodes(TREE, max_depth=2) == 6
+
+
+def test_parents_finish_before_children_start():
+    lock = threading.Lock()
+    events = []
+
+    def worker(path, node, parent_result):
+        with lock:
+            events.append(("start", path))
+        time.sleep(0.01)
+        with lock:
+            events.append(("end", path))
+        return {"path": path, "parent": parent_result["path"] if parent_result else None}
+
+    results = run_tree(TREE, worker, max_workers=4)
+
+    assert sorted(results) == ["T1", "T1.1", "T1.1.1", "T1.2", "T2", "T2.1", "T3"]
+    for path, result in results.items():
+        parent = path.rpartition(".")[0] or None
+        assert result["parent"] == parent
+        if parent:
+            assert events.index(("end", parent)) < events.index(("start", path))
+
+
+def test_siblings_run_concurrently_within_max_workers():
+    lock = threading.Lock()
+    running = [0, 0]
+    # All three epics must be in flight together to get past the barrier
+    barrier = threading.Barrier(3, timeout=5)
+
+    def worker(path, node, parent_result):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        if "." not in path:
+            barrier.wait()
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+        return path
+
+    run_tree(TREE, worker, max_workers=3)
+    assert running[1] == 3
+
+
+def test_children_of_rejected_nodes_are_skipped_and_counted():
+    progress = []
+    results = run_tree(
+        TREE,
+        lambda path, node, parent_result: node["title"] != "A",
+        should_descend=bool,
+        progress_callback=lambda done, total: progress.append((done, total))
+    )
+    assert sorted(results) == ["T1", "T2", "T2.1", "T3"]
+    assert progress[-1] == (7, 7)
+
+
+def test_max_depth_and_callbacks_on_calling_thread():
+    caller = threading.current_thread()
+    callback_threads = set()
+    results = run_tree(
+        TREE,
+        lambda path, node, parent_result: path,
+        max_depth=2,
+        result_callback=lambda path, result: callback_threads.add(threading.current_thread())
+    )
+    assert "T1.1.1" not in results and len(results) == 6
+    assert callback_threads == {caller}
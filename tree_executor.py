@@ -0,0 +1,81 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Jira Cloud tolerates roughly this many concurrent writes per site
+DEFAULT_MAX_WORKERS = 10
+
+
+def count_tree_nodes(tasks, max_depth=None):
+    """Count nodes in a task tree, optionally only down to ``max_depth`` levels."""
+    if max_depth is not None and max_depth <= 0:
+        return 0
+    child_depth = None if max_depth is None else max_depth - 1
+    return sum(1 + count_tree_nodes(task.get("subtasks", []), child_depth) for task in tasks)
+
+
+def child_path(parent_path, idx):
+    """Tree path of the ``idx``-th child (0-based) of ``parent_path``; "T" is the root."""
+    return f"{parent_path}{idx+1}" if parent_path == "T" else f"{parent_path}.{idx+1}"
+
+
+def iter_tree(tasks, max_depth=None, parent_path="T", depth=1):
+    """Yield (path, node, depth) for every node, parents before children."""
+    if max_depth is not None and depth > max_depth:
+        return
+    for idx, task in enumerate(tasks):
+        path = child_path(parent_path, idx)
+        yield path, task, depth
+        yield from iter_tree(task.get("subtasks", []), max_depth, path, depth + 1)
+
+
+def run_tree(tasks, worker, max_workers=DEFAULT_MAX_WORKERS, max_depth=None,
+             should_descend=bool, progress_callback=None, result_callback=None):
+    """Run ``worker`` over a task tree with parents always before their children.
+
+    ``worker(path, node, parent_result)`` is called for every node, where
+    ``path`` is the tree path (T1, T1.2, T1.2.3). As soon as a node's result
+    passes ``should_descend`` its children are submitted, so siblings run
+    concurrently up to ``max_workers``. Children of nodes that don't pass are
+    skipped. ``progress_callback(done, total)`` and
+    ``result_callback(path, result)`` run on the calling thread, which keeps
+    them safe for Streamlit widgets and for non thread-safe bookkeeping.
+
+    Returns a dict mapping tree paths to worker results.
+    """
+    total = count_tree_nodes(tasks, max_depth)
+    done = 0
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+
+        def submit(parent_path, children, parent_result, depth):
+            if max_depth is not None and depth > max_depth:
+                return
+            for idx, child in enumerate(children):
+                path = child_path(parent_path, idx)
+                future = executor.submit(worker, path, child, parent_result)
+                pending[future] = (path, child, depth)
+
+        submit("T", tasks, None, 1)
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                path, node, depth = pending.pop(future)
+                result = future.result()
+                results[path] = result
+                done += 1
+                if result_callback:
+                    result_callback(path, result)
+
+                children = node.get("subtasks", [])
+                if should_descend(result):
+                    submit(path, children, result, depth + 1)
+                elif max_depth is None or depth < max_depth:
+                    child_depth = None if max_depth is None else max_depth - depth
+                    done += count_tree_nodes(children, child_depth)
+
+            if progress_callback:
+                progress_callback(done, total)
+
+    return results